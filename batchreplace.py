@@ -0,0 +1,214 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+)
+
+from fileio import atomic_open, file_signature
+from findinfiles import MAX_SEARCH_FILE_BYTES, is_binary
+from ignore import IgnoreMatcher
+
+# Changed lines shown per file in the preview
+MAX_PREVIEW_LINES = 50
+
+
+def make_replacer(replacement, regex):
+    """Literal replacements must not expand backslashes or group references."""
+    return replacement if regex else (lambda m: replacement)
+
+
+def _split_eol(line):
+    for eol in (b'\r\n', b'\n', b'\r'):
+        if line.endswith(eol):
+            return line[:-len(eol)], eol
+    return line, b''
+
+
+def preview_file(path, pattern, replacer):
+    """
+    Stream through path and return a preview dict (path, signature, count,
+    changed 0-based lines, sample lines), or None when nothing would change.
+    The rewritten content itself is never kept.
+    """
+    signature = file_signature(path)
+    if signature is None or signature[1] > MAX_SEARCH_FILE_BYTES:
+        return None
+    lines, samples, count = [], [], 0
+    try:
+        with open(path, 'rb') as f:
+            if is_binary(f.read(8192)):
+                return None
+            f.seek(0)
+            for line_no, raw in enumerate(f):
+                body, _ = _split_eol(raw)
+                text = body.decode('utf-8', errors='surrogateescape')
+                new_text, n = pattern.subn(replacer, text)
+                if n:
+                    count += n
+                    lines.append(line_no)
+                    if len(samples) < MAX_PREVIEW_LINES:
+                        samples.append((line_no + 1, text.strip(), new_text.strip()))
+    except (OSError, UnicodeError):
+        return None
+    if not count:
+        return None
+    return {'path': path, 'signature': signature, 'count': count, 'lines': lines, 'samples': samples}
+
+
+def rewrite_file(preview, pattern, replacer):
+    """
+    Apply the replacement to disk by streaming the file into an atomic temp
+    file. Returns None on success or an error message.
+    """
+    path = preview['path']
+    if file_signature(path) != preview['signature']:
+        return "file changed since the preview"
+    try:
+        with open(path, 'rb') as src, atomic_open(path, 'wb') as dst:
+            for raw in src:
+                body, eol = _split_eol(raw)
+                text = body.decode('utf-8', errors='surrogateescape')
+                dst.write(pattern.sub(replacer, text).encode('utf-8', errors='surrogateescape') + eol)
+    except (OSError, UnicodeError) as e:
+        return str(e)
+    return None
+
+
+class BatchPreviewWorker(QThread):
+    """Computes per-file replacement previews on a thread pool."""
+    file_previewed = pyqtSignal(dict)
+    progress = pyqtSignal(int)   # files examined
+    finished_preview = pyqtSignal(bool)   # True if cancelled
+
+    def __init__(self, root, pattern, replacer, candidates=None, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.pattern = pattern
+        self.replacer = replacer
+        self.candidates = candidates
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        files = self.candidates
+        if files is None:
+            files = IgnoreMatcher(self.root).walk_files(self.cancel_event)
+        examined = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            for path in files:
+                if self.cancel_event.is_set():
+                    break
+                pending.add(pool.submit(preview_file, path, self.pattern, self.replacer))
+                # Keep a bounded number of files in flight
+                if len(pending) >= self.max_workers * 4:
+                    self._collect_one(pending)
+                    examined += 1
+                    self.progress.emit(examined)
+            while pending and not self.cancel_event.is_set():
+                self._collect_one(pending)
+                examined += 1
+                self.progress.emit(examined)
+            for future in pending:
+                future.cancel()
+        self.finished_preview.emit(self.cancel_event.is_set())
+
+    def _collect_one(self, pending):
+        future = next(as_completed(pending))
+        pending.discard(future)
+        result = future.result()
+        if result is not None:
+            self.file_previewed.emit(result)
+
+
+class BatchApplyWorker(QThread):
+    """Writes accepted replacements to disk in parallel, one atomic rename per file."""
+    file_written = pyqtSignal(dict)        # the preview that was applied
+    file_failed = pyqtSignal(str, str)     # path, error
+    finished_apply = pyqtSignal(int, int)  # files written, files failed
+
+    def __init__(self, previews, pattern, replacer, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.previews = previews
+        self.pattern = pattern
+        self.replacer = replacer
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+
+    def run(self):
+        written = failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(rewrite_file, p, self.pattern, self.replacer): p for p in self.previews}
+            for future in as_completed(futures):
+                preview = futures[future]
+                error = future.result()
+                if error is None:
+                    written += 1
+                    self.file_written.emit(preview)
+                else:
+                    failed += 1
+                    self.file_failed.emit(preview['path'], error)
+        self.finished_apply.emit(written, failed)
+
+
+class BatchReplaceDialog(QDialog):
+    """Preview tree for a workspace-wide replace; files can be unchecked before applying."""
+    apply_requested = pyqtSignal(list)   # accepted previews
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, root, find_text, replace_text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Replace in Files')
+        self.resize(800, 500)
+        self.root = root
+        self.previews = []
+        layout = QVBoxLayout(self)
+        self.summary = QLabel(f"Previewing '{find_text}' -> '{replace_text}'...")
+        layout.addWidget(self.summary)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(['File / line', 'Before', 'After'])
+        self.tree.setUniformRowHeights(True)
+        layout.addWidget(self.tree)
+        buttons = QHBoxLayout()
+        self.apply_button = QPushButton('Apply')
+        cancel_button = QPushButton('Cancel')
+        buttons.addStretch(1)
+        buttons.addWidget(self.apply_button)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+        self.apply_button.setEnabled(False)
+        self.apply_button.clicked.connect(self._apply)
+        cancel_button.clicked.connect(self.reject)
+        # Closing the dialog either way stops a preview that is still running
+        self.finished.connect(self.cancel_requested)
+
+    def add_preview(self, preview):
+        rel = os.path.relpath(preview['path'], self.root)
+        item = QTreeWidgetItem([f"{rel} ({preview['count']})"])
+        item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+        item.setCheckState(0, Qt.Checked)
+        item.setData(0, Qt.UserRole, len(self.previews))
+        for line_no, before, after in preview['samples']:
+            item.addChild(QTreeWidgetItem([str(line_no), before, after]))
+        self.previews.append(preview)
+        self.tree.addTopLevelItem(item)
+
+    def preview_finished(self, cancelled):
+        total = sum(p['count'] for p in self.previews)
+        self.summary.setText(f"{total} replacements in {len(self.previews)} files"
+                             + (" (preview cancelled)" if cancelled else ""))
+        self.apply_button.setEnabled(bool(self.previews))
+
+    def _apply(self):
+        accepted = []
+        for i in range(self.tree.topLevelItemCount()):
+            item = self.tree.topLevelItem(i)
+            if item.checkState(0) == Qt.Checked:
+                accepted.append(self.previews[item.data(0, Qt.UserRole)])
+        self.apply_requested.emit(accepted)
+        self.accept()
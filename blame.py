@@ -0,0 +1,274 @@
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.Qsci import QsciScintilla
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from linediff import matching_blocks, split_lines
+
+# Committed files whose blame is kept in memory, by (path, HEAD blob sha)
+MAX_CACHED_FILES = 64
+BLAME_MARGIN = 0
+MARGIN_WIDTH = '0000000 0000-00-00 MMMMMMMMMMMM'
+# Per-line attribution besides a commit index; None means "not known yet"
+UNCOMMITTED = -1
+INSERT, DELETE, MARK = range(3)
+
+
+class BlameCache:
+    """Blame of committed files by (path, blob sha); the least recently used is dropped first."""
+
+    def __init__(self, size=MAX_CACHED_FILES):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, sha):
+        with self._lock:
+            entry = self._items.get((path, sha))
+            if entry is not None:
+                self._items.move_to_end((path, sha))
+            return entry
+
+    def put(self, path, sha, entry):
+        with self._lock:
+            self._items[(path, sha)] = entry
+            self._items.move_to_end((path, sha))
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+cache = BlameCache()
+
+
+def _align(blocks, head_attribution, line_count):
+    """Carry HEAD line attribution over to the buffer lines those lines survive as."""
+    lines = [UNCOMMITTED] * line_count
+    for a, b, size in blocks:
+        lines[b:b + size] = head_attribution[a:a + size]
+    return lines
+
+
+def _head_span(blocks, first, last):
+    """HEAD line range (0-based, end exclusive) covering buffer lines first..last, or None."""
+    low = high = None
+    for a, b, size in blocks:
+        start, end = max(first, b), min(last, b + size)
+        if start < end:
+            low = a + start - b if low is None else low
+            high = a + end - b
+    return None if low is None else (low, high)
+
+
+def _attribution(result, line_count):
+    """Turn (commits, ranges) from GitManager.blame_incremental into (commit list, per-HEAD-line indices)."""
+    commits, ranges = result
+    order = {sha: i for i, sha in enumerate(commits)}
+    table = [(sha,) + info for sha, info in commits.items()]
+    lines = [None] * line_count
+    for final, count, sha in ranges:
+        count = min(count, line_count - (final - 1))
+        lines[final - 1:final - 1 + count] = [order[sha]] * count
+    return table, lines
+
+
+def apply_edit(lines, edit):
+    kind, line, count = edit
+    if kind == INSERT:
+        lines[line:line] = [UNCOMMITTED] * count
+    elif kind == DELETE:
+        del lines[line:line + count]
+    elif line < len(lines):
+        lines[line] = UNCOMMITTED
+
+
+class BlameWorker(QThread):
+    """
+    Blames one buffer snapshot: the lines on screen first, so they show up
+    quickly on long files, then the whole file, which is cached by HEAD blob.
+    """
+    ready = pyqtSignal(list, list, bool)   # commits, per-buffer-line attribution, complete
+
+    def __init__(self, git_manager, path, text, encoding, visible, parent=None):
+        super().__init__(parent)
+        self.git = git_manager
+        self.path = path
+        self.text = text
+        self.encoding = encoding
+        self.visible = visible
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        buffer_lines = split_lines(self.text)
+        sha, data = self.git.head_blob(self.path)
+        if sha is None:
+            self.ready.emit([], [UNCOMMITTED] * len(buffer_lines), True)
+            return
+        codec, bom = self.encoding
+        if bom and data.startswith(bom):
+            data = data[len(bom):]
+        head_lines = split_lines(data.decode(codec, errors='replace'))
+        # git does not count the empty line after a final newline
+        blamed = len(head_lines) - (head_lines[-1] == '')
+        blocks = matching_blocks(head_lines, buffer_lines)
+        entry = cache.get(self.path, sha)
+        if entry is None:
+            span = _head_span(blocks, *self.visible)
+            if span is not None and span[0] < blamed:
+                result = self.git.blame_incremental(self.path, first=span[0] + 1, last=min(span[1], blamed),
+                                                    cancel_event=self.cancel_event)
+                if self.cancel_event.is_set():
+                    return
+                if result is not None:
+                    commits, head_attribution = _attribution(result, len(head_lines))
+                    self.ready.emit(commits, _align(blocks, head_attribution, len(buffer_lines)), False)
+            result = self.git.blame_incremental(self.path, cancel_event=self.cancel_event)
+            if result is None:
+                return
+            entry = _attribution(result, len(head_lines))
+            cache.put(self.path, sha, entry)
+        commits, head_attribution = entry
+        self.ready.emit(commits, _align(blocks, head_attribution, len(buffer_lines)), True)
+
+
+class BlameMargin(QObject):
+    """
+    Shows blame in an editor's left margin. Edits shift the annotations
+    line by line and mark touched lines as not committed, so typing never
+    re-runs git; call refresh() to recompute, e.g. after HEAD moves. Only
+    the lines on screen get margin text.
+    """
+    commit_clicked = pyqtSignal(str)
+
+    def __init__(self, editor, git_manager):
+        super().__init__(editor)
+        self.editor = editor
+        self.git = git_manager
+        self.commits = []
+        self.lines = []
+        self._edits = None      # edits made since the running worker's snapshot
+        self._worker = None
+        self._workers = set()
+        self._painted = None
+        self._paint_timer = QTimer(self)
+        self._paint_timer.setSingleShot(True)
+        self._paint_timer.setInterval(0)
+        self._paint_timer.timeout.connect(self._paint)
+        editor.setMarginType(BLAME_MARGIN, QsciScintilla.TextMargin)
+        editor.setMarginWidth(BLAME_MARGIN, MARGIN_WIDTH)
+        editor.setMarginSensitivity(BLAME_MARGIN, True)
+        editor.SCN_MODIFIED.connect(self._on_modified)
+        editor.SCN_UPDATEUI.connect(self._schedule_paint)
+        editor.marginClicked.connect(self._on_margin_clicked)
+
+    def detach(self):
+        """Remove the margin and stop any running blame."""
+        self.editor.SCN_MODIFIED.disconnect(self._on_modified)
+        self.editor.SCN_UPDATEUI.disconnect(self._schedule_paint)
+        self.editor.marginClicked.disconnect(self._on_margin_clicked)
+        for worker in list(self._workers):
+            worker.cancel()
+            worker.wait()
+        self._worker = None
+        self.editor.clearMarginText()
+        self.editor.setMarginWidth(BLAME_MARGIN, 0)
+        self.editor.setMarginSensitivity(BLAME_MARGIN, False)
+        self.deleteLater()
+
+    def refresh(self):
+        """Recompute blame for the buffer as it is now; unchanged HEAD blobs come from the cache."""
+        if self._worker is not None:
+            self._worker.cancel()
+        editor = self.editor
+        first, last = self._visible_lines()
+        info = editor.file_encoding
+        encoding = (info.encoding, info.bom) if info is not None else ('utf-8', b'')
+        worker = BlameWorker(self.git, editor.file_path, editor.text(), encoding, (first, last + 1), parent=self)
+        worker.ready.connect(self._on_ready)
+        worker.finished.connect(self._on_worker_finished)
+        self._edits = []
+        self._worker = worker
+        self._workers.add(worker)
+        worker.start()
+
+    def _on_worker_finished(self):
+        self._workers.discard(self.sender())
+
+    def _on_ready(self, commits, lines, complete):
+        if self.sender() is not self._worker:
+            return
+        for edit in self._edits:
+            apply_edit(lines, edit)
+        if complete:
+            self._edits = None
+            self._worker = None
+        self.commits, self.lines = commits, lines
+        self._painted = None
+        self._paint()
+
+    # --- Following edits ---
+    def _on_modified(self, position, mtype, text, length, lines_added, *args):
+        if not mtype & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        editor = self.editor
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        at_start = position == editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        if lines_added > 0:
+            # Whole lines inserted at a line start push the old line down untouched
+            whole = at_start and editor.SendScintilla(QsciScintilla.SCI_GETCHARAT, position + length - 1) == 10
+            edits = [(INSERT, line, lines_added)] if whole else [(MARK, line, 1), (INSERT, line + 1, lines_added)]
+        elif lines_added < 0:
+            edits = [(DELETE, line, -lines_added)] if at_start else [(MARK, line, 1), (DELETE, line + 1, -lines_added)]
+        else:
+            edits = [(MARK, line, 1)]
+        if self.lines:
+            for edit in edits:
+                apply_edit(self.lines, edit)
+        if self._edits is not None:
+            self._edits.extend(edits)
+        self._painted = None
+        self._paint_timer.start()
+
+    # --- Painting ---
+    def _schedule_paint(self, *args):
+        self._paint_timer.start()
+
+    def _visible_lines(self):
+        editor = self.editor
+        top = editor.firstVisibleLine()
+        rows = editor.SendScintilla(QsciScintilla.SCI_LINESONSCREEN)
+        first = editor.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, top)
+        last = editor.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, top + rows)
+        return first, last
+
+    def _paint(self):
+        first, last = self._visible_lines()
+        if self._painted == (first, last):
+            return
+        self._painted = (first, last)
+        editor = self.editor
+        editor.clearMarginText()
+        previous = None
+        for line in range(first, min(last + 1, len(self.lines))):
+            index = self.lines[line]
+            # Label only the first line of each run from the same commit
+            if index is not None and (index != previous or line == first):
+                editor.setMarginText(line, self._label(index), QsciScintilla.STYLE_DEFAULT)
+            previous = index
+
+    def _label(self, index):
+        if index == UNCOMMITTED:
+            return 'Not committed yet'
+        sha, author, when, summary = self.commits[index]
+        return f"{sha[:7]} {time.strftime('%Y-%m-%d', time.localtime(when))} {author[:12]}"
+
+    def _on_margin_clicked(self, margin, line, modifiers):
+        if margin != BLAME_MARGIN or line >= len(self.lines):
+            return
+        index = self.lines[line]
+        if index is not None and index != UNCOMMITTED:
+            self.commit_clicked.emit(self.commits[index][0])
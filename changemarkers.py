@@ -0,0 +1,157 @@
+from PyQt5.Qsci import QsciScintilla
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QColor
+
+from linediff import matching_blocks, split_lines
+
+CHANGE_MARGIN = 3
+ADDED, MODIFIED, DELETED = 20, 21, 22
+MARKER_MASK = (1 << ADDED) | (1 << MODIFIED) | (1 << DELETED)
+DEBOUNCE_MS = 300
+
+
+def read_head_lines(git_manager, path, encoding, known_sha=None, cancel_event=None):
+    """
+    Return (blob sha, lines) of path as committed in HEAD, or (None, None) if
+    it is not tracked. The blob is not read when its sha equals known_sha.
+    """
+    if known_sha is not None and git_manager.head_blob_sha(path) == known_sha:
+        return known_sha, None
+    sha, data = git_manager.head_blob(path)
+    if sha is None:
+        return None, None
+    codec, bom = encoding
+    if bom and data.startswith(bom):
+        data = data[len(bom):]
+    return sha, split_lines(data.decode(codec, errors='replace'))
+
+
+def _gaps(blocks, head_count, line_count):
+    """Yield (head start, head end, line start, line end) for each run between matching blocks."""
+    i = j = 0
+    for a, b, size in blocks + [(head_count, line_count, 0)]:
+        if i < a or j < b:
+            yield i, a, j, b
+        i, j = a + size, b + size
+
+
+class ChangeMarkers(QObject):
+    """
+    Marks lines added, modified or deleted relative to HEAD in a narrow
+    margin. Edits only widen a dirty line range; after a pause just that
+    range, grown to the unchanged blocks around it, is diffed and re-marked.
+    Markers elsewhere move with their lines inside Scintilla, so the cost of
+    an edit does not depend on the length of the file.
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.path = None
+        self.git = None
+        self.head_sha = None
+        self.head_lines = None
+        self.blocks = []      # (head start, line start, size) runs of unchanged lines
+        self._dirty = None    # [first, end) lines touched since the last diff, current numbering
+        self._delta = 0       # net lines added since the last diff
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._update)
+        editor.setMarginType(CHANGE_MARGIN, QsciScintilla.SymbolMargin)
+        editor.setMarginWidth(CHANGE_MARGIN, 4)
+        editor.setMarginMarkerMask(CHANGE_MARGIN, MARKER_MASK)
+        # Keep the markers out of the line-number margin
+        editor.setMarginMarkerMask(1, editor.marginMarkerMask(1) & ~MARKER_MASK)
+        for marker, symbol, color in ((ADDED, QsciScintilla.FullRectangle, '#2ea043'),
+                                      (MODIFIED, QsciScintilla.FullRectangle, '#1f6feb'),
+                                      (DELETED, QsciScintilla.RightTriangle, '#d73a49')):
+            editor.markerDefine(symbol, marker)
+            editor.setMarkerBackgroundColor(QColor(color), marker)
+            editor.setMarkerForegroundColor(QColor(color), marker)
+        editor.SCN_MODIFIED.connect(self._on_modified)
+
+    def set_head(self, sha, lines):
+        """Take the HEAD version of the file (None if untracked) and re-mark every line."""
+        if sha is not None and (sha == self.head_sha or lines is None):
+            return
+        self.head_sha, self.head_lines = sha, lines
+        self._dirty, self._delta = None, 0
+        self._timer.stop()
+        for marker in (ADDED, MODIFIED, DELETED):
+            self.editor.markerDeleteAll(marker)
+        if lines is None:
+            self.blocks = []
+            return
+        self.blocks = matching_blocks(lines, split_lines(self.editor.text()))
+        self._mark(0, self.editor.lines(), clear=False)
+
+    # --- Tracking edits ---
+    def _on_modified(self, position, mtype, text, length, lines_added, *args):
+        if self.head_lines is None or not mtype & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        line = self.editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        first, end = line, line + max(lines_added, 0) + 1
+        if self._dirty is not None:
+            low, high = self._dirty
+            if lines_added >= 0:
+                # Lines below the edit moved down
+                low = low + lines_added if low > line else low
+                high = high + lines_added if high > line else high
+            else:
+                # Lines line+1 .. line+removed were joined into line
+                removed = -lines_added
+                low = low - removed if low > line + removed else min(low, line)
+                high = high - removed if high > line + removed else min(high, line + 1)
+            first, end = min(first, low), max(end, high)
+        self._dirty = (first, end)
+        self._delta += lines_added
+        self._timer.start()
+
+    def _update(self):
+        if self._dirty is None or self.head_lines is None:
+            return
+        (low, high), delta = self._dirty, self._delta
+        self._dirty, self._delta = None, 0
+        old_high = high - delta
+        before, after = [], []
+        for a, b, size in self.blocks:
+            if b + size <= low:
+                before.append((a, b, size))
+            elif b >= old_high:
+                after.append((a, b + delta, size))
+            else:
+                # Keep whatever part of the block lies outside the edited lines
+                if b < low:
+                    before.append((a, b, low - b))
+                if b + size > old_high:
+                    cut = old_high - b
+                    after.append((a + cut, old_high + delta, size - cut))
+        a0, b0 = (before[-1][0] + before[-1][2], before[-1][1] + before[-1][2]) if before else (0, 0)
+        a1, b1 = (after[0][0], after[0][1]) if after else (len(self.head_lines), self.editor.lines())
+        lines = [self.editor.text(n).rstrip('\n').rstrip('\r') for n in range(b0, b1)]
+        middle = [(a + a0, b + b0, size) for a, b, size in matching_blocks(self.head_lines[a0:a1], lines)]
+        self.blocks = before + middle + after
+        self._mark(b0, b1)
+
+    # --- Markers ---
+    def _mark(self, first, end, clear=True):
+        """Re-mark lines first..end; a deletion just above first is covered too."""
+        editor = self.editor
+        line_count = editor.lines()
+        low, high = max(first - 1, 0), min(end + 1, line_count)
+        for line in range(low, high) if clear else ():
+            # Joining lines can leave several copies of a marker on one line
+            while editor.markersAtLine(line) & MARKER_MASK:
+                for marker in (ADDED, MODIFIED, DELETED):
+                    editor.markerDelete(line, marker)
+        for i, a, j, b in _gaps(self.blocks, len(self.head_lines), line_count):
+            if j < b:
+                marker = MODIFIED if i < a else ADDED
+                for line in range(max(j, low), min(b, high)):
+                    editor.markerAdd(line, marker)
+            else:
+                # Lines removed between j - 1 and j
+                line = min(max(j - 1, 0), line_count - 1)
+                if low <= line < high:
+                    editor.markerAdd(line, DELETED)
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QTreeView
+
+from linediff import side_by_side, split_lines, DELETE, INSERT, REPLACE, HUNK
+
+# File diffs kept in memory, by (old blob sha, new blob sha)
+MAX_CACHED_DIFFS = 256
+NULL_SHA = '0' * 40
+COLUMNS = ['Old', '', 'New', '']
+STATUS_NAMES = {'A': 'added', 'D': 'deleted', 'M': 'modified', 'R': 'renamed',
+                'C': 'copied', 'T': 'type changed', 'U': 'unmerged'}
+ROW_COLORS = {DELETE: QColor('#ffecec'), INSERT: QColor('#eaffea'),
+              REPLACE: QColor('#fff6d5'), HUNK: QColor('#eef2fb')}
+
+FileChange = namedtuple('FileChange', 'status old_path new_path old_sha new_sha')
+
+
+class DiffCache:
+    """Side-by-side rows by blob pair; the least recently used is dropped first."""
+
+    def __init__(self, size=MAX_CACHED_DIFFS):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            rows = self._items.get(key)
+            if rows is not None:
+                self._items.move_to_end(key)
+            return rows
+
+    def put(self, key, rows):
+        with self._lock:
+            self._items[key] = rows
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+cache = DiffCache()
+
+
+def _blob_sha(data):
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def _read_side(git_manager, sha, path, exists):
+    """Return (blob sha, bytes) for one side; the all-zero sha means the working tree file."""
+    if not exists:
+        return NULL_SHA, b''
+    if sha != NULL_SHA:
+        return sha, git_manager.blob_bytes(sha) or b''
+    try:
+        with open(os.path.join(git_manager.repo.working_tree_dir, path), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return NULL_SHA, b''
+    return _blob_sha(data), data
+
+
+def load_file_diff(git_manager, change, cancel_event=None):
+    """Compute (or fetch from cache) the side-by-side rows for one FileChange."""
+    old_sha, old = _read_side(git_manager, change.old_sha, change.old_path, change.status != 'A')
+    new_sha, new = _read_side(git_manager, change.new_sha, change.new_path, change.status != 'D')
+    key = (old_sha, new_sha)
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+    if b'\0' in old[:8000] or b'\0' in new[:8000]:
+        rows = [(HUNK, None, 'Binary files differ', None, '')]
+    else:
+        rows = side_by_side(split_lines(old.decode('utf-8', errors='replace')),
+                            split_lines(new.decode('utf-8', errors='replace')))
+        if not rows:
+            rows = [(HUNK, None, 'No content changes', None, '')]
+    cache.put(key, rows)
+    return rows
+
+
+class DiffModel(QAbstractItemModel):
+    """
+    Two-level model: one row per changed file, whose children are that
+    file's side-by-side diff rows. Children are requested through
+    `rows_requested` only when a file is first expanded.
+    """
+    rows_requested = pyqtSignal(int)   # file row
+
+    def __init__(self, changes, parent=None):
+        super().__init__(parent)
+        self.changes = [FileChange(*c) for c in changes]
+        self._rows = [None] * len(self.changes)   # None, False while loading, or the row list
+
+    def set_rows(self, file_row, rows):
+        parent = self.index(file_row, 0)
+        self.beginInsertRows(parent, 0, len(rows) - 1)
+        self._rows[file_row] = rows
+        self.endInsertRows()
+        self.dataChanged.emit(parent, parent)
+
+    def reset_rows(self, file_row):
+        """Forget a load that never finished, so expanding the file requests it again."""
+        if self._rows[file_row] is False:
+            self._rows[file_row] = None
+            parent = self.index(file_row, 0)
+            self.dataChanged.emit(parent, parent)
+
+    def diff_row(self, index):
+        """Return (FileChange, diff row) for a child index."""
+        file_row = index.internalId() - 1
+        return self.changes[file_row], self._rows[file_row][index.row()]
+
+    # --- QAbstractItemModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        # internalId is 0 for files and file row + 1 for diff rows
+        return self.createIndex(row, column, parent.row() + 1 if parent.isValid() else 0)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.changes)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return len(self._rows[parent.row()] or ())
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.changes)
+        return parent.internalId() == 0 and parent.column() == 0
+
+    def canFetchMore(self, parent):
+        return parent.isValid() and parent.internalId() == 0 and self._rows[parent.row()] is None
+
+    def fetchMore(self, parent):
+        self._rows[parent.row()] = False
+        self.rows_requested.emit(parent.row())
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable if index.isValid() else Qt.NoItemFlags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.internalId() == 0:
+            return self._file_data(index, role)
+        kind, old_no, old_text, new_no, new_text = self._rows[index.internalId() - 1][index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if kind == HUNK:
+                return old_text if column == 0 else None
+            return (old_no, old_text, new_no, new_text)[column]
+        if role == Qt.BackgroundRole:
+            if kind == REPLACE:
+                # Colour each side by whether it has a line
+                if column < 2:
+                    return ROW_COLORS[DELETE] if old_no is not None else None
+                return ROW_COLORS[INSERT] if new_no is not None else None
+            return ROW_COLORS.get(kind)
+        if role == Qt.TextAlignmentRole and column in (0, 2):
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def _file_data(self, index, role):
+        change = self.changes[index.row()]
+        if role == Qt.DisplayRole and index.column() == 0:
+            path = change.new_path if change.old_path == change.new_path else f"{change.old_path} → {change.new_path}"
+            state = ' (loading...)' if self._rows[index.row()] is False else ''
+            return f"{path}  [{STATUS_NAMES.get(change.status, change.status)}]{state}"
+        if role == Qt.FontRole:
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+
+class DiffView(QWidget):
+    """
+    Diff tab. Lists every changed file at once; a file's side-by-side diff
+    is computed when it is expanded. The tree has uniform row heights, so
+    only the rows on screen are laid out and painted.
+    """
+    rows_requested = pyqtSignal(int)
+    open_requested = pyqtSignal(str, int)   # path, 1-based line
+
+    def __init__(self, title, changes, parent=None):
+        super().__init__(parent)
+        self.model = DiffModel(changes, self)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel(f"{title}: {len(self.model.changes)} files changed"))
+        self.view = QTreeView()
+        self.view.setUniformRowHeights(True)
+        self.view.setModel(self.model)
+        font = QFont('Courier New')
+        font.setStyleHint(QFont.Monospace)
+        self.view.setFont(font)
+        self.view.setColumnWidth(0, 60)
+        self.view.setColumnWidth(1, 480)
+        self.view.setColumnWidth(2, 60)
+        for row in range(len(self.model.changes)):
+            self.view.setFirstColumnSpanned(row, QModelIndex(), True)
+        layout.addWidget(self.view)
+        self.model.rows_requested.connect(self.rows_requested)
+        self.view.activated.connect(self._on_activated)
+
+    def set_rows(self, file_row, rows):
+        if isinstance(rows, str):
+            rows = [(HUNK, None, rows, None, '')]
+        self.model.set_rows(file_row, rows)
+        parent = self.model.index(file_row, 0)
+        for row, entry in enumerate(rows):
+            if entry[0] == HUNK:
+                self.view.setFirstColumnSpanned(row, parent, True)
+
+    def reset_rows(self, file_row):
+        self.model.reset_rows(file_row)
+        # Collapsed, so the next expand fetches the rows again
+        self.view.collapse(self.model.index(file_row, 0))
+
+    def _on_activated(self, index):
+        if index.internalId() == 0:
+            return
+        change, (kind, old_no, _, new_no, _) = self.model.diff_row(index)
+        if new_no is not None and change.status != 'D':
+            self.open_requested.emit(change.new_path, new_no)
+
+    # Lets tab and save code treat this tab like a read-only document
+    def isModified(self):
+        return False
+
+    def isReadOnly(self):
+        return True
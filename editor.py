@@ -1,8 +1,26 @@
-from PyQt5.Qsci import QsciScintilla, QsciLexerPython, QsciLexerCPP, QsciLexerHTML
+import time
+
+from PyQt5.Qsci import QsciScintilla
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtGui import QColor
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+import lexers
+
+# Replace-all yields to the event loop after this many seconds of work
+REPLACE_SLICE_SECONDS = 0.015
+SCFIND_CXX11REGEX = getattr(QsciScintilla, 'SCFIND_CXX11REGEX', 0x00800000)
+# Above this many lines, folding and brace matching are turned off and only
+# the visible text is styled, in idle time
+FEATURE_LINE_LIMIT = 50000
+SCI_SETIDLESTYLING = 2692
+SC_IDLESTYLING_NONE = 0
+SC_IDLESTYLING_TOVISIBLE = 1
 
 class Editor(QsciScintilla):
+    replace_progress = pyqtSignal(int)   # replacements made so far
+    replace_finished = pyqtSignal(int)   # total replacements
+
     def __init__(self, parent=None, language='python'):
         super().__init__(parent)
         self.setUtf8(True)
@@ -14,17 +32,231 @@ class Editor(QsciScintilla):
         self.setTabWidth(4)
         self.setCaretLineVisible(True)
         self.setCaretLineBackgroundColor(QColor('#f0f0f0'))
-        self.setLexer(self._get_lexer(language))
-        
-    def _get_lexer(self, language):
-        if language == 'python':
-            return QsciLexerPython()
-        elif language == 'cpp':
-            return QsciLexerCPP()
-        elif language == 'html':
-            return QsciLexerHTML()
-        # Add more lexers as needed
-        return None
+        self.language = language
+        self.feature_line_limit = FEATURE_LINE_LIMIT
+        self._limited = False
+        self.setLexer(lexers.registry.lexer(language))
+        self.loader = None
+        self._replace_job = None
+        self.file_encoding = None
+        # Bumped on every edit so a background save can tell if it is still current
+        self.revision = 0
+        self.textChanged.connect(self._bump_revision)
 
     def set_language(self, language):
-        self.setLexer(self._get_lexer(language))
+        self.language = language
+        self.setLexer(lexers.registry.lexer(language))
+
+    def setLexer(self, lexer=None):
+        super().setLexer(lexer)
+        # Attaching a lexer turns its folding back on
+        if getattr(self, '_limited', False):
+            self._apply_limits(True)
+
+    # --- Size limits ---
+    def apply_size_limits(self):
+        """Switch the expensive features off (or back on) when the line count crosses feature_line_limit."""
+        limited = self.lines() > self.feature_line_limit
+        if limited != self._limited:
+            self._limited = limited
+            self._apply_limits(limited)
+
+    def _apply_limits(self, limited):
+        if limited:
+            self.setFolding(QsciScintilla.NoFoldStyle)
+            self.setBraceMatching(QsciScintilla.NoBraceMatch)
+            self.SendScintilla(QsciScintilla.SCI_SETPROPERTY, b'fold', b'0')
+            # Style only the visible lines, after painting, so a keystroke
+            # costs the same however long the file is
+            self.SendScintilla(SCI_SETIDLESTYLING, SC_IDLESTYLING_TOVISIBLE)
+            self.SendScintilla(QsciScintilla.SCI_SETLAYOUTCACHE, QsciScintilla.SC_CACHE_PAGE)
+        else:
+            self.SendScintilla(QsciScintilla.SCI_SETPROPERTY, b'fold', b'1')
+            self.SendScintilla(SCI_SETIDLESTYLING, SC_IDLESTYLING_NONE)
+            self.SendScintilla(QsciScintilla.SCI_SETLAYOUTCACHE, QsciScintilla.SC_CACHE_CARET)
+            self.setFolding(QsciScintilla.PlainFoldStyle)
+            self.setBraceMatching(QsciScintilla.SloppyBraceMatch)
+
+    def apply_palette(self, colors):
+        """Switch to the shared lexer for the registry's current theme and colour the chrome."""
+        lexer = lexers.registry.lexer(self.language)
+        if lexer is not self.lexer():
+            self.setLexer(lexer)
+        if lexer is None:
+            self.setPaper(QColor(colors['paper']))
+            self.setColor(QColor(colors['text']))
+        self.setCaretLineBackgroundColor(QColor(colors['caret_line']))
+        self.setCaretForegroundColor(QColor(colors['text']))
+        self.setMarginsBackgroundColor(QColor(colors['margin']))
+        self.setMarginsForegroundColor(QColor(colors['margin_text']))
+
+    def _bump_revision(self):
+        self.revision += 1
+        # lines() is O(1); only act when the limit is actually crossed
+        if (self.lines() > self.feature_line_limit) != self._limited:
+            self.apply_size_limits()
+
+    def set_file_encoding(self, info):
+        """Remember the detected FileEncoding and type new lines in its style."""
+        self.file_encoding = info
+        self.setEolMode({'CRLF': QsciScintilla.EolWindows,
+                         'LF': QsciScintilla.EolUnix,
+                         'CR': QsciScintilla.EolMac}[info.eol])
+
+    def reload_text(self, text, saved=True):
+        """
+        Replace the whole buffer with text read from disk, as one undoable
+        step, keeping the cursor and scroll position where they still fit.
+        With saved=False (e.g. recovered text) the buffer stays modified.
+        """
+        line, index = self.getCursorPosition()
+        first_line = self.firstVisibleLine()
+        encoded = text.encode('utf-8')
+        self.SendScintilla(QsciScintilla.SCI_BEGINUNDOACTION)
+        self.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, 0)
+        self.SendScintilla(QsciScintilla.SCI_SETTARGETEND, self.SendScintilla(QsciScintilla.SCI_GETLENGTH))
+        self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(encoded), encoded)
+        self.SendScintilla(QsciScintilla.SCI_ENDUNDOACTION)
+        line = min(line, self.lines() - 1)
+        self.setCursorPosition(line, min(index, len(self.text(line).rstrip('\r\n'))))
+        self.setFirstVisibleLine(first_line)
+        if saved:
+            self.setModified(False)
+
+    # --- Chunked loading (large-file mode) ---
+    def begin_chunked_load(self, loader):
+        """Attach a LargeFileLoader and append its chunks as they arrive."""
+        self.loader = loader
+        self.setReadOnly(True)
+        # Loading should not be undoable or grow the undo history
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        loader.chunk_ready.connect(self._append_chunk)
+        loader.finished_loading.connect(self._end_chunked_load)
+        loader.failed.connect(self._fail_chunked_load)
+
+    def _append_chunk(self, text):
+        if self.loader is None:
+            return
+        self.append(text)
+        self.loader.chunk_consumed()
+
+    def _end_chunked_load(self, *args):
+        if self.loader.lossy and self.file_encoding is not None:
+            self.file_encoding = self.file_encoding._replace(lossy=True)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.setModified(False)
+        self.setReadOnly(False)
+        self.loader = None
+
+    def _fail_chunked_load(self, error):
+        # Only part of the file arrived: stay read-only so it cannot be saved over the original
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.setModified(False)
+        self.loader = None
+
+    def is_loading(self):
+        return self.loader is not None
+
+    # --- Replace all ---
+    def replace_all(self, find_text, replace_text, regex=False, case_sensitive=False, whole_word=False):
+        """
+        Replace every match in place using Scintilla's target API.
+        Work is done in short time slices inside a single undo action, so the
+        document is never copied and the UI stays responsive on huge files.
+        Emits replace_finished with the number of replacements.
+        """
+        if self._replace_job is not None or not find_text:
+            return False
+        flags = 0
+        if case_sensitive:
+            flags |= QsciScintilla.SCFIND_MATCHCASE
+        if whole_word:
+            flags |= QsciScintilla.SCFIND_WHOLEWORD
+        if regex:
+            flags |= QsciScintilla.SCFIND_REGEXP | SCFIND_CXX11REGEX
+        self._replace_job = {
+            'find': find_text.encode('utf-8'),
+            'replace': replace_text.encode('utf-8'),
+            'regex': regex,
+            'flags': flags,
+            'pos': 0,
+            'count': 0,
+            'read_only': self.isReadOnly(),
+        }
+        # Block typing while slices run so the undo action only holds the replace
+        self.setReadOnly(True)
+        self.SendScintilla(QsciScintilla.SCI_BEGINUNDOACTION)
+        QTimer.singleShot(0, self._replace_step)
+        return True
+
+    def _replace_step(self):
+        job = self._replace_job
+        if job is None:
+            return
+        find, replacement = job['find'], job['replace']
+        replace_msg = QsciScintilla.SCI_REPLACETARGETRE if job['regex'] else QsciScintilla.SCI_REPLACETARGET
+        deadline = time.monotonic() + REPLACE_SLICE_SECONDS
+        # Another search may have changed the flags since the last slice
+        self.SendScintilla(QsciScintilla.SCI_SETSEARCHFLAGS, job['flags'])
+        self.SendScintilla(QsciScintilla.SCI_SETREADONLY, 0)
+        done = False
+        while time.monotonic() < deadline:
+            length = self.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+            self.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, job['pos'])
+            self.SendScintilla(QsciScintilla.SCI_SETTARGETEND, length)
+            if self.SendScintilla(QsciScintilla.SCI_SEARCHINTARGET, len(find), find) < 0:
+                done = True
+                break
+            match_end = self.SendScintilla(QsciScintilla.SCI_GETTARGETEND)
+            empty = match_end == self.SendScintilla(QsciScintilla.SCI_GETTARGETSTART)
+            self.SendScintilla(replace_msg, len(replacement), replacement)
+            job['count'] += 1
+            job['pos'] = self.SendScintilla(QsciScintilla.SCI_GETTARGETEND)
+            if empty:
+                # Step over one character so empty matches cannot loop forever
+                if job['pos'] >= self.SendScintilla(QsciScintilla.SCI_GETLENGTH):
+                    done = True
+                    break
+                job['pos'] = self.SendScintilla(QsciScintilla.SCI_POSITIONAFTER, job['pos'])
+        self.SendScintilla(QsciScintilla.SCI_SETREADONLY, 1)
+        if done:
+            self.SendScintilla(QsciScintilla.SCI_ENDUNDOACTION)
+            self.setReadOnly(job['read_only'])
+            self._replace_job = None
+            self.replace_finished.emit(job['count'])
+        else:
+            self.replace_progress.emit(job['count'])
+            QTimer.singleShot(0, self._replace_step)
+
+    def is_replacing(self):
+        return self._replace_job is not None
+
+    def apply_line_replacements(self, pattern, replacer, lines=None):
+        """
+        Run pattern.sub(replacer) over the given 0-based lines (or all lines)
+        and rewrite only the lines that change, as one undo action.
+        Used to update open tabs in place after a batch replace.
+        """
+        if lines is None:
+            lines = range(self.lines())
+        count = 0
+        self.SendScintilla(QsciScintilla.SCI_BEGINUNDOACTION)
+        try:
+            for line in lines:
+                start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+                end = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, line)
+                if start < 0:
+                    break
+                text = self.text(line).rstrip('\r\n')
+                new_text, n = pattern.subn(replacer, text)
+                if n and new_text != text:
+                    encoded = new_text.encode('utf-8')
+                    self.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, start)
+                    self.SendScintilla(QsciScintilla.SCI_SETTARGETEND, end)
+                    self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(encoded), encoded)
+                count += n
+        finally:
+            self.SendScintilla(QsciScintilla.SCI_ENDUNDOACTION)
+        return count
@@ -0,0 +1,149 @@
+import codecs
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+# Bytes read from the start of a file for detection
+SNIFF_BYTES = 64 * 1024
+CACHE_SIZE = 1024
+DEFAULT_EOL = 'CRLF'
+
+BOMS = [
+    # UTF-32 first: its little-endian BOM starts with the UTF-16 one
+    (codecs.BOM_UTF32_LE, 'utf-32-le', 'UTF-32 LE BOM'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be', 'UTF-32 BE BOM'),
+    (codecs.BOM_UTF8, 'utf-8-sig', 'UTF-8 BOM'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le', 'UTF-16 LE BOM'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be', 'UTF-16 BE BOM'),
+]
+
+EOL_CHARS = {'CRLF': '\r\n', 'LF': '\n', 'CR': '\r'}
+
+
+class FileEncoding(namedtuple('FileEncoding', 'encoding label eol bom lossy', defaults=(False,))):
+    """
+    encoding: Python codec name used to decode/encode the file
+    label: name shown in the status bar
+    eol: 'CRLF', 'LF' or 'CR'
+    bom: the byte-order mark to write back (b'' if none)
+    lossy: undecodable bytes were replaced, so saving would not restore them
+    """
+
+    def stream_codec(self):
+        """Codec to decode the raw file from its first byte, BOM included."""
+        if self.bom and self.encoding.startswith(('utf-16', 'utf-32')):
+            return self.encoding[:6]
+        return self.encoding
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _detect_line_ending(text):
+    crlf = text.count('\r\n')
+    lf = text.count('\n') - crlf
+    cr = text.count('\r') - crlf
+    if not (crlf or lf or cr):
+        return DEFAULT_EOL
+    return max((crlf, 'CRLF'), (lf, 'LF'), (cr, 'CR'))[1]
+
+
+def detect_bytes(data):
+    """Detect encoding and line ending from the first bytes of a file."""
+    for bom, codec, label in BOMS:
+        if data.startswith(bom):
+            text = data[len(bom):].decode(codec.replace('-sig', ''), errors='replace')
+            return FileEncoding(codec, label, _detect_line_ending(text), bom)
+    # Fast path: most files are UTF-8 (or plain ASCII). The sample may end
+    # mid-character, so decode incrementally without finalising.
+    try:
+        text = codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+        return FileEncoding('utf-8', 'UTF-8', _detect_line_ending(text), b'')
+    except UnicodeDecodeError:
+        pass
+    codec, label = _guess_codec(data)
+    text = data.decode(codec, errors='replace')
+    return FileEncoding(codec, label, _detect_line_ending(text), b'')
+
+
+def _guess_codec(data):
+    """Ask chardet for the codec of data. Returns (codec, label)."""
+    # Only now pay for importing chardet
+    import chardet
+    guess = chardet.detect(data).get('encoding') or 'utf-8'
+    try:
+        return codecs.lookup(guess).name, guess.upper()
+    except LookupError:
+        return 'utf-8', guess.upper()
+
+
+def _cache_key(path):
+    st = os.stat(path)
+    return os.path.normpath(path), st.st_mtime_ns, st.st_size
+
+
+def _remember(key, result):
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def detect(path):
+    """
+    Return the FileEncoding for path. Results are cached on
+    (path, mtime, size), so repeated calls for an unchanged file are free.
+    """
+    try:
+        key = _cache_key(path)
+    except OSError:
+        return FileEncoding('utf-8', 'UTF-8', DEFAULT_EOL, b'')
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(SNIFF_BYTES)
+    except OSError:
+        return FileEncoding('utf-8', 'UTF-8', DEFAULT_EOL, b'')
+    result = detect_bytes(data)
+    _remember(key, result)
+    return result
+
+
+def read_text(path):
+    """
+    Read a whole file with its detected encoding. Returns (text, FileEncoding).
+    If bytes past the detection sample do not decode, the encoding is detected
+    again from the bytes around the first failure, falling back to Latin-1,
+    which keeps every byte.
+    """
+    info = detect(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if info.bom and data.startswith(info.bom):
+        data = data[len(info.bom):]
+    codec = info.encoding.replace('-sig', '')
+    try:
+        return data.decode(codec), info
+    except UnicodeDecodeError as e:
+        failed_at = e.start
+    if info.bom:
+        # The BOM fixes the encoding; keep the file openable but flag the damage
+        return data.decode(codec, errors='replace'), info._replace(lossy=True)
+    # A sample around the failure keeps detection cheap on huge files
+    start = max(0, failed_at - SNIFF_BYTES // 2)
+    guess, label = _guess_codec(data[start:start + SNIFF_BYTES])
+    try:
+        text, info = data.decode(guess), info._replace(encoding=guess, label=label)
+    except UnicodeDecodeError:
+        text, info = data.decode('latin-1'), info._replace(encoding='latin-1', label='Latin-1')
+    try:
+        _remember(_cache_key(path), info)
+    except OSError:
+        pass
+    return text, info
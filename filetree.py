@@ -0,0 +1,380 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QFileSystemWatcher, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QFileIconProvider
+
+from git_status_cache import BADGES, COLORS, MAX_SCOPED_PATHS
+from ignore import IgnoreMatcher
+
+# Directories watched for changes at most; the least recently expanded
+# ones stop being watched first
+MAX_WATCHED_DIRS = 256
+IGNORED_COLOR = QColor('#999999')
+
+
+class _Node:
+    __slots__ = ('path', 'name', 'is_dir', 'parent', 'row', 'hidden', 'ignored', 'entries', 'by_name', 'visible')
+
+    def __init__(self, path, name, is_dir, parent, hidden=False, ignored=False):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.parent = parent
+        self.row = 0
+        self.hidden = hidden
+        self.ignored = ignored
+        self.entries = None   # every child once listed, sorted; None until then
+        self.by_name = {}
+        self.visible = []     # children that pass the current filters
+
+
+def _is_hidden(entry):
+    if entry.name.startswith('.'):
+        return True
+    if os.name == 'nt':
+        try:
+            return bool(entry.stat().st_file_attributes & 2)   # FILE_ATTRIBUTE_HIDDEN
+        except (OSError, AttributeError):
+            pass
+    return False
+
+
+class WorkspaceTreeModel(QAbstractItemModel):
+    """
+    File tree for the workspace folder. Directories are listed only when
+    expanded, `.gitignore` rules and user exclude globs mark entries as
+    ignored, and only expanded, non-ignored directories are watched (at most
+    MAX_WATCHED_DIRS). Every listed entry is kept, so the hidden/ignored
+    filters are re-applied in memory without touching the disk.
+
+    Names carry git status badges from a GitStatusCache. Directory changes are
+    batched and handed to `on_dirty` (a callable taking a list of paths, or
+    None for a full rescan) and published through `paths_changed`.
+    """
+    paths_changed = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.status_cache = None
+        self.on_dirty = None
+        self.show_hidden = True
+        self.show_ignored = False
+        self.exclude_globs = ()
+        self._root = None
+        self._matcher = None
+        self._icons = QFileIconProvider()
+        self._dir_icon = self._icons.icon(QFileIconProvider.Folder)
+        self._file_icon = self._icons.icon(QFileIconProvider.File)
+        self._watched = OrderedDict()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._pending = set()
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(300)
+        self._debounce.timeout.connect(self._flush_pending)
+
+    # --- Root and filters ---
+    def set_root(self, path):
+        """Show the folder at path (or nothing for None)."""
+        self.beginResetModel()
+        if self._watched:
+            self.watcher.removePaths(list(self._watched))
+        self._watched.clear()
+        self._pending.clear()
+        if path:
+            path = os.path.normpath(path)
+            self._root = _Node(path, os.path.basename(path), True, None)
+            self._matcher = IgnoreMatcher(path, self.exclude_globs)
+        else:
+            self._root = self._matcher = None
+        self.endResetModel()
+        if self._root is not None:
+            self._list(self._root)
+            self._watch(self._root)
+
+    def root_path(self):
+        return self._root.path if self._root is not None else ''
+
+    def set_show_hidden(self, show):
+        self.show_hidden = show
+        self._refilter_all()
+
+    def set_show_ignored(self, show):
+        self.show_ignored = show
+        self._refilter_all()
+
+    def set_exclude_globs(self, globs):
+        """Replace the user exclude globs; only the loaded entries are re-checked."""
+        self.exclude_globs = tuple(globs)
+        if self._root is None:
+            return
+        self._matcher = IgnoreMatcher(self._root.path, self.exclude_globs)
+        self._reclassify(self._root)
+        self._refilter_all()
+
+    def _accepts(self, node):
+        return (self.show_hidden or not node.hidden) and (self.show_ignored or not node.ignored)
+
+    # --- Listing ---
+    def _scan(self, node):
+        """Read one directory; returns {name: _Node}, reusing existing child nodes."""
+        found = {}
+        try:
+            entries = list(os.scandir(node.path))
+        except OSError:
+            return found
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            child = node.by_name.get(entry.name)
+            if child is None or child.is_dir != is_dir:
+                child = _Node(entry.path, entry.name, is_dir, node, _is_hidden(entry))
+            child.ignored = node.ignored or self._matcher.is_ignored(entry.path, is_dir)
+            found[entry.name] = child
+        return found
+
+    def _list(self, node):
+        """Replace node's entries with a fresh listing and update the visible rows."""
+        found = self._scan(node)
+        node.by_name = found
+        node.entries = sorted(found.values(), key=lambda c: (not c.is_dir, c.name.casefold()))
+        self._refilter(node)
+
+    def _reclassify(self, node):
+        for child in node.entries or ():
+            child.ignored = node.ignored or self._matcher.is_ignored(child.path, child.is_dir)
+            if child.is_dir:
+                self._reclassify(child)
+
+    # --- Filtering without re-listing ---
+    def _index_of(self, node):
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _renumber(self, nodes):
+        for row, child in enumerate(nodes):
+            child.row = row
+
+    def _is_shown(self, node):
+        """True if node has a row in the model: it and every folder above it pass the filters."""
+        while node is not self._root:
+            parent = node.parent
+            if parent is None or node.row >= len(parent.visible) or parent.visible[node.row] is not node:
+                return False
+            node = parent
+        return True
+
+    def _refilter(self, node):
+        """Bring node.visible in line with node.entries and the filters, one row block at a time."""
+        if node.entries is None:
+            return
+        new = [c for c in node.entries if self._accepts(c)]
+        if not self._is_shown(node):
+            # No view has rows for this folder, so there is nothing to signal
+            node.visible = new
+            self._renumber(new)
+            for child in node.entries:
+                if child.is_dir and child.entries is not None:
+                    self._refilter(child)
+            return
+        parent = self._index_of(node)
+        old = node.visible
+        keep = set(map(id, new))
+        i = len(old) - 1
+        while i >= 0:
+            if id(old[i]) in keep:
+                i -= 1
+                continue
+            j = i
+            while j > 0 and id(old[j - 1]) not in keep:
+                j -= 1
+            self.beginRemoveRows(parent, j, i)
+            del old[j:i + 1]
+            self._renumber(old)
+            self.endRemoveRows()
+            i = j - 1
+        # What is left of old is now an ordered subsequence of new
+        present = set(map(id, old))
+        k = 0
+        while k < len(new):
+            if id(new[k]) in present:
+                k += 1
+                continue
+            j = k
+            while j < len(new) and id(new[j]) not in present:
+                j += 1
+            self.beginInsertRows(parent, k, j - 1)
+            old[k:k] = new[k:j]
+            self._renumber(old)
+            self.endInsertRows()
+            k = j
+        for child in node.entries:
+            if child.is_dir and child.entries is not None:
+                self._refilter(child)
+
+    def _refilter_all(self):
+        if self._root is not None:
+            self._refilter(self._root)
+
+    # --- Watching ---
+    def _watch(self, node):
+        if node.ignored:
+            return
+        if node.path in self._watched:
+            self._watched.move_to_end(node.path)
+            return
+        if len(self._watched) >= MAX_WATCHED_DIRS:
+            stale, _ = self._watched.popitem(last=False)
+            self.watcher.removePath(stale)
+        if self.watcher.addPath(node.path):
+            self._watched[node.path] = True
+
+    def on_expanded(self, index):
+        """Connect to the view's `expanded`: refresh folders that dropped out of the watch list."""
+        node = self._node(index)
+        if node.is_dir and node.entries is not None and node.path not in self._watched:
+            self._list(node)
+        self._watch(node)
+
+    def _on_directory_changed(self, path):
+        # Changes inside .git are picked up through GitStatusCache.is_stale
+        if '.git' in os.path.normpath(path).split(os.sep):
+            return
+        self._pending.add(path)
+        self._debounce.start()
+
+    def _flush_pending(self):
+        paths, self._pending = sorted(self._pending), set()
+        if not paths:
+            return
+        for path in paths:
+            node = self.node_for_path(path)
+            if node is not None and node.entries is not None:
+                had_rules = '.gitignore' in node.by_name
+                self._matcher.invalidate(node.path)
+                self._list(node)
+                if had_rules or '.gitignore' in node.by_name:
+                    # The folder's rules may have changed for everything below it
+                    self._reclassify(node)
+                    self._refilter(node)
+        self.paths_changed.emit(paths)
+        if self.status_cache is None or not self.on_dirty:
+            return
+        # Keep the git command line short when many folders changed at once
+        if len(paths) > MAX_SCOPED_PATHS:
+            paths = None
+        self.on_dirty(paths)
+
+    # --- Lookups ---
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def node_for_path(self, path):
+        """Return the loaded node for path, or None if it has not been listed."""
+        if self._root is None:
+            return None
+        path = os.path.normpath(path)
+        if path == self._root.path:
+            return self._root
+        rel = os.path.relpath(path, self._root.path)
+        if rel.startswith(os.pardir):
+            return None
+        node = self._root
+        for part in rel.split(os.sep):
+            node = node.by_name.get(part)
+            if node is None:
+                return None
+        return node
+
+    def filePath(self, index):
+        node = self._node(index)
+        return node.path if node is not None else ''
+
+    def index_for_path(self, path):
+        node = self.node_for_path(path)
+        if node is None or node.parent is None or not self._is_shown(node):
+            return QModelIndex()
+        return self._index_of(node)
+
+    # --- Git badges ---
+    def set_status_cache(self, cache):
+        self.status_cache = cache
+
+    def refresh_badges(self, paths):
+        """Repaint the given paths and their parent folders, where they are shown."""
+        seen = set()
+        for path in paths:
+            while path and path not in seen:
+                seen.add(path)
+                idx = self.index_for_path(path)
+                if idx.isValid():
+                    self.dataChanged.emit(idx, idx)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+    # --- QAbstractItemModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or column != 0 or not 0 <= row < len(node.visible):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.visible[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return len(node.visible) if node is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or not node.is_dir:
+            return False
+        return node.entries is None or bool(node.visible)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node is not None and node.is_dir and node.entries is None
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        self._list(node)
+        self._watch(node)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable if index.isValid() else Qt.NoItemFlags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return 'Name'
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        state = self.status_cache.status_of(node.path) if self.status_cache is not None else None
+        if role == Qt.DisplayRole:
+            return f"{node.name}  {BADGES[state]}" if state else node.name
+        if role == Qt.DecorationRole:
+            return self._dir_icon if node.is_dir else self._file_icon
+        if role == Qt.ForegroundRole:
+            if state:
+                return COLORS[state]
+            return IGNORED_COLOR if node.ignored else None
+        if role == Qt.ToolTipRole:
+            return state.capitalize() if state else node.path
+        return None
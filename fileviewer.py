@@ -0,0 +1,335 @@
+import bisect
+import mmap
+import os
+import re
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QPainter, QFontDatabase, QColor
+from PyQt5.QtWidgets import QAbstractScrollArea
+
+# Files at or above this size open in the read-only viewer instead of an Editor
+VIEWER_THRESHOLD_MB = 512
+# A checkpoint (line number, byte offset) is recorded roughly this often
+CHECKPOINT_BYTES = 64 * 1024
+SEARCH_BLOCK = 4 * 1024 * 1024
+# Lines kept decoded above and below the viewport
+WINDOW_MARGIN = 200
+# Very long lines are truncated for display
+MAX_LINE_BYTES = 16 * 1024
+
+
+def is_oversized_file(path, threshold_mb=VIEWER_THRESHOLD_MB):
+    """Return True if the file at path is too large to load into an Editor."""
+    try:
+        return os.path.getsize(path) >= threshold_mb * 1024 * 1024
+    except OSError:
+        return False
+
+
+class LineIndexer(QThread):
+    """
+    Builds a sparse line index over a memory-mapped file.
+    Every CHECKPOINT_BYTES the offset of the next line start is recorded
+    together with its line number, so memory is O(size / CHECKPOINT_BYTES).
+    """
+    progress = pyqtSignal(int, int)  # lines counted so far, percent done
+    finished_index = pyqtSignal(int)  # total line count
+
+    def __init__(self, mm, size, parent=None):
+        super().__init__(parent)
+        self.mm = mm
+        self.size = size
+        # Offsets are appended before line numbers so readers never see a
+        # line number without its offset
+        self.cp_offsets = [0]
+        self.cp_lines = [0]
+        self.total_lines = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        mm, size = self.mm, self.size
+        pos, lines, percent = 0, 0, 0
+        while pos < size and not self._cancelled:
+            nl = mm.find(b'\n', min(pos + CHECKPOINT_BYTES, size) - 1)
+            if nl == -1:
+                # No newline after the search start, but the bytes before it may hold some
+                tail = mm[pos:size]
+                lines += tail.count(b'\n')
+                pos += tail.rfind(b'\n') + 1
+                break
+            lines += mm[pos:nl + 1].count(b'\n')
+            pos = nl + 1
+            self.cp_offsets.append(pos)
+            self.cp_lines.append(lines)
+            # Only report whole-percent steps; a signal per checkpoint floods the UI
+            if int(pos * 100 / size) != percent:
+                percent = int(pos * 100 / size)
+                self.progress.emit(lines, percent)
+        if self._cancelled:
+            return
+        # A trailing line without a newline still counts
+        self.total_lines = lines + (1 if pos < size else 0)
+        self.finished_index.emit(self.total_lines)
+
+    def locate(self, line):
+        """Return (line, offset) of the nearest indexed line at or before line."""
+        i = bisect.bisect_right(self.cp_lines, line) - 1
+        return self.cp_lines[i], self.cp_offsets[i]
+
+    def line_of_offset(self, offset):
+        """Return the 0-based line number containing byte offset."""
+        i = bisect.bisect_right(self.cp_offsets, offset) - 1
+        i = min(i, len(self.cp_lines) - 1)
+        return self.cp_lines[i] + self.mm[self.cp_offsets[i]:offset].count(b'\n')
+
+
+class ViewerSearch(QThread):
+    """Scans the whole file for a literal or regex pattern, block by block."""
+    found = pyqtSignal(int, int)  # byte offset, match length
+    not_found = pyqtSignal()
+
+    def __init__(self, mm, size, pattern, start=0, regex=False, case_sensitive=False, parent=None):
+        super().__init__(parent)
+        self.mm = mm
+        self.size = size
+        self.start_offset = start
+        self._cancelled = False
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if not regex:
+            pattern = re.escape(pattern)
+        self.regex = re.compile(pattern.encode('utf-8'), flags | re.MULTILINE)
+        # Overlap blocks so matches straddling a boundary are still found
+        self.overlap = 4096
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _scan(self, begin, end):
+        pos = begin
+        while pos < end and not self._cancelled:
+            block_end = min(pos + SEARCH_BLOCK, end)
+            m = self.regex.search(self.mm[pos:min(block_end + self.overlap, self.size)])
+            if m and pos + m.start() < end:
+                return pos + m.start(), m.end() - m.start()
+            pos = block_end
+        return None
+
+    def run(self):
+        hit = self._scan(self.start_offset, self.size)
+        if hit is None and self.start_offset > 0:
+            hit = self._scan(0, self.start_offset)
+        if self._cancelled:
+            return
+        if hit is None:
+            self.not_found.emit()
+        else:
+            self.found.emit(*hit)
+
+
+class LargeFileViewer(QAbstractScrollArea):
+    """
+    Read-only viewer for files too large for a QsciScintilla buffer.
+    Only a window of decoded lines around the viewport is held in memory;
+    everything else is read on demand from an mmap through a LineIndexer.
+    """
+    status_message = pyqtSignal(str)
+
+    def __init__(self, path, encoding='utf-8', parent=None):
+        super().__init__(parent)
+        self.file_path = path
+        self.encoding = encoding
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setFocusPolicy(Qt.StrongFocus)
+
+        self._file = open(path, 'rb')
+        self.size = os.path.getsize(path)
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+        self._window_start = 0
+        self._window_span = 0
+        self._window = []
+        self._window_estimated = False
+        self._highlight_line = None
+        self._search = None
+
+        self.indexer = LineIndexer(self.mm, self.size, parent=self)
+        self.indexer.progress.connect(self._on_index_progress)
+        self.indexer.finished_index.connect(self._on_index_finished)
+        self.indexer.start()
+        self._update_scrollbars()
+
+    # --- Editor-compatible surface used by CodePlusPlus ---
+    def isModified(self):
+        return False
+
+    def isReadOnly(self):
+        return True
+
+    def goto_line(self, line):
+        """Scroll to and highlight the 1-based line."""
+        self._highlight_line = max(0, line - 1)
+        self.verticalScrollBar().setValue(max(0, line - 1 - self._visible_lines() // 3))
+        self.viewport().update()
+
+    def findFirst(self, expr, re_=False, cs=False, wo=False, wrap=True, *args):
+        """Start a background search after the current match, or from the first visible line."""
+        if self._search is not None:
+            self._search.cancel()
+            self._search.wait()
+        start_line = (self._highlight_line + 1 if self._highlight_line is not None
+                      else self.verticalScrollBar().value())
+        start = self._offset_of_line(start_line) or 0
+        self._search = ViewerSearch(self.mm, self.size, expr, start=start,
+                                    regex=re_, case_sensitive=cs, parent=self)
+        self._search.found.connect(self._on_search_found)
+        self._search.not_found.connect(lambda: self.status_message.emit(f"'{expr}' not found"))
+        self.status_message.emit(f"Searching for '{expr}'...")
+        self._search.start()
+        return True
+
+    def shutdown(self):
+        """Stop background threads and release the mapping."""
+        for worker in (self.indexer, self._search):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        self._window = []
+        self._window_span = 0
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+
+    # --- Line access ---
+    def line_count(self):
+        if self.indexer.total_lines is not None:
+            return self.indexer.total_lines
+        # Estimate from what has been indexed so far
+        indexed_lines = self.indexer.cp_lines[-1]
+        indexed_bytes = self.indexer.cp_offsets[-1]
+        if not indexed_lines:
+            return max(1, self.size // 80)
+        return int(indexed_lines * self.size / max(indexed_bytes, 1))
+
+    def _offset_of_line(self, line):
+        indexed = self.indexer.total_lines is not None or line <= self.indexer.cp_lines[-1]
+        cp_line, off = self.indexer.locate(line)
+        if not indexed:
+            # Past the indexed part: jump to an estimated offset instead of
+            # walking every line from the last checkpoint
+            estimate = min(off + (line - cp_line) * self._bytes_per_line(), self.size - 1)
+            return self.mm.rfind(b'\n', off, estimate) + 1 or off
+        while cp_line < line and off < self.size:
+            nl = self.mm.find(b'\n', off)
+            if nl == -1:
+                return None
+            off = nl + 1
+            cp_line += 1
+        return off if off < self.size else None
+
+    def _bytes_per_line(self):
+        indexed_lines = self.indexer.cp_lines[-1]
+        if not indexed_lines:
+            return 80
+        return max(1, self.indexer.cp_offsets[-1] // indexed_lines)
+
+    def read_lines(self, first, count):
+        off = self._offset_of_line(first)
+        lines = []
+        while off is not None and off < self.size and len(lines) < count:
+            nl = self.mm.find(b'\n', off)
+            end = self.size if nl == -1 else nl
+            raw = self.mm[off:min(end, off + MAX_LINE_BYTES)]
+            lines.append(raw.decode(self.encoding, errors='replace').rstrip('\r'))
+            off = end + 1
+        return lines
+
+    def _lines_for_view(self, first, count):
+        last = first + count
+        # Compare against the requested span: near EOF the window is shorter
+        if first < self._window_start or last > self._window_start + self._window_span:
+            self._window_start = max(0, first - WINDOW_MARGIN)
+            self._window_span = count + 2 * WINDOW_MARGIN
+            self._window = self.read_lines(self._window_start, self._window_span)
+            self._window_estimated = (self.indexer.total_lines is None
+                                      and self._window_start + self._window_span > self.indexer.cp_lines[-1])
+        begin = first - self._window_start
+        return self._window[begin:begin + count]
+
+    # --- Painting and scrolling ---
+    def _line_height(self):
+        return self.fontMetrics().height()
+
+    def _visible_lines(self):
+        return max(1, self.viewport().height() // self._line_height() + 1)
+
+    def _gutter_width(self):
+        return self.fontMetrics().horizontalAdvance('9') * (len(str(self.line_count())) + 2)
+
+    def _update_scrollbars(self):
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.line_count() - self._visible_lines() + 1))
+        vbar.setPageStep(self._visible_lines())
+        hbar = self.horizontalScrollBar()
+        longest = max((len(line) for line in self._window), default=0)
+        hbar.setRange(0, max(0, longest - 10))
+        hbar.setPageStep(10)
+
+    def _drop_estimated_window(self):
+        if self._window_estimated:
+            self._window_span = 0
+            self.viewport().update()
+
+    def _on_index_progress(self, lines, percent):
+        self._drop_estimated_window()
+        self._update_scrollbars()
+        self.status_message.emit(f"Indexing {os.path.basename(self.file_path)}: {percent}%")
+
+    def _on_index_finished(self, total):
+        self._drop_estimated_window()
+        self._update_scrollbars()
+        self.status_message.emit(f"Indexed {total} lines")
+
+    def _on_search_found(self, offset, length):
+        line = self.indexer.line_of_offset(offset)
+        self.goto_line(line + 1)
+        self.status_message.emit(f"Match at line {line + 1}")
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier and event.key() == Qt.Key_Home:
+            self.verticalScrollBar().setValue(0)
+        elif event.modifiers() & Qt.ControlModifier and event.key() == Qt.Key_End:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        lh = self._line_height()
+        ascent = self.fontMetrics().ascent()
+        char_w = self.fontMetrics().horizontalAdvance('9')
+        gutter = self._gutter_width()
+        first = self.verticalScrollBar().value()
+        x_shift = self.horizontalScrollBar().value() * char_w
+        rect = self.viewport().rect()
+
+        painter.fillRect(0, 0, gutter, rect.height(), QColor('#f0f0f0'))
+        for i, text in enumerate(self._lines_for_view(first, self._visible_lines())):
+            y = i * lh
+            if first + i == self._highlight_line:
+                painter.fillRect(gutter, y, rect.width() - gutter, lh, QColor('#fff3b0'))
+            painter.setPen(QColor('#888888'))
+            painter.drawText(0, y + ascent, str(first + i + 1).rjust(len(str(self.line_count())) + 1))
+            painter.setPen(self.palette().text().color())
+            painter.setClipRect(gutter, 0, rect.width() - gutter, rect.height())
+            painter.drawText(gutter + char_w - x_shift, y + ascent, text.expandtabs(4))
+            painter.setClipping(False)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from fileio import file_signature
+
+# Files up to this size get a content hash, so a touch or a checkout that
+# rewrites identical bytes does not count as a change
+HASH_LIMIT_BYTES = 16 * 1024 * 1024
+DEBOUNCE_MS = 200
+
+
+def content_hash(path):
+    """Return the SHA-1 of the file, or None if it is too large or unreadable."""
+    try:
+        if os.path.getsize(path) > HASH_LIMIT_BYTES:
+            return None
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.digest()
+    except OSError:
+        return None
+
+
+class OpenFileWatcher(QObject):
+    """
+    Watches the files of open tabs. Events are debounced, then confirmed
+    against the last known (mtime, size) and content hash before
+    `file_changed` or `file_deleted` is emitted. Each file's folder is watched
+    too, so files replaced by rename (git checkout, atomic saves) are still seen.
+    """
+    file_changed = pyqtSignal(str)
+    file_deleted = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._queue)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._known = {}     # path -> (signature, hash)
+        self._by_dir = {}    # folder -> set of tracked paths in it
+        self._pending = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._flush)
+
+    def set_paths(self, paths):
+        """Track exactly these paths; only the difference is (un)watched."""
+        paths = {os.path.normpath(p) for p in paths}
+        for path in set(self._known) - paths:
+            self.untrack(path)
+        for path in paths - set(self._known):
+            self.track(path)
+
+    def track(self, path):
+        path = os.path.normpath(path)
+        self._known[path] = (file_signature(path), content_hash(path))
+        if os.path.exists(path):
+            self.watcher.addPath(path)
+        folder = os.path.dirname(path)
+        if folder not in self._by_dir:
+            self._by_dir[folder] = set()
+            self.watcher.addPath(folder)
+        self._by_dir[folder].add(path)
+
+    def untrack(self, path):
+        path = os.path.normpath(path)
+        if self._known.pop(path, None) is None:
+            return
+        self.watcher.removePath(path)
+        folder = os.path.dirname(path)
+        siblings = self._by_dir.get(folder)
+        if siblings is not None:
+            siblings.discard(path)
+            if not siblings:
+                del self._by_dir[folder]
+                self.watcher.removePath(folder)
+
+    def mark_current(self, path):
+        """Record the file's present state as known, e.g. after saving or reloading it."""
+        path = os.path.normpath(path)
+        if path in self._known:
+            self._known[path] = (file_signature(path), content_hash(path))
+            self._pending.discard(path)
+
+    def _on_directory_changed(self, folder):
+        for path in self._by_dir.get(os.path.normpath(folder), ()):
+            self._queue(path)
+
+    def _queue(self, path):
+        self._pending.add(os.path.normpath(path))
+        self._timer.start()
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            known = self._known.get(path)
+            if known is None:
+                continue
+            signature = file_signature(path)
+            if signature is None:
+                if known[0] is not None:
+                    self._known[path] = (None, None)
+                    self.file_deleted.emit(path)
+                continue
+            # A replaced file drops out of the watch list; put it back
+            if path not in self.watcher.files():
+                self.watcher.addPath(path)
+            if signature == known[0]:
+                continue
+            digest = content_hash(path)
+            self._known[path] = (signature, digest)
+            if known[0] is not None and signature[1] == known[0][1] and digest is not None and digest == known[1]:
+                continue   # Touched, same bytes
+            self.file_changed.emit(path)
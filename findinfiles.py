@@ -0,0 +1,204 @@
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+)
+
+from ignore import IgnoreMatcher
+from linediff import split_lines
+
+# Files larger than this are skipped by find-in-files
+MAX_SEARCH_FILE_BYTES = 32 * 1024 * 1024
+# Bytes sniffed for a NUL to decide a file is binary
+BINARY_SNIFF_BYTES = 8192
+# Results are handed to the UI at most this often (seconds)
+EMIT_INTERVAL = 0.05
+MAX_LINE_PREVIEW = 300
+
+
+def compile_pattern(text, regex=False, case_sensitive=False, whole_word=False):
+    """Build the regex used by find-in-files and batch replace."""
+    pattern = text if regex else re.escape(text)
+    if whole_word:
+        pattern = r'\b' + pattern + r'\b'
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+
+def is_binary(data):
+    return b'\0' in data[:BINARY_SNIFF_BYTES]
+
+
+def search_file(path, pattern):
+    """Return a list of (line_no, column, length, line_text) hits in path (1-based lines)."""
+    try:
+        if os.path.getsize(path) > MAX_SEARCH_FILE_BYTES:
+            return []
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return []
+    if is_binary(data):
+        return []
+    text = data.decode('utf-8', errors='replace')
+    hits = []
+    # Cheap whole-buffer check first; most files do not match at all
+    if not pattern.search(text):
+        return hits
+    lines = split_lines(text)
+    if lines[-1] == '':
+        lines.pop()   # No line after the final newline
+    for line_no, line in enumerate(lines, 1):
+        for m in pattern.finditer(line):
+            hits.append((line_no, m.start(), m.end() - m.start(), line[:MAX_LINE_PREVIEW]))
+    return hits
+
+
+class FindInFilesWorker(QThread):
+    """
+    Walks a workspace (honouring .gitignore) and searches files on a thread
+    pool. Hits are streamed to the UI in small batches while the search runs.
+    """
+    results_ready = pyqtSignal(list)       # [(path, [(line, col, length, text), ...]), ...]
+    progress = pyqtSignal(int, int)        # files searched, files with hits
+    finished_search = pyqtSignal(bool)     # True if cancelled
+
+    def __init__(self, root, pattern, max_workers=None, candidates=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.pattern = pattern
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        # Optional pre-filtered list of files to search instead of walking the tree
+        self.candidates = candidates
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _files(self):
+        if self.candidates is not None:
+            return iter(self.candidates)
+        return IgnoreMatcher(self.root).walk_files(self.cancel_event)
+
+    def run(self):
+        results = queue.Queue()
+        # Bound the number of queued files so walking never runs far ahead
+        slots = threading.Semaphore(self.max_workers * 4)
+        submitted = searched = matched = 0
+        last_emit = time.monotonic()
+
+        def work(path):
+            try:
+                hits = [] if self.cancel_event.is_set() else search_file(path, self.pattern)
+                results.put((path, hits))
+            finally:
+                slots.release()
+
+        def drain(force=False):
+            nonlocal searched, matched, last_emit
+            batch = []
+            while True:
+                try:
+                    path, hits = results.get_nowait()
+                except queue.Empty:
+                    break
+                searched += 1
+                if hits:
+                    matched += 1
+                    batch.append((path, hits))
+            if batch:
+                self.results_ready.emit(batch)
+            now = time.monotonic()
+            if force or now - last_emit >= EMIT_INTERVAL:
+                self.progress.emit(searched, matched)
+                last_emit = now
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for path in self._files():
+                if self.cancel_event.is_set():
+                    break
+                while not slots.acquire(timeout=EMIT_INTERVAL):
+                    drain()
+                pool.submit(work, path)
+                submitted += 1
+                if time.monotonic() - last_emit >= EMIT_INTERVAL:
+                    drain()
+            # Keep streaming while the remaining files finish
+            while searched < submitted and not self.cancel_event.is_set():
+                drain()
+                time.sleep(0.01)
+        drain(force=True)
+        self.finished_search.emit(self.cancel_event.is_set())
+
+
+class FindResultsPanel(QDockWidget):
+    """Dockable tree of find-in-files hits, grouped by file."""
+    open_requested = pyqtSignal(str, int, int)   # path, 1-based line, column
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__("Find Results", parent)
+        self.setObjectName("FindResultsPanel")
+        body = QWidget()
+        layout = QVBoxLayout(body)
+        layout.setContentsMargins(4, 4, 4, 4)
+        header = QHBoxLayout()
+        self.summary = QLabel("")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_requested)
+        self.cancel_button.setEnabled(False)
+        header.addWidget(self.summary, 1)
+        header.addWidget(self.cancel_button)
+        layout.addLayout(header)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemActivated.connect(self._on_item_activated)
+        layout.addWidget(self.tree)
+        self.setWidget(body)
+        self.root = None
+        self.query = ''
+        self.hit_count = 0
+
+    def start(self, root, query):
+        self.root = root
+        self.query = query
+        self.hit_count = 0
+        self.tree.clear()
+        self.summary.setText(f"Searching for '{query}'...")
+        self.cancel_button.setEnabled(True)
+        self.show()
+        self.raise_()
+
+    def add_results(self, batch):
+        self.tree.setUpdatesEnabled(False)
+        for path, hits in batch:
+            rel = os.path.relpath(path, self.root) if self.root else path
+            file_item = QTreeWidgetItem([f"{rel} ({len(hits)})"])
+            file_item.setData(0, Qt.UserRole, (path, hits[0][0], hits[0][1]))
+            for line_no, col, length, text in hits:
+                child = QTreeWidgetItem([f"{line_no}: {text.strip()}"])
+                child.setData(0, Qt.UserRole, (path, line_no, col))
+                file_item.addChild(child)
+            self.tree.addTopLevelItem(file_item)
+            self.hit_count += len(hits)
+        self.tree.setUpdatesEnabled(True)
+
+    def update_progress(self, searched, matched):
+        self.summary.setText(f"{self.hit_count} hits in {matched} files ({searched} searched)")
+
+    def finish(self, cancelled):
+        self.cancel_button.setEnabled(False)
+        suffix = " - cancelled" if cancelled else ""
+        self.summary.setText(f"{self.hit_count} hits for '{self.query}' in "
+                             f"{self.tree.topLevelItemCount()} files{suffix}")
+
+    def _on_item_activated(self, item, column):
+        data = item.data(0, Qt.UserRole)
+        if data:
+            self.open_requested.emit(*data)
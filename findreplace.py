@@ -1,19 +1,48 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QPushButton, QLabel
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QCheckBox
+)
 
 class FindReplaceDialog(QDialog):
+    find_requested = pyqtSignal()
+    replace_requested = pyqtSignal()
+    find_in_files_requested = pyqtSignal()
+    replace_in_files_requested = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle('Find/Replace')
         layout = QVBoxLayout()
         self.find_input = QLineEdit()
         self.replace_input = QLineEdit()
+        self.regex_box = QCheckBox('Regular expression')
+        self.case_box = QCheckBox('Match case')
+        self.word_box = QCheckBox('Whole word')
         find_btn = QPushButton('Find')
         replace_btn = QPushButton('Replace')
+        find_in_files_btn = QPushButton('Find in Files')
+        replace_in_files_btn = QPushButton('Replace in Files')
         layout.addWidget(QLabel('Find:'))
         layout.addWidget(self.find_input)
         layout.addWidget(QLabel('Replace:'))
         layout.addWidget(self.replace_input)
+        options = QHBoxLayout()
+        options.addWidget(self.regex_box)
+        options.addWidget(self.case_box)
+        options.addWidget(self.word_box)
+        layout.addLayout(options)
         layout.addWidget(find_btn)
         layout.addWidget(replace_btn)
+        layout.addWidget(find_in_files_btn)
+        layout.addWidget(replace_in_files_btn)
         self.setLayout(layout)
-        # Connect buttons to actions
\ No newline at end of file
+        # Connect buttons to actions
+        find_btn.clicked.connect(self.find_requested)
+        replace_btn.clicked.connect(self.replace_requested)
+        find_in_files_btn.clicked.connect(self.find_in_files_requested)
+        replace_in_files_btn.clicked.connect(self.replace_in_files_requested)
+
+    def options(self):
+        """Return (text, regex, case_sensitive, whole_word) as entered."""
+        return (self.find_input.text(), self.regex_box.isChecked(),
+                self.case_box.isChecked(), self.word_box.isChecked())
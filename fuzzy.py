@@ -0,0 +1,147 @@
+import bisect
+import re
+from array import array
+
+# At most this many matches are scored per query; the rest are never ranked
+SCORE_LIMIT = 1000
+# Added to name matches so they always outrank full-text-only matches
+NAME_BONUS = 1000
+
+
+def score(query, text):
+    """
+    Score lower-case `query` against lower-case `text`; higher is better,
+    None if query is not a subsequence of text. Contiguous runs and matches
+    at word starts score higher; shorter texts win ties.
+    """
+    pos = text.find(query)
+    if pos != -1:
+        bonus = 60 if pos == 0 or not text[pos - 1].isalnum() else 40
+        return bonus + 6 * len(query) - 0.1 * len(text)
+    total, i, prev = 0, -1, -2
+    for c in query:
+        i = text.find(c, i + 1)
+        if i == -1:
+            return None
+        if i == prev + 1:
+            total += 5
+        if i == 0 or not text[i - 1].isalnum():
+            total += 8
+        prev = i
+    return total - 0.1 * len(text)
+
+
+def _subsequence_pattern(query):
+    # Each gap excludes the next wanted character, so the match is the
+    # leftmost one and never backtracks; excluding \n keeps it on one line
+    parts = [re.escape(query[0])]
+    for c in query[1:]:
+        parts.append(f'[^\\n{re.escape(c)}]*{re.escape(c)}')
+    return re.compile(''.join(parts))
+
+
+class _Blob:
+    """Lower-cased strings joined by newlines, so a regex can scan them all in C."""
+
+    def __init__(self, strings):
+        self.text = '\n'.join(strings)
+        self.starts = array('l')
+        offset = 0
+        for s in strings:
+            self.starts.append(offset)
+            offset += len(s) + 1
+
+    def matches(self, pattern, subset=None):
+        """Yield indices of the strings pattern matches, each once, in order."""
+        if subset is not None and len(subset) * 8 < len(self.starts):
+            # Few candidates left: scan just their strings instead of the whole blob
+            indices = sorted(subset)
+            narrowed = _Blob([self.string(index) for index in indices])
+            for index in narrowed.matches(pattern):
+                yield indices[index]
+            return
+        last = -1
+        for m in pattern.finditer(self.text):
+            index = bisect.bisect_right(self.starts, m.start()) - 1
+            if index != last and (subset is None or index in subset):
+                last = index
+                yield index
+
+    def string(self, index):
+        end = self.starts[index + 1] - 1 if index + 1 < len(self.starts) else len(self.text)
+        return self.text[self.starts[index]:end]
+
+
+class FuzzyMatcher:
+    """
+    Ranks a fixed list of items against fuzzy queries. Each item has a full
+    text (e.g. a relative path) and a short name (e.g. the file name); name
+    matches rank above matches that only hit the full text.
+
+    Candidates are found with a regex over one joined string, which keeps a
+    keystroke cheap on hundreds of thousands of items. The full texts are only
+    scanned when names alone cannot fill the results, and when a query
+    extends the previous one only the previous matches are re-examined.
+    """
+
+    def __init__(self, items, text=str, name=None):
+        self.items = list(items)
+        texts = [text(item).lower() for item in self.items]
+        self._full = _Blob(texts)
+        self._names = _Blob([name(item).lower() for item in self.items]) if name else None
+        self._last_query = None
+        self._last_matches = None   # complete match set of the last query, or None
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query, limit=50, cancel_event=None):
+        """
+        Return up to limit items ranked best first. An empty query returns the
+        first items. Returns None if cancel_event is set before it finishes.
+        """
+        query = query.strip().lower().replace(' ', '')
+        if not query:
+            return self.items[:limit]
+        subset = None
+        if self._last_matches is not None and query.startswith(self._last_query):
+            subset = self._last_matches
+        literal = re.compile(re.escape(query))
+        subsequence = _subsequence_pattern(query)
+        # Cheapest and best tiers first: substring before subsequence, and
+        # names before full texts
+        tiers = [(self._full, literal), (self._full, subsequence)]
+        if self._names is not None:
+            tiers[:0] = [(self._names, literal), (self._names, subsequence)]
+        candidates = set()
+        complete = True
+        for blob, pattern in tiers:
+            if blob is self._full and self._names is not None and len(candidates) >= limit:
+                # Enough name matches to fill the results, and they outrank
+                # any full-text-only match: skip the expensive scan
+                complete = False
+                break
+            for index in blob.matches(pattern, subset):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                candidates.add(index)
+                if len(candidates) >= SCORE_LIMIT:
+                    complete = False
+                    break
+            if not complete:
+                break
+        self._last_query = query
+        self._last_matches = candidates if complete else None
+        scored = []
+        for index in candidates:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            best = score(query, self._full.string(index))
+            if self._names is not None:
+                name_score = score(query, self._names.string(index))
+                if name_score is not None:
+                    best = NAME_BONUS + name_score
+            if best is not None:
+                scored.append((best, index))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [self.items[index] for _, index in scored[:limit]]
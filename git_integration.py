@@ -1,5 +1,88 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
 import git
 
+from repopool import pool
+
+
+class GitCancelled(Exception):
+    """Raised internally when a running git command is cancelled."""
+
+
+def _stream(git_cmd, args, on_output, progress=None, cancel_event=None):
+    """
+    Run `git <args>` through a GitPython Git object and pass each output
+    line to on_output(text) as it arrives. Progress updates on stderr
+    (lines ended by carriage returns) go to progress, a git.RemoteProgress,
+    when given. Returns the exit code; raises GitCancelled if cancel_event
+    is set while the command runs.
+    """
+    proc = git_cmd.execute(['git', *args], as_process=True)
+    popen = proc.proc
+    handler = progress.new_message_handler() if progress is not None else None
+
+    def emit(raw, from_stderr):
+        text = raw.decode('utf-8', errors='replace').rstrip()
+        if not text:
+            return
+        if from_stderr and handler is not None and not text.startswith(('error:', 'fatal:')):
+            handler(text)
+        else:
+            on_output(text)
+
+    def pump(stream, from_stderr):
+        pending = b''
+        for chunk in iter(lambda: stream.read1(65536), b''):
+            *lines, pending = re.split(rb'[\r\n]', pending + chunk)
+            for line in lines:
+                emit(line, from_stderr)
+        emit(pending, from_stderr)
+
+    readers = [threading.Thread(target=pump, args=(popen.stdout, False), daemon=True),
+               threading.Thread(target=pump, args=(popen.stderr, True), daemon=True)]
+    for reader in readers:
+        reader.start()
+    cancelled = False
+    while True:
+        try:
+            popen.wait(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                popen.kill()
+                popen.wait()
+                cancelled = True
+                break
+    # Helpers such as ssh may hold the pipes open a little longer
+    deadline = time.monotonic() + 1
+    for reader in readers:
+        reader.join(max(deadline - time.monotonic(), 0))
+    if cancelled:
+        raise GitCancelled()
+    return popen.returncode
+
+
+def clone(url, dest, on_output=None, progress=None, cancel_event=None):
+    """Clone url into dest, streaming output to on_output when given. Returns a message; never raises."""
+    try:
+        if on_output is None:
+            git.Repo.clone_from(url, dest)
+            return "Repository cloned successfully to:\n" + dest
+        code = _stream(git.Git(), ['clone', '--progress', url, dest], on_output, progress, cancel_event)
+    except GitCancelled:
+        return "Git clone cancelled."
+    except Exception as e:
+        return f"Git error: {str(e)}"
+    if code != 0:
+        return f"Git clone failed (exit code {code})."
+    return "Repository cloned successfully to:\n" + dest
+
+
 class GitManager:
     """
     Enhanced GitManager for handling git operations in a safe way.
@@ -8,12 +91,47 @@ class GitManager:
 
     def __init__(self, repo_path='.'):
         self.repo_path = repo_path
+        # The Repo and its cat-file processes are shared with every other
+        # GitManager for the same folder
+        self.handle = None
         try:
-            self.repo = git.Repo(repo_path)
+            self.handle = pool.handle(repo_path)
+            self.repo = self.handle.repo
         except Exception as e:
             self.repo = None
             self._last_error = str(e)
 
+    def _run(self, *args, cancel_event=None):
+        """
+        Run `git <args>` and return its stdout.
+        If cancel_event (a threading.Event) is set while the command runs,
+        the process is killed and GitCancelled is raised.
+        """
+        if cancel_event is None:
+            return self.repo.git.execute(['git', *args])
+        proc = self.repo.git.execute(['git', *args], as_process=True)
+        popen = proc.proc
+        stdout = stderr = b''
+        while True:
+            try:
+                stdout, stderr = popen.communicate(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event.is_set():
+                    popen.kill()
+                    popen.communicate()
+                    raise GitCancelled()
+        if popen.returncode != 0:
+            raise git.GitCommandError(['git', *args], popen.returncode, stderr)
+        return stdout.decode('utf-8', errors='replace').rstrip('\n')
+
+    def _run_streamed(self, command, on_output, progress=None, cancel_event=None):
+        """Run `git <command> --progress` with output streamed to on_output; return a summary line."""
+        code = _stream(self.repo.git, [command, '--progress'], on_output, progress, cancel_event)
+        if code != 0:
+            return f"Git {command} failed (exit code {code})."
+        return f"Git {command} finished."
+
     def is_repo(self):
         """Return True if this folder is a git repository."""
         return self.repo is not None
@@ -22,21 +140,50 @@ class GitManager:
         """Initialize a new git repository if one does not exist."""
         if not self.repo:
             try:
-                self.repo = git.Repo.init(self.repo_path)
+                self.handle = pool.add(self.repo_path, git.Repo.init(self.repo_path))
+                self.repo = self.handle.repo
                 return "Initialized new git repository."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Repository already exists."
 
-    def status(self):
+    def status(self, cancel_event=None):
         """Return status of current git repo."""
         if not self.repo:
             return "Not a git repo"
         try:
-            return self.repo.git.status()
+            return self._run('status', cancel_event=cancel_event)
+        except GitCancelled:
+            return "Git status cancelled."
         except Exception as e:
             return f"Git error: {getattr(e, 'stderr', str(e))}"
 
+    def status_entries(self, paths=None, cancel_event=None):
+        """
+        Return machine-readable status as a list of (XY, path) tuples, with
+        paths relative to the repo root. Limited to `paths` when given.
+        Returns None if the status could not be read or was cancelled.
+        """
+        if not self.repo:
+            return None
+        args = ['status', '--porcelain=v1', '-z']
+        if paths:
+            args += ['--', *paths]
+        try:
+            out = self._run(*args, cancel_event=cancel_event)
+        except Exception:
+            return None
+        entries = []
+        fields = iter(out.split('\0'))
+        for field in fields:
+            if len(field) < 4:
+                continue
+            xy, path = field[:2], field[3:]
+            if 'R' in xy or 'C' in xy:
+                next(fields, None)  # skip the rename/copy source
+            entries.append((xy, path))
+        return entries
+
     def add(self, path=None):
         """Stage files. If path is None, stage all."""
         if not self.repo:
@@ -59,42 +206,186 @@ class GitManager:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def pull(self):
-        """Pull latest changes from remote."""
+    def pull(self, cancel_event=None, on_output=None, progress=None):
+        """Pull latest changes from remote. With on_output, output is streamed to it as it arrives."""
         if self.repo:
             try:
-                return self.repo.git.pull()
+                if on_output is not None:
+                    return self._run_streamed('pull', on_output, progress, cancel_event)
+                return self._run('pull', cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git pull cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def push(self):
-        """Push changes to remote."""
+    def push(self, cancel_event=None, on_output=None, progress=None):
+        """Push changes to remote. With on_output, output is streamed to it as it arrives."""
         if self.repo:
             try:
-                return self.repo.git.push()
+                if on_output is not None:
+                    return self._run_streamed('push', on_output, progress, cancel_event)
+                return self._run('push', cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git push cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def fetch(self):
-        """Fetch latest updates from remote."""
+    def fetch(self, cancel_event=None, on_output=None, progress=None):
+        """Fetch latest updates from remote. With on_output, output is streamed to it as it arrives."""
         if self.repo:
             try:
-                return self.repo.git.fetch()
+                if on_output is not None:
+                    return self._run_streamed('fetch', on_output, progress, cancel_event)
+                return self._run('fetch', cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git fetch cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def log(self, n=30):
+    def log(self, n=30, cancel_event=None):
         """Show commit log."""
         if self.repo:
             try:
-                return self.repo.git.log(f'--oneline', f'-n{n}')
+                return self._run('log', '--oneline', f'-n{n}', cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git log cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
+    def head_sha(self):
+        """Return the full sha of HEAD, or None (no repo, or no commits yet)."""
+        if self.repo:
+            try:
+                return self.repo.head.commit.hexsha
+            except Exception:
+                return None
+        return None
+
+    def log_records(self, batch_size=2000, rev='HEAD', cancel_event=None):
+        """
+        Stream the history of rev, newest first, as lists of
+        (sha bytes, author, email, unix time, subject) records of up to
+        batch_size. Stops quietly on error; raises nothing.
+        """
+        if not self.repo:
+            return
+        try:
+            proc = self.repo.git.execute(
+                ['git', 'log', '--format=%H%x1f%an%x1f%ae%x1f%at%x1f%s', rev], as_process=True)
+        except Exception:
+            return
+        popen = proc.proc
+        batch = []
+        try:
+            for raw in popen.stdout:
+                if cancel_event is not None and cancel_event.is_set():
+                    popen.kill()
+                    return
+                fields = raw.decode('utf-8', errors='replace').rstrip('\n').split('\x1f', 4)
+                if len(fields) != 5:
+                    continue
+                sha, author, email, when, subject = fields
+                batch.append((bytes.fromhex(sha), sys.intern(author), sys.intern(email), int(when), subject))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        except (OSError, ValueError):
+            return
+        finally:
+            if popen.poll() is None:
+                popen.kill()
+            popen.wait()
+
+    def commits_touching(self, path, cancel_event=None):
+        """Return the set of sha bytes of commits that changed path, or None on error/cancel."""
+        if not self.repo:
+            return None
+        try:
+            out = self._run('log', '--format=%H', '--', path, cancel_event=cancel_event)
+        except Exception:
+            return None
+        return {bytes.fromhex(line) for line in out.split('\n') if line}
+
+    def show_commit(self, sha, cancel_event=None):
+        """Show a commit's message and changed-file summary."""
+        if self.repo:
+            try:
+                return self._run('show', '--stat', '--format=fuller', sha, cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git show cancelled."
+            except Exception as e:
+                return f"Git error: {str(e)}"
+        return "Not a git repo"
+
+    def _head_rev(self, path):
+        rel = os.path.relpath(os.path.abspath(path), self.repo.working_tree_dir)
+        return 'HEAD:' + rel.replace(os.sep, '/')
+
+    def head_blob(self, path):
+        """Return (blob sha, bytes) of path as committed in HEAD, or (None, None) if it is not tracked."""
+        if self.repo:
+            try:
+                found = self.handle.objects.query(self._head_rev(path))
+            except Exception:
+                return None, None
+            if found is not None and found[1] == 'blob':
+                return found[0], found[3]
+        return None, None
+
+    def head_blob_sha(self, path):
+        """Return the blob sha of path in HEAD without reading it, or None if it is not tracked."""
+        if self.repo:
+            try:
+                found = self.handle.object_info.query(self._head_rev(path))
+            except Exception:
+                return None
+            if found is not None and found[1] == 'blob':
+                return found[0]
+        return None
+
+    def blame_incremental(self, path, rev='HEAD', first=None, last=None, cancel_event=None):
+        """
+        Blame path at rev using the incremental porcelain format, optionally
+        only lines first..last (1-based). Returns (commits, ranges) where
+        commits maps sha -> (author, unix time, summary) and ranges is a list
+        of (final line, line count, sha); None on error or cancel.
+        """
+        if not self.repo:
+            return None
+        args = ['blame', '--incremental']
+        if first is not None:
+            args.append(f"-L{first},{last}")
+        try:
+            out = self._run(*args, rev, '--', path, cancel_event=cancel_event)
+        except Exception:
+            return None
+        commits, ranges = {}, []
+        info = None
+        for line in out.split('\n'):
+            parts = line.split(' ')
+            if len(parts) == 4 and len(parts[0]) == 40 and info is None:
+                sha = parts[0]
+                ranges.append((int(parts[2]), int(parts[3]), sha))
+                if sha not in commits:
+                    info = {}
+                    commits[sha] = info
+                else:
+                    info = {}   # Repeated headers are not needed
+            elif info is not None:
+                key, _, value = line.partition(' ')
+                if key == 'filename':
+                    info = None
+                else:
+                    info[key] = value
+        return {sha: (sys.intern(h.get('author', '')), int(h.get('author-time', 0) or 0), h.get('summary', ''))
+                for sha, h in commits.items()}, ranges
+
     def branch(self):
         """List branches."""
         if self.repo:
@@ -122,18 +413,60 @@ class GitManager:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def diff(self, a=None, b=None):
+    def diff(self, a=None, b=None, cancel_event=None):
         """Show diff in working dir or between two commits/branches."""
         if self.repo:
             try:
                 if a and b:
-                    return self.repo.git.diff(f"{a}..{b}")
+                    return self._run('diff', f"{a}..{b}", cancel_event=cancel_event)
                 else:
-                    return self.repo.git.diff()
+                    return self._run('diff', cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git diff cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
+    def diff_files(self, a=None, b=None, cancel_event=None):
+        """
+        List the files that differ between a and b, a and the working tree,
+        or (with neither) the index and the working tree, from `git diff --raw`.
+        Returns a list of (status, old path, new path, old sha, new sha);
+        a side that is the working tree has an all-zero sha.
+        """
+        if self.repo:
+            try:
+                out = self._run('diff', '--raw', '-z', '--no-abbrev', *[r for r in (a, b) if r],
+                                cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git diff cancelled."
+            except Exception as e:
+                return f"Git error: {str(e)}"
+            fields = out.split('\0')
+            changes = []
+            i = 0
+            while i < len(fields) and fields[i].startswith(':'):
+                _, _, old_sha, new_sha, status = fields[i][1:].split(' ')
+                if status[0] in 'RC':
+                    old_path, new_path = fields[i + 1], fields[i + 2]
+                    i += 3
+                else:
+                    old_path = new_path = fields[i + 1]
+                    i += 2
+                changes.append((status[0], old_path, new_path, old_sha, new_sha))
+            return changes
+        return "Not a git repo"
+
+    def blob_bytes(self, sha):
+        """Return the contents of a blob, or None if it cannot be read."""
+        if self.repo:
+            try:
+                found = self.handle.objects.query(sha)
+            except Exception:
+                return None
+            return found[3] if found is not None else None
+        return None
+
     def remotes(self):
         """List remote URLs."""
         if self.repo:
@@ -231,20 +564,13 @@ class GitManager:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
 
-    def blame(self, file_path):
+    def blame(self, file_path, cancel_event=None):
         """Show who last edited each line of a file."""
         if self.repo:
             try:
-                return self.repo.git.blame(file_path)
-            except Exception as e:
-                return f"Git error: {str(e)}"
-        return "Not a git repo"
-
-    def fetch(self):
-        """Fetch updates from remote."""
-        if self.repo:
-            try:
-                return self.repo.git.fetch()
+                return self._run('blame', file_path, cancel_event=cancel_event)
+            except GitCancelled:
+                return "Git blame cancelled."
             except Exception as e:
                 return f"Git error: {str(e)}"
         return "Not a git repo"
@@ -0,0 +1,143 @@
+import os
+
+from PyQt5.QtGui import QColor
+
+MODIFIED = 'modified'
+STAGED = 'staged'
+UNTRACKED = 'untracked'
+
+BADGES = {MODIFIED: 'M', STAGED: 'S', UNTRACKED: 'U'}
+COLORS = {MODIFIED: QColor('#c07000'), STAGED: QColor('#2e8b3a'), UNTRACKED: QColor('#4a78b5')}
+
+# Above this many changed paths a rescan is scoped to their folders instead
+MAX_SCOPED_PATHS = 64
+
+
+def classify(xy):
+    """Map a porcelain XY code to one of MODIFIED, STAGED, UNTRACKED (or None)."""
+    if xy == '??':
+        return UNTRACKED
+    if xy == '!!':
+        return None
+    if xy[1] != ' ':
+        return MODIFIED
+    if xy[0] != ' ':
+        return STAGED
+    return None
+
+
+class GitStatusCache:
+    """
+    Per-file git status for a working tree, keyed on the index mtime and HEAD.
+    Only dirty paths are stored, so lookups and memory scale with the number
+    of changes rather than the size of the tree. Scans run on worker threads
+    (see scan); apply must be called on the UI thread.
+    """
+
+    def __init__(self, git_manager):
+        self.git = git_manager
+        self.root = os.path.normpath(git_manager.repo_path)
+        self.git_dir = os.path.join(self.root, '.git')
+        self.key = None
+        self.entries = {}      # absolute path -> MODIFIED/STAGED/UNTRACKED
+        self.dir_counts = {}   # absolute dir -> number of dirty descendants
+
+    def current_key(self):
+        """Cheap fingerprint of the repo state: index mtime plus HEAD contents."""
+        try:
+            index_mtime = os.stat(os.path.join(self.git_dir, 'index')).st_mtime_ns
+        except OSError:
+            index_mtime = None
+        try:
+            with open(os.path.join(self.git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+                head = f.read().strip()
+            if head.startswith('ref: '):
+                ref_path = os.path.join(self.git_dir, head[5:])
+                if os.path.isfile(ref_path):
+                    with open(ref_path, 'r', encoding='utf-8') as f:
+                        head = f.read().strip()
+        except OSError:
+            head = None
+        return index_mtime, head
+
+    def is_stale(self):
+        return self.key != self.current_key()
+
+    def scan(self, paths=None, cancel_event=None):
+        """
+        Run `git status` for the whole tree or only `paths` (absolute).
+        Safe to call from a worker thread; returns a result for apply().
+        """
+        key = self.current_key()
+        rel = [os.path.relpath(p, self.root) for p in paths] if paths else None
+        entries = self.git.status_entries(rel, cancel_event=cancel_event)
+        if entries is None:
+            return None
+        return key, paths, entries
+
+    def apply(self, result):
+        """Merge a scan result into the cache; return the set of changed paths."""
+        if result is None:
+            return set()
+        key, paths, entries = result
+        changed = set()
+        if paths is None:
+            changed.update(self.entries)
+            self.entries = {}
+            self.dir_counts = {}
+        else:
+            scopes = [os.path.normpath(p) for p in paths]
+            for path in [p for p in self.entries if self._under_any(p, scopes)]:
+                self._remove(path)
+                changed.add(path)
+        for xy, rel_path in entries:
+            state = classify(xy)
+            if state is None:
+                continue
+            path = os.path.normpath(os.path.join(self.root, rel_path))
+            self._add(path, state)
+            changed.add(path)
+        if paths is None:
+            self.key = key
+        return changed
+
+    @staticmethod
+    def _under_any(path, scopes):
+        return any(path == s or path.startswith(s + os.sep) for s in scopes)
+
+    def _ancestors(self, path):
+        parent = os.path.dirname(path)
+        while len(parent) >= len(self.root) and parent != path:
+            yield parent
+            if parent == self.root:
+                break
+            path, parent = parent, os.path.dirname(parent)
+
+    def _add(self, path, state):
+        if path not in self.entries:
+            for d in self._ancestors(path):
+                self.dir_counts[d] = self.dir_counts.get(d, 0) + 1
+        self.entries[path] = state
+
+    def _remove(self, path):
+        del self.entries[path]
+        for d in self._ancestors(path):
+            count = self.dir_counts.get(d, 0) - 1
+            if count > 0:
+                self.dir_counts[d] = count
+            else:
+                self.dir_counts.pop(d, None)
+
+    def status_of(self, path):
+        """Return the status of a file or directory, or None if it is clean."""
+        path = os.path.normpath(path)
+        state = self.entries.get(path)
+        if state:
+            return state
+        if path in self.dir_counts:
+            return MODIFIED
+        # Files inside an untracked directory are reported only via the directory
+        for d in self._ancestors(path):
+            if self.entries.get(d) == UNTRACKED:
+                return UNTRACKED
+        return None
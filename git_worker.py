@@ -0,0 +1,127 @@
+import itertools
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# GitManager methods that accept a cancel_event keyword
+CANCELLABLE = {'status', 'pull', 'push', 'fetch', 'log', 'blame', 'diff'}
+
+
+class _TaskSignals(QObject):
+    started = pyqtSignal(int)
+    finished = pyqtSignal(int, object)
+
+
+class GitTask(QRunnable):
+    """Runs one GitManager call on a pool thread."""
+
+    def __init__(self, task_id, fn, args, kwargs):
+        super().__init__()
+        self.task_id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+        self.signals = _TaskSignals()
+
+    def run(self):
+        if self.cancel_event.is_set():
+            self.signals.finished.emit(self.task_id, None)
+            return
+        self.signals.started.emit(self.task_id)
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            # GitManager never raises, but callables passed via submit_call might
+            result = f"Git error: {str(e)}"
+        self.signals.finished.emit(self.task_id, result)
+
+
+class AsyncGitManager(QObject):
+    """
+    Runs GitManager operations on a bounded QThreadPool so the UI thread
+    never blocks on git. Results are delivered through Qt signals.
+    """
+    task_started = pyqtSignal(int, str)            # task id, label
+    task_finished = pyqtSignal(int, str, object)   # task id, label, result
+    task_cancelled = pyqtSignal(int, str)          # task id, label
+    active_changed = pyqtSignal(int)               # number of queued or running foreground tasks
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self._ids = itertools.count(1)
+        self._tasks = {}   # task id -> (GitTask, label)
+        self._quiet = set()  # ids of background tasks hidden from progress reporting
+
+    def submit(self, git_manager, method, *args, label=None, **kwargs):
+        """Queue git_manager.<method>(*args) and return its task id."""
+        task = self._make_task(getattr(git_manager, method), args, kwargs, label or method, False)
+        if method in CANCELLABLE:
+            task.kwargs['cancel_event'] = task.cancel_event
+        self.pool.start(task)
+        return task.task_id
+
+    def submit_call(self, fn, *args, label='git', quiet=False, **kwargs):
+        """
+        Queue an arbitrary callable; it receives cancel_event as a keyword.
+        Quiet tasks are housekeeping and are not reported through active_changed.
+        """
+        task = self._make_task(fn, args, kwargs, label, quiet)
+        task.kwargs['cancel_event'] = task.cancel_event
+        self.pool.start(task)
+        return task.task_id
+
+    def _make_task(self, fn, args, kwargs, label, quiet):
+        task = GitTask(next(self._ids), fn, args, dict(kwargs))
+        task.setAutoDelete(False)
+        task.signals.started.connect(self._on_started)
+        task.signals.finished.connect(self._on_finished)
+        self._tasks[task.task_id] = (task, label)
+        if quiet:
+            self._quiet.add(task.task_id)
+        else:
+            self.active_changed.emit(self._active_count())
+        return task
+
+    def _active_count(self):
+        return len(self._tasks) - len(self._quiet)
+
+    def cancel(self, task_id):
+        entry = self._tasks.get(task_id)
+        if entry:
+            entry[0].cancel_event.set()
+
+    def cancel_all(self):
+        for task, _ in self._tasks.values():
+            task.cancel_event.set()
+
+    def is_quiet(self, task_id):
+        return task_id in self._quiet
+
+    def active_labels(self):
+        return [label for task_id, (_, label) in self._tasks.items() if task_id not in self._quiet]
+
+    def _on_started(self, task_id):
+        entry = self._tasks.get(task_id)
+        if entry and task_id not in self._quiet:
+            self.task_started.emit(task_id, entry[1])
+
+    def _on_finished(self, task_id, result):
+        task, label = self._tasks.pop(task_id, (None, ''))
+        if task is None:
+            return
+        quiet = task_id in self._quiet
+        # Activity goes first, so the status bar reset does not wipe the result's message
+        if not quiet:
+            self.active_changed.emit(self._active_count())
+        if task.cancel_event.is_set():
+            self.task_cancelled.emit(task_id, label)
+        else:
+            self.task_finished.emit(task_id, label, result)
+        self._quiet.discard(task_id)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.waitForDone()
@@ -0,0 +1,144 @@
+import re
+import threading
+from collections import deque
+
+import git
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton, QPlainTextEdit
+)
+
+# Lines of scrollback kept; older lines are dropped first
+MAX_CONSOLE_LINES = 5000
+FLUSH_MS = 50
+# user:password@ in URLs, as echoed in git's messages and command lines
+URL_CREDENTIALS = re.compile(r'(\w+://[^/\s:@]+:)[^/\s@]+@')
+
+STAGES = {
+    git.RemoteProgress.COUNTING: 'Counting objects',
+    git.RemoteProgress.COMPRESSING: 'Compressing objects',
+    git.RemoteProgress.WRITING: 'Writing objects',
+    git.RemoteProgress.RECEIVING: 'Receiving objects',
+    git.RemoteProgress.RESOLVING: 'Resolving deltas',
+    git.RemoteProgress.FINDING_SOURCES: 'Finding sources',
+    git.RemoteProgress.CHECKING_OUT: 'Checking out files',
+}
+
+
+class ConsoleProgress(git.RemoteProgress):
+    """Sends GitPython's parsed transfer progress to a GitConsole; other lines are printed."""
+
+    def __init__(self, console):
+        super().__init__()
+        self.console = console
+
+    def update(self, op_code, cur_count, max_count=None, message=''):
+        stage = STAGES.get(op_code & self.OP_MASK, 'Working')
+        self.console.set_progress(f"{stage} {message}".strip(), int(cur_count or 0), int(max_count or 0))
+
+    def line_dropped(self, line):
+        self.console.write(line)
+        # RemoteProgress also keeps every such line; do not let that grow
+        self.other_lines.clear()
+
+
+class GitConsole(QDockWidget):
+    """
+    Dockable output of long-running git commands. write() and
+    set_progress() may be called from any thread: lines wait in a bounded
+    queue and are appended in batches by a timer, and the view keeps at most
+    MAX_CONSOLE_LINES lines.
+    """
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__('Git Console', parent)
+        self.setObjectName('GitConsole')
+        body = QWidget()
+        layout = QVBoxLayout(body)
+        layout.setContentsMargins(4, 4, 4, 4)
+        header = QHBoxLayout()
+        self.stage = QLabel('')
+        self.progress = QProgressBar()
+        self.progress.setMaximumWidth(200)
+        self.progress.hide()
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_requested)
+        header.addWidget(self.stage, 1)
+        header.addWidget(self.progress)
+        header.addWidget(self.cancel_button)
+        layout.addLayout(header)
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setUndoRedoEnabled(False)
+        self.output.setMaximumBlockCount(MAX_CONSOLE_LINES)
+        font = QFont('Courier New')
+        font.setStyleHint(QFont.Monospace)
+        self.output.setFont(font)
+        layout.addWidget(self.output)
+        self.setWidget(body)
+        self._pending = deque(maxlen=MAX_CONSOLE_LINES)
+        self._latest_progress = None
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_MS)
+        self._timer.timeout.connect(self._flush)
+        self._running = 0
+        self._secrets = set()
+
+    def begin(self, title, secrets=()):
+        """Announce a command and show the console; secrets are masked until it finishes."""
+        self._running += 1
+        # Replaced, not updated in place: worker threads may be iterating it
+        self._secrets = self._secrets | {secret for secret in secrets if secret}
+        self.write(f"$ {title}")
+        self.cancel_button.setEnabled(True)
+        self.stage.setText(title)
+        self.show()
+        self.raise_()
+        self._timer.start()
+
+    def redact(self, text):
+        """Mask URL credentials and the running commands' secrets in text."""
+        text = URL_CREDENTIALS.sub(r'\1***@', text)
+        for secret in self._secrets:
+            text = text.replace(secret, '***')
+        return text
+
+    def write(self, text):
+        text = self.redact(text)
+        with self._lock:
+            self._pending.append(text)
+
+    def set_progress(self, message, current, total):
+        message = self.redact(message)
+        with self._lock:
+            self._latest_progress = (message, current, total)
+
+    def finish(self, result):
+        """Print the command's result; stop flushing once nothing is running."""
+        self.write(str(result))
+        self._running = max(self._running - 1, 0)
+        self._flush()
+        if not self._running:
+            self._secrets = set()
+            self._timer.stop()
+            self.cancel_button.setEnabled(False)
+            self.progress.hide()
+            self.stage.setText(str(result).splitlines()[0] if result else '')
+
+    def _flush(self):
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            progress, self._latest_progress = self._latest_progress, None
+        if lines:
+            self.output.appendPlainText('\n'.join(lines))
+        if progress is not None:
+            message, current, total = progress
+            self.stage.setText(message)
+            self.progress.setRange(0, total)
+            self.progress.setValue(min(current, total) if total else 0)
+            self.progress.show()
@@ -0,0 +1,236 @@
+import os
+import pickle
+import threading
+import time
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTreeView, QLabel
+)
+
+from fileio import atomic_open
+
+CACHE_VERSION = 1
+# Rows handed to the view each time it scrolls to the bottom
+FETCH_ROWS = 500
+COLUMNS = ['Commit', 'Subject', 'Author', 'Date']
+
+SHA, AUTHOR, EMAIL, TIME, SUBJECT = range(5)
+
+
+class HistoryLoader(QThread):
+    """
+    Loads the commit history of HEAD in batches. A per-repo cache keyed by
+    the HEAD sha makes reopening an unchanged repo instant.
+    """
+    batch_ready = pyqtSignal(list)
+    finished_loading = pyqtSignal(bool)   # True if cancelled
+
+    def __init__(self, git_manager, cache_path, parent=None):
+        super().__init__(parent)
+        self.git = git_manager
+        self.cache_path = cache_path
+        self.cancel_event = threading.Event()
+        self.head = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        head = self.head = self.git.head_sha()
+        cached = self._load(head)
+        if cached is not None:
+            for start in range(0, len(cached), 20000):
+                self.batch_ready.emit(cached[start:start + 20000])
+            self.finished_loading.emit(False)
+            return
+        commits = []
+        for batch in self.git.log_records(cancel_event=self.cancel_event):
+            commits.extend(batch)
+            self.batch_ready.emit(batch)
+        cancelled = self.cancel_event.is_set()
+        if not cancelled and head:
+            self._save(head, commits)
+        self.finished_loading.emit(cancelled)
+
+    def _load(self, head):
+        if not head:
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return None
+        if state.get('version') != CACHE_VERSION or state.get('head') != head:
+            return None
+        return state['commits']
+
+    def _save(self, head, commits):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with atomic_open(self.cache_path, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'head': head, 'commits': commits},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+
+class CommitLogModel(QAbstractTableModel):
+    """
+    Table over every loaded commit. Rows are exposed to the view a page at
+    a time through canFetchMore/fetchMore, and only visible cells are ever
+    formatted. Filters select row numbers in memory; nothing is reloaded.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.commits = []
+        self._rows = []         # indices into commits that pass the filters
+        self._shown = 0         # rows currently exposed to the view
+        self._author = ''
+        self._shas = None       # set of sha bytes from a path filter, or None
+
+    def clear(self):
+        self.beginResetModel()
+        self.commits, self._rows, self._shown = [], [], 0
+        self.endResetModel()
+
+    def add_commits(self, batch):
+        start = len(self.commits)
+        self.commits.extend(batch)
+        self._rows.extend(i for i in range(start, len(self.commits)) if self._accepts(self.commits[i]))
+        # Fill the first page straight away; later pages wait for the view
+        if self._shown < FETCH_ROWS:
+            self.fetchMore(QModelIndex())
+
+    def set_filters(self, author='', shas=None):
+        """Filter by author name/email substring and/or a set of sha bytes (None = all)."""
+        self._author = author.strip().lower()
+        self._shas = shas
+        self.beginResetModel()
+        self._rows = [i for i, c in enumerate(self.commits) if self._accepts(c)]
+        self._shown = min(FETCH_ROWS, len(self._rows))
+        self.endResetModel()
+
+    def _accepts(self, commit):
+        if self._shas is not None and commit[SHA] not in self._shas:
+            return False
+        if self._author and self._author not in commit[AUTHOR].lower() and self._author not in commit[EMAIL].lower():
+            return False
+        return True
+
+    def commit_at(self, row):
+        return self.commits[self._rows[row]]
+
+    def filtered_count(self):
+        return len(self._rows)
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._shown < len(self._rows)
+
+    def fetchMore(self, parent):
+        count = min(FETCH_ROWS, len(self._rows) - self._shown)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+        self._shown += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        commit = self.commit_at(index.row())
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return commit[SHA].hex()[:10]
+            if column == 1:
+                return commit[SUBJECT]
+            if column == 2:
+                return commit[AUTHOR]
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(commit[TIME]))
+        if role == Qt.ToolTipRole:
+            return f"{commit[SHA].hex()}\n{commit[AUTHOR]} <{commit[EMAIL]}>\n{commit[SUBJECT]}"
+        return None
+
+
+class HistoryPanel(QDockWidget):
+    """Dockable git history with author and path filters."""
+    commit_activated = pyqtSignal(str)       # full sha
+    path_filter_requested = pyqtSignal(str)  # path, or '' to clear
+
+    def __init__(self, parent=None):
+        super().__init__('Git History', parent)
+        self.setObjectName('GitHistory')
+        self.model = CommitLogModel(self)
+        body = QWidget()
+        layout = QVBoxLayout(body)
+        layout.setContentsMargins(2, 2, 2, 2)
+        filters = QHBoxLayout()
+        self.author_input = QLineEdit()
+        self.author_input.setPlaceholderText('Author')
+        self.path_input = QLineEdit()
+        self.path_input.setPlaceholderText('Path (press Enter)')
+        filter_button = QPushButton('Filter')
+        filters.addWidget(self.author_input)
+        filters.addWidget(self.path_input)
+        filters.addWidget(filter_button)
+        layout.addLayout(filters)
+        self.view = QTreeView()
+        self.view.setRootIsDecorated(False)
+        self.view.setUniformRowHeights(True)
+        self.view.setAlternatingRowColors(True)
+        self.view.setModel(self.model)
+        self.view.setColumnWidth(0, 100)
+        self.view.setColumnWidth(1, 420)
+        self.view.setColumnWidth(2, 160)
+        layout.addWidget(self.view)
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+        self.setWidget(body)
+        self._path_shas = None
+        self.author_input.textChanged.connect(self._apply_filters)
+        self.path_input.returnPressed.connect(self._request_path_filter)
+        filter_button.clicked.connect(self._request_path_filter)
+        self.view.activated.connect(lambda idx: self.commit_activated.emit(self.model.commit_at(idx.row())[SHA].hex()))
+
+    def start(self):
+        self.model.clear()
+        self._path_shas = None
+        self.summary.setText('Loading history...')
+
+    def add_commits(self, batch):
+        self.model.add_commits(batch)
+
+    def finish(self, cancelled):
+        self._update_summary(' (cancelled)' if cancelled else '')
+
+    def set_path_commits(self, shas):
+        """Result of a path filter: the shas touching the path, or None to clear."""
+        self._path_shas = shas
+        self._apply_filters()
+
+    def _request_path_filter(self):
+        self.path_filter_requested.emit(self.path_input.text().strip())
+
+    def _apply_filters(self):
+        self.model.set_filters(self.author_input.text(), self._path_shas)
+        self._update_summary()
+
+    def _update_summary(self, suffix=''):
+        total = len(self.model.commits)
+        shown = self.model.filtered_count()
+        text = f"{total} commits" if shown == total else f"{shown} of {total} commits"
+        self.summary.setText(text + suffix)
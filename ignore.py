@@ -0,0 +1,159 @@
+import fnmatch
+import os
+import re
+
+# Always skipped, whatever the ignore files say
+ALWAYS_IGNORED = {'.git', '.hg', '.svn'}
+
+
+def _translate(pattern):
+    """Translate one gitignore glob (without leading '!' or trailing '/') to a regex."""
+    anchored = '/' in pattern.rstrip('/')
+    pattern = pattern.lstrip('/')
+    i, out = 0, []
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                out.append(fnmatch.translate(pattern[i:j + 1])[4:-3])
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    body = ''.join(out)
+    # Unanchored patterns match at any depth below the ignore file
+    return re.compile(('' if anchored else '(?:.*/)?') + body + r'\Z')
+
+
+class IgnoreRules:
+    """
+    Compiled rules from one .gitignore-style file (or a list of globs),
+    matched against paths relative to the directory that owns them.
+    """
+
+    def __init__(self, lines=()):
+        self.rules = []  # (regex, negated, dir_only)
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip(' ')
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if line:
+                self.rules.append((_translate(line), negated, dir_only))
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(f.readlines())
+        except OSError:
+            return cls()
+
+    def match(self, rel_path, is_dir):
+        """Return True (ignored), False (re-included) or None (no rule applies)."""
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+
+class IgnoreMatcher:
+    """
+    Hierarchical .gitignore matcher for a workspace.
+    Rules from each directory's .gitignore are loaded lazily and cached;
+    `extra_globs` (user excludes) apply everywhere.
+    """
+
+    def __init__(self, root, extra_globs=(), use_gitignore=True):
+        # Absolute, so walking up from a path always reaches (or passes) it
+        self.root = os.path.abspath(root)
+        self.use_gitignore = use_gitignore
+        self.extra = IgnoreRules(extra_globs)
+        self._dir_rules = {}
+
+    def rules_for(self, directory):
+        rules = self._dir_rules.get(directory)
+        if rules is None:
+            rules = IgnoreRules.from_file(os.path.join(directory, '.gitignore'))
+            self._dir_rules[directory] = rules
+        return rules
+
+    def invalidate(self, directory=None):
+        """Forget cached rules (for one directory, or all)."""
+        if directory is None:
+            self._dir_rules.clear()
+        else:
+            self._dir_rules.pop(os.path.normpath(directory), None)
+
+    def is_ignored(self, path, is_dir=None):
+        """Return True if path is excluded. Parents are not re-checked."""
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        if name in ALWAYS_IGNORED:
+            return True
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+        if self.extra.match(rel, is_dir):
+            return True
+        if not self.use_gitignore:
+            return False
+        # Deeper .gitignore files override shallower ones
+        directory = os.path.dirname(path)
+        while True:
+            sub = os.path.relpath(path, directory).replace(os.sep, '/')
+            verdict = self.rules_for(directory).match(sub, is_dir)
+            if verdict is not None:
+                return verdict
+            if directory == self.root or len(directory) <= len(self.root):
+                return False
+            directory = os.path.dirname(directory)
+
+    def walk_files(self, cancel_event=None, start=None):
+        """
+        Yield absolute paths of non-ignored files, pruning ignored folders.
+        `start` limits the walk to one folder inside the root.
+        """
+        stack = [os.path.abspath(start) if start else self.root]
+        while stack:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if self.is_ignored(entry.path, is_dir):
+                    continue
+                if is_dir:
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
@@ -0,0 +1,86 @@
+import codecs
+import mmap
+import os
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Files at or above this size are opened through the chunked loader
+LARGE_FILE_THRESHOLD_MB = 20
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_large_file(path, threshold_mb=LARGE_FILE_THRESHOLD_MB):
+    """Return True if the file at path should be opened in large-file mode."""
+    try:
+        return os.path.getsize(path) >= threshold_mb * 1024 * 1024
+    except OSError:
+        return False
+
+
+class LargeFileLoader(QThread):
+    """
+    Memory-maps a file and streams it to the UI thread in decoded chunks.
+    At most `max_pending` chunks are in flight at once, so memory stays
+    bounded even if the editor consumes slower than the disk produces.
+    Decoding is strict until a chunk fails; from there undecodable bytes are
+    replaced and `lossy` is set.
+    """
+    chunk_ready = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    finished_loading = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, encoding='utf-8', chunk_size=CHUNK_SIZE, max_pending=2, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self._pending = threading.Semaphore(max_pending)
+        self._cancelled = False
+        self.lossy = False
+
+    def cancel(self):
+        self._cancelled = True
+        # Wake the worker if it is waiting for the editor to catch up
+        self._pending.release()
+
+    def chunk_consumed(self):
+        """Called by the consumer once a chunk has been appended."""
+        self._pending.release()
+
+    def run(self):
+        try:
+            size = os.path.getsize(self.path)
+            if size == 0:
+                self.progress.emit(100)
+                self.finished_loading.emit()
+                return
+            decoder = codecs.getincrementaldecoder(self.encoding)()
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = 0
+                while offset < size:
+                    self._pending.acquire()
+                    if self._cancelled:
+                        return
+                    end = min(offset + self.chunk_size, size)
+                    chunk = mm[offset:end]
+                    state = decoder.getstate()
+                    try:
+                        text = decoder.decode(chunk, final=end >= size)
+                    except UnicodeDecodeError:
+                        # Redo this chunk from where the strict decoder left off
+                        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+                        decoder.setstate(state)
+                        text = decoder.decode(chunk, final=end >= size)
+                        self.lossy = True
+                    offset = end
+                    if text:
+                        self.chunk_ready.emit(text)
+                    else:
+                        self._pending.release()
+                    self.progress.emit(int(offset * 100 / size))
+            if not self._cancelled:
+                self.finished_loading.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
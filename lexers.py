@@ -0,0 +1,236 @@
+import json
+import os
+import re
+
+from PyQt5 import Qsci
+from PyQt5.QtGui import QColor
+
+# Language name -> QsciLexer class name. Resolved lazily, since some lexers
+# (JSON, Markdown, ...) only exist in newer QScintilla releases.
+LEXER_CLASSES = {
+    'asm': 'QsciLexerAsm',
+    'avs': 'QsciLexerAVS',
+    'bash': 'QsciLexerBash',
+    'batch': 'QsciLexerBatch',
+    'cmake': 'QsciLexerCMake',
+    'coffeescript': 'QsciLexerCoffeeScript',
+    'cpp': 'QsciLexerCPP',
+    'csharp': 'QsciLexerCSharp',
+    'css': 'QsciLexerCSS',
+    'd': 'QsciLexerD',
+    'diff': 'QsciLexerDiff',
+    'fortran': 'QsciLexerFortran',
+    'fortran77': 'QsciLexerFortran77',
+    'html': 'QsciLexerHTML',
+    'idl': 'QsciLexerIDL',
+    'java': 'QsciLexerJava',
+    'javascript': 'QsciLexerJavaScript',
+    'json': 'QsciLexerJSON',
+    'lua': 'QsciLexerLua',
+    'makefile': 'QsciLexerMakefile',
+    'markdown': 'QsciLexerMarkdown',
+    'matlab': 'QsciLexerMatlab',
+    'octave': 'QsciLexerOctave',
+    'pascal': 'QsciLexerPascal',
+    'perl': 'QsciLexerPerl',
+    'po': 'QsciLexerPO',
+    'postscript': 'QsciLexerPostScript',
+    'pov': 'QsciLexerPOV',
+    'properties': 'QsciLexerProperties',
+    'python': 'QsciLexerPython',
+    'ruby': 'QsciLexerRuby',
+    'spice': 'QsciLexerSpice',
+    'sql': 'QsciLexerSQL',
+    'tcl': 'QsciLexerTCL',
+    'tex': 'QsciLexerTeX',
+    'verilog': 'QsciLexerVerilog',
+    'vhdl': 'QsciLexerVHDL',
+    'xml': 'QsciLexerXML',
+    'yaml': 'QsciLexerYAML',
+}
+
+# Lower-case extension -> language
+EXTENSIONS = {
+    '.asm': 'asm', '.s': 'asm', '.avs': 'avs',
+    '.sh': 'bash', '.bash': 'bash', '.zsh': 'bash', '.ksh': 'bash',
+    '.bat': 'batch', '.cmd': 'batch', '.cmake': 'cmake', '.coffee': 'coffeescript',
+    '.c': 'cpp', '.h': 'cpp', '.cc': 'cpp', '.cpp': 'cpp', '.cxx': 'cpp', '.hh': 'cpp',
+    '.hpp': 'cpp', '.hxx': 'cpp', '.ino': 'cpp', '.m': 'cpp', '.mm': 'cpp', '.go': 'cpp',
+    '.rs': 'cpp', '.swift': 'cpp', '.kt': 'java', '.scala': 'java',
+    '.cs': 'csharp', '.css': 'css', '.scss': 'css', '.less': 'css', '.d': 'd',
+    '.diff': 'diff', '.patch': 'diff',
+    '.f90': 'fortran', '.f95': 'fortran', '.f03': 'fortran', '.f': 'fortran77', '.for': 'fortran77',
+    '.html': 'html', '.htm': 'html', '.xhtml': 'html', '.php': 'html', '.vue': 'html',
+    '.idl': 'idl', '.java': 'java',
+    '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript', '.jsx': 'javascript',
+    '.ts': 'javascript', '.tsx': 'javascript',
+    '.json': 'json', '.jsonc': 'json', '.geojson': 'json', '.ipynb': 'json',
+    '.lua': 'lua', '.mk': 'makefile', '.mak': 'makefile',
+    '.md': 'markdown', '.markdown': 'markdown',
+    '.pas': 'pascal', '.pp': 'pascal', '.pl': 'perl', '.pm': 'perl', '.t': 'perl',
+    '.po': 'po', '.pot': 'po', '.ps': 'postscript', '.eps': 'postscript', '.pov': 'pov',
+    '.ini': 'properties', '.cfg': 'properties', '.conf': 'properties', '.properties': 'properties',
+    '.toml': 'properties', '.env': 'properties',
+    '.py': 'python', '.pyw': 'python', '.pyi': 'python', '.pyx': 'python',
+    '.rb': 'ruby', '.rake': 'ruby', '.gemspec': 'ruby', '.cir': 'spice', '.sp': 'spice',
+    '.sql': 'sql', '.tcl': 'tcl', '.tex': 'tex', '.sty': 'tex', '.cls': 'tex',
+    '.v': 'verilog', '.sv': 'verilog', '.svh': 'verilog', '.vhd': 'vhdl', '.vhdl': 'vhdl',
+    '.xml': 'xml', '.xsd': 'xml', '.xsl': 'xml', '.svg': 'xml', '.plist': 'xml', '.ui': 'xml',
+    '.qrc': 'xml', '.csproj': 'xml',
+    '.yml': 'yaml', '.yaml': 'yaml',
+}
+
+# Extensions of plain text that must not be sniffed (log lines often start with '[' or '{')
+PLAIN_EXTENSIONS = {'.txt', '.text', '.log', '.out', '.csv', '.tsv'}
+
+# Whole file names (lower case) that have no telling extension
+FILENAMES = {
+    'makefile': 'makefile', 'gnumakefile': 'makefile', 'cmakelists.txt': 'cmake',
+    'dockerfile': 'bash', '.bashrc': 'bash', '.bash_profile': 'bash', '.profile': 'bash',
+    '.zshrc': 'bash', 'gemfile': 'ruby', 'rakefile': 'ruby', '.gitconfig': 'properties',
+    '.editorconfig': 'properties', 'setup.cfg': 'properties', 'tox.ini': 'properties',
+}
+
+# Interpreter named on a #! line -> language
+INTERPRETERS = {
+    'python': 'python', 'sh': 'bash', 'bash': 'bash', 'zsh': 'bash', 'ksh': 'bash', 'dash': 'bash',
+    'perl': 'perl', 'ruby': 'ruby', 'node': 'javascript', 'lua': 'lua', 'tclsh': 'tcl',
+    'wish': 'tcl', 'make': 'makefile', 'octave': 'octave',
+}
+
+# Files larger than this are shown as plain text
+HIGHLIGHT_SIZE_LIMIT_MB = 8
+SNIFF_BYTES = 512
+_SHEBANG = re.compile(r'#!\s*(\S+)(?:\s+(?:-\S+\s+)*(\S+))?')
+# An object with a quoted key (or empty), or an array of objects, arrays or strings
+_JSON_START = re.compile(r'\{\s*("(?:[^"\\\n]|\\.)*"\s*:|\})'
+                         r'|\[\s*(\{\s*("|\})|\[|"(?:[^"\\\n]|\\.)*"\s*[,\]]|\])')
+
+# Editor colours per theme: paper, default text, caret line, margin paper, margin text
+THEME_PALETTES = {
+    'light': {'paper': '#ffffff', 'text': '#222222', 'caret_line': '#f0f0f0',
+              'margin': '#f0f0f0', 'margin_text': '#888888', 'dark': False},
+    'dark': {'paper': '#181a1b', 'text': '#dddddd', 'caret_line': '#232629',
+             'margin': '#232629', 'margin_text': '#777777', 'dark': True},
+    'light blue': {'paper': '#f7fbff', 'text': '#1a3d5c', 'caret_line': '#e6f2fb',
+                   'margin': '#d9ecfa', 'margin_text': '#5a7d9c', 'dark': False},
+}
+# QScintilla styles are numbered 0..127 (above that are built-in styles)
+MAX_STYLE = 128
+
+
+def _lexer_class(language):
+    name = LEXER_CLASSES.get(language)
+    return getattr(Qsci, name, None) if name else None
+
+
+def _sniff(text):
+    """Guess a language from the first bytes of an unrecognised file."""
+    first_line = text.split('\n', 1)[0]
+    match = _SHEBANG.match(first_line)
+    if match:
+        program = os.path.basename(match.group(1))
+        if program == 'env' and match.group(2):
+            program = match.group(2)
+        program = program.rstrip('0123456789.')   # python3.11 -> python
+        return INTERPRETERS.get(program)
+    head = text.lstrip('\ufeff \t\r\n')[:200].lower()
+    if head.startswith('<?xml'):
+        return 'html' if '<html' in head else 'xml'
+    if head.startswith(('<!doctype html', '<html')):
+        return 'html'
+    if head.startswith(('diff --git', '--- ', 'index ')) and '\n+++ ' in text:
+        return 'diff'
+    if head.startswith(('{', '[')):
+        body = text.lstrip('\ufeff \t\r\n')
+        if _JSON_START.match(body):
+            return 'json'
+        try:
+            # Short documents such as [1, 2] are only recognised when they parse
+            json.loads(body)
+        except ValueError:
+            return None
+        return 'json'
+    return None
+
+
+def detect_language(path, sample=None, size_limit_mb=HIGHLIGHT_SIZE_LIMIT_MB):
+    """
+    Return the language for path (a LEXER_CLASSES key) or None for plain text.
+    Checks the file name, then the extension, then a #! line or the content
+    itself. Files over size_limit_mb are always plain text.
+    """
+    if path:
+        try:
+            if os.path.getsize(path) > size_limit_mb * 1024 * 1024:
+                return None
+        except OSError:
+            pass
+        name = os.path.basename(path).lower()
+        language = FILENAMES.get(name) or EXTENSIONS.get(os.path.splitext(name)[1])
+        if language is None and name.startswith('makefile'):
+            language = 'makefile'
+        if language is None and os.path.splitext(name)[1] in PLAIN_EXTENSIONS:
+            return None
+        if language is not None:
+            return language if _lexer_class(language) is not None else None
+    if sample is None and path:
+        try:
+            with open(path, 'rb') as f:
+                sample = f.read(SNIFF_BYTES).decode('utf-8', errors='replace')
+        except OSError:
+            return None
+    language = _sniff(sample[:SNIFF_BYTES]) if sample else None
+    return language if _lexer_class(language) is not None else None
+
+
+def palette(theme):
+    return THEME_PALETTES.get(theme, THEME_PALETTES['light'])
+
+
+class LexerRegistry:
+    """
+    Hands out one configured lexer per (language, theme), shared by every
+    editor showing that language. A theme is applied to a lexer once, when
+    the lexer is created, instead of once per editor.
+    """
+
+    def __init__(self):
+        self.theme = 'light'
+        self._lexers = {}
+
+    def set_theme(self, theme):
+        self.theme = theme
+
+    def lexer(self, language):
+        """Return the shared lexer for language in the current theme, or None for plain text."""
+        cls = _lexer_class(language)
+        if cls is None:
+            return None
+        key = (language, self.theme)
+        lexer = self._lexers.get(key)
+        if lexer is None:
+            lexer = cls()
+            self._configure(lexer, palette(self.theme))
+            self._lexers[key] = lexer
+        return lexer
+
+    @staticmethod
+    def _configure(lexer, colors):
+        paper = QColor(colors['paper'])
+        lexer.setDefaultPaper(paper)
+        lexer.setDefaultColor(QColor(colors['text']))
+        lexer.setPaper(paper, -1)
+        if colors['dark']:
+            # Lexer defaults are tuned for white paper; lift dark colours
+            for style in range(MAX_STYLE):
+                if not lexer.description(style):
+                    continue
+                color = lexer.defaultColor(style)
+                if color.lightness() < 128:
+                    h, s, l, a = color.getHsl()
+                    lexer.setColor(QColor.fromHsl(max(h, 0), s, 255 - l, a), style)
+
+
+# Shared by all editors in the process
+registry = LexerRegistry()
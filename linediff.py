@@ -0,0 +1,80 @@
+import difflib
+
+# Row kinds of a side-by-side diff
+EQUAL, DELETE, INSERT, REPLACE, HUNK = range(5)
+CONTEXT_LINES = 3
+
+
+def split_lines(text):
+    """Split text the way Scintilla and git number lines: on LF, dropping a CR before it."""
+    return [line[:-1] if line.endswith('\r') else line for line in text.split('\n')]
+
+
+def matching_blocks(old_lines, new_lines):
+    """Return (old start, new start, size) runs of identical lines, trimming the common prefix and suffix first."""
+    if old_lines == new_lines:
+        return [(0, 0, len(old_lines))] if old_lines else []
+    head = 0
+    limit = min(len(old_lines), len(new_lines))
+    while head < limit and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    blocks = [(0, 0, head)] if head else []
+    matcher = difflib.SequenceMatcher(None, old_lines[head:len(old_lines) - tail],
+                                      new_lines[head:len(new_lines) - tail], autojunk=False)
+    blocks += [(a + head, b + head, size) for a, b, size in matcher.get_matching_blocks() if size]
+    if tail:
+        blocks.append((len(old_lines) - tail, len(new_lines) - tail, tail))
+    return blocks
+
+
+def opcodes(old_lines, new_lines):
+    """Like SequenceMatcher.get_opcodes(), built from matching_blocks()."""
+    codes = []
+    i = j = 0
+    for a, b, size in matching_blocks(old_lines, new_lines) + [(len(old_lines), len(new_lines), 0)]:
+        if i < a and j < b:
+            codes.append(('replace', i, a, j, b))
+        elif i < a:
+            codes.append(('delete', i, a, j, b))
+        elif j < b:
+            codes.append(('insert', i, a, j, b))
+        if size:
+            codes.append(('equal', a, a + size, b, b + size))
+        i, j = a + size, b + size
+    return codes
+
+
+def side_by_side(old_lines, new_lines, context=CONTEXT_LINES):
+    """
+    Return diff rows (kind, old line no, old text, new line no, new text)
+    with 1-based line numbers (None where a side has no line). Unchanged
+    runs are cut down to `context` lines around each change, and a HUNK row
+    marks each cut.
+    """
+    rows = []
+    codes = opcodes(old_lines, new_lines)
+    for n, (tag, i1, i2, j1, j2) in enumerate(codes):
+        if tag == 'equal':
+            size = i2 - i1
+            lead = min(context, size) if n > 0 else 0
+            trail = min(context, size - lead) if n < len(codes) - 1 else 0
+            rows.extend((EQUAL, i1 + x + 1, old_lines[i1 + x], j1 + x + 1, new_lines[j1 + x]) for x in range(lead))
+            if trail:
+                i, j = i2 - trail, j2 - trail
+                if size > lead + trail:
+                    rows.append((HUNK, None, f"@@ -{i + 1} +{j + 1} @@", None, ''))
+                rows.extend((EQUAL, i + x + 1, old_lines[i + x], j + x + 1, new_lines[j + x]) for x in range(trail))
+        elif tag == 'delete':
+            rows.extend((DELETE, i + 1, old_lines[i], None, '') for i in range(i1, i2))
+        elif tag == 'insert':
+            rows.extend((INSERT, None, '', j + 1, new_lines[j]) for j in range(j1, j2))
+        else:
+            for x in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + x, j1 + x
+                rows.append((REPLACE,
+                             i + 1 if i < i2 else None, old_lines[i] if i < i2 else '',
+                             j + 1 if j < j2 else None, new_lines[j] if j < j2 else ''))
+    return rows
@@ -1,22 +1,51 @@
 import sys
 import os
-import chardet
+import re
+import hashlib
+import json
+from urllib.parse import quote
+
 import git
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QFileDialog, QMessageBox, QStatusBar,
-    QInputDialog, QSplitter, QTreeView, QFileSystemModel, QWidget, QVBoxLayout, QHBoxLayout, QLabel
+    QInputDialog, QSplitter, QTreeView, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QProgressBar, QLineEdit
 )
-from PyQt5 import QtCore
 from PyQt5.QtGui import QPixmap, QFont, QIcon, QColor
 from PyQt5.QtCore import Qt
-from PyQt5.QtCore import QSettings
+from PyQt5.QtCore import QSettings, QFileSystemWatcher, QTimer, QStandardPaths
 from PyQt5.QtWidgets import QMenu 
 
-from tabmanager import TabManager
-from git_integration import GitManager
+from tabmanager import TabManager, MAX_LIVE_TABS, TAB_MEMORY_BUDGET_MB
+from git_integration import GitManager, clone as git_clone_repository
+from git_worker import AsyncGitManager
+from git_status_cache import GitStatusCache
+from filetree import WorkspaceTreeModel
 from recentfiles import RecentFilesManager
 from themes import ThemeManager
+from largefile import is_large_file, LARGE_FILE_THRESHOLD_MB
+from encoding import detect as detect_encoding, read_text
+from fileviewer import is_oversized_file, VIEWER_THRESHOLD_MB
+from findreplace import FindReplaceDialog
+from findinfiles import FindInFilesWorker, FindResultsPanel, compile_pattern
+from trigram_index import TrigramIndexer
+from trigram_query import required_literals
+from symbol_index import SymbolIndexer
+from palette import QuickPalette
+from quickopen import FileListIndexer
+from batchreplace import BatchPreviewWorker, BatchApplyWorker, BatchReplaceDialog, make_replacer
+from lexers import HIGHLIGHT_SIZE_LIMIT_MB
+from editor import Editor, FEATURE_LINE_LIMIT
+from filewatch import OpenFileWatcher
+from savepipeline import SavePipeline, DEFAULT_ENCODING
+from githistory import HistoryLoader, HistoryPanel
+from blame import BlameMargin
+from diffview import DiffView, load_file_diff
+from changemarkers import ChangeMarkers, read_head_lines
+from repopool import pool as repopool
+from recovery import RecoveryJournal
+from gitconsole import GitConsole, ConsoleProgress
 
 
 class CodePlusPlus(QMainWindow):
@@ -68,23 +97,25 @@ class CodePlusPlus(QMainWindow):
         self.setCentralWidget(self.splitter)
 
         # --- File tree view area ---
-        self.file_model = QFileSystemModel()
-        self.file_model.setFilter(
-            QtCore.QDir.AllDirs | QtCore.QDir.Files | QtCore.QDir.NoDotAndDotDot | QtCore.QDir.Hidden
-        )
-        self.file_model.setRootPath('')
-        self.file_model.setRootPath('')  # Set when folder opened
+        # Lazy, ignore-aware tree; the root is set when a folder is opened
+        self.settings = QSettings("codeplusplus", "main")
+        self.file_model = WorkspaceTreeModel()
+        self.file_model.show_hidden = self.settings.value("tree_show_hidden", True, type=bool)
+        self.file_model.show_ignored = self.settings.value("tree_show_ignored", False, type=bool)
+        self.file_model.exclude_globs = tuple(
+            g.strip() for g in self.settings.value("tree_exclude_globs", "", type=str).split(",") if g.strip())
 
         self.file_tree = QTreeView()
         self.file_tree.setModel(self.file_model)
         self.file_tree.setRootIsDecorated(True)
+        self.file_tree.setHeaderHidden(True)
+        self.file_tree.setUniformRowHeights(True)
+        self.file_tree.expanded.connect(self.file_model.on_expanded)
         self.file_tree.hide()  # Hidden by default
 
-        self.settings = QSettings("codeplusplus", "main")
         last_folder = self.settings.value("last_folder", "")
-        if last_folder:
-            self.file_model.setRootPath(last_folder)
-            self.file_tree.setRootIndex(self.file_model.index(last_folder))
+        if last_folder and os.path.isdir(last_folder):
+            self.file_model.set_root(last_folder)
             self.file_tree.show()
             
         self.file_tree.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -107,9 +138,33 @@ class CodePlusPlus(QMainWindow):
         
         # --- Editor tab area ---
         self.tabs = TabManager(self)
+        self.tabs.viewer_threshold_mb = self.settings.value("viewer_threshold_mb", VIEWER_THRESHOLD_MB, type=int)
+        self.tabs.large_file_threshold_mb = self.settings.value("large_file_threshold_mb", LARGE_FILE_THRESHOLD_MB, type=int)
+        self.tabs.highlight_limit_mb = self.settings.value("highlight_size_limit_mb", HIGHLIGHT_SIZE_LIMIT_MB, type=int)
+        self.tabs.feature_line_limit = self.settings.value("feature_line_limit", FEATURE_LINE_LIMIT, type=int)
+        self.tabs.max_live_tabs = self.settings.value("max_live_tabs", MAX_LIVE_TABS, type=int)
+        self.tabs.memory_budget_mb = self.settings.value("tab_memory_budget_mb", TAB_MEMORY_BUDGET_MB, type=int)
+        self.tabs.tab_materialized.connect(self.on_tab_materialized)
         self.splitter.addWidget(self.tabs)
 
         self.git = GitManager()
+        self.git_async = AsyncGitManager(parent=self)
+        self.git_async.task_finished.connect(self.on_git_task_finished)
+        self.git_async.task_cancelled.connect(self.on_git_task_cancelled)
+        self.git_async.active_changed.connect(self.on_git_activity_changed)
+        self._git_result_handlers = {}
+        self._git_cancel_handlers = {}
+
+        # Git status badges for the file tree; .git is watched so commits,
+        # checkouts and staging invalidate the cache
+        self.git_status_cache = None
+        self.file_model.on_dirty = self.refresh_git_status
+        self.git_dir_watcher = QFileSystemWatcher(self)
+        self._git_dir_timer = QTimer(self)
+        self._git_dir_timer.setSingleShot(True)
+        self._git_dir_timer.setInterval(300)
+        self._git_dir_timer.timeout.connect(self.on_git_dir_changed)
+        self.git_dir_watcher.directoryChanged.connect(lambda _: self._git_dir_timer.start())
         self.recent_files = RecentFilesManager(self)
         self.theme = ThemeManager(
             window=self,
@@ -120,9 +175,79 @@ class CodePlusPlus(QMainWindow):
         self.statusbar = QStatusBar()
         self.setStatusBar(self.statusbar)
 
+        # Progress indicator for background file loads
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(150)
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        self.statusbar.addPermanentWidget(self.load_progress)
+
+        # Busy indicator for background git operations
+        self.git_progress = QProgressBar()
+        self.git_progress.setMaximumWidth(150)
+        self.git_progress.setRange(0, 0)
+        self.git_progress.setTextVisible(False)
+        self.git_progress.hide()
+        self.statusbar.addPermanentWidget(self.git_progress)
+
+        # Find in files: dialog, streamed results panel and the running search
+        self.find_dialog = None
+        self.find_worker = None
+        self.find_results = FindResultsPanel(self)
+        self.find_results.open_requested.connect(self.open_file_at)
+        self.find_results.cancel_requested.connect(self.cancel_find_in_files)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.find_results)
+        self.find_results.hide()
+        self.batch_worker = None
+
+        # Per-folder trigram index used to narrow find-in-files
+        self.search_indexer = None
+        self.symbol_indexer = None
+        self.symbol_palette = None
+        self.file_list = None
+        self.quick_open_palette = None
+        self.file_model.paths_changed.connect(self.on_workspace_paths_changed)
+
+        # Reload open files changed on disk by git or other programs
+        self.file_watcher = OpenFileWatcher(self)
+        self.file_watcher.file_changed.connect(self.on_open_file_changed)
+        self.file_watcher.file_deleted.connect(
+            lambda path: self.show_status(f"{path} was deleted on disk", 5000))
+        self.tabs.open_files_changed.connect(self.sync_file_watcher)
+        # Added/modified/deleted line markers against HEAD
+        self.tabs.open_files_changed.connect(self.sync_change_markers)
+
+        # Saves are encoded and written atomically on background workers
+        self.save_pipeline = SavePipeline(parent=self)
+        self.save_pipeline.saved.connect(self.on_file_saved)
+        self.save_pipeline.failed.connect(self.on_file_save_failed)
+
+        # Commit history browser, filled in the background
+        self.history_loader = None
+        self.history_panel = HistoryPanel(self)
+        self.history_panel.commit_activated.connect(
+            lambda sha: self.run_git_async('show_commit', sha, title=f"Commit {sha[:10]}"))
+        self.history_panel.path_filter_requested.connect(self.filter_history_by_path)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.history_panel)
+        self.history_panel.hide()
+
+        # Streamed output of pull/push/fetch/clone
+        self.git_console = GitConsole(self)
+        self.git_console.cancel_requested.connect(self.cancel_git_console)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.git_console)
+        self.git_console.hide()
+        self._console_tasks = set()
+
+        # Unsaved edits are journaled in the background so a crash loses nothing
+        self.recovery = RecoveryJournal(os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), 'recovery'), self)
+        self.tabs.open_files_changed.connect(self.sync_recovery)
+
         self._create_menu()
         self._setup_shortcuts()
         self.theme.apply_theme('light')
+        self.restore_session()
+        self.offer_recovery()
 
     def get_all_editor_widgets(self):
         # Assumes self.tabs.tab_widgets is a list of editor widgets,
@@ -143,6 +268,7 @@ class CodePlusPlus(QMainWindow):
         file_menu.addAction(self._make_action("New", self.file_new, "Ctrl+N"))
         #Open File and Folder Sub-menu
         file_menu.addAction(self._make_action("Open...", self.file_open, "Ctrl+O"))
+        file_menu.addAction(self._make_action("Go to File...", self.file_quick_open, "Ctrl+P"))
         open_file_action = QAction("Open File...", self)
         open_file_action.triggered.connect(self.file_open_file)
         open_folder_action = QAction("Open Folder...", self)
@@ -154,6 +280,7 @@ class CodePlusPlus(QMainWindow):
         file_menu.addAction(close_folder_action)       
         file_menu.addAction(self._make_action("Save", self.file_save, "Ctrl+S"))
         file_menu.addAction(self._make_action("Save As...", self.file_saveas, "Ctrl+Shift+S"))
+        file_menu.addAction(self._make_action("Save All", self.file_save_all, "Ctrl+Alt+S"))
         file_menu.addAction(self._make_action("Close", self.file_close, "Ctrl+W"))
         file_menu.addSeparator()
         file_menu.addAction(self._make_action("Exit", self.close, "Ctrl+Q"))
@@ -172,14 +299,23 @@ class CodePlusPlus(QMainWindow):
         search_menu = menubar.addMenu("Search")
         search_menu.addAction(self._make_action("Find", self.search_find, "Ctrl+F"))
         search_menu.addAction(self._make_action("Replace", self.search_replace, "Ctrl+H"))
+        search_menu.addAction(self._make_action("Go to Line...", self.search_goto_line, "Ctrl+G"))
+        search_menu.addAction(self._make_action("Go to Symbol in Workspace...", self.search_goto_symbol, "Ctrl+T"))
+        search_menu.addAction(self._make_action("Find in Files...", self.search_find_in_files, "Ctrl+Shift+F"))
+        search_menu.addAction(self._make_action("Replace in Files...", self.search_replace_in_files, "Ctrl+Shift+H"))
 
         # View
         view_menu = menubar.addMenu("View")
         self.show_hidden_files_action = QAction("Show Hidden Files", self)
         self.show_hidden_files_action.setCheckable(True)
-        self.show_hidden_files_action.setChecked(True)  # Default: show hidden files
+        self.show_hidden_files_action.setChecked(self.file_model.show_hidden)
         self.show_hidden_files_action.triggered.connect(self.toggle_hidden_files)
         view_menu.addAction(self.show_hidden_files_action)
+        self.show_ignored_files_action = QAction("Show Ignored Files", self)
+        self.show_ignored_files_action.setCheckable(True)
+        self.show_ignored_files_action.setChecked(self.file_model.show_ignored)
+        self.show_ignored_files_action.triggered.connect(self.toggle_ignored_files)
+        view_menu.addAction(self.show_ignored_files_action)
         view_menu.addAction(self._make_action("Toggle Line Numbers", self.view_toggle_line_numbers))
         view_menu.addAction(self._make_action("Toggle Word Wrap", self.view_toggle_word_wrap))
 
@@ -191,6 +327,7 @@ class CodePlusPlus(QMainWindow):
         git_menu.addAction(self._make_action("Push", self.git_push))
         git_menu.addAction(self._make_action("Pull", self.git_pull))
         git_menu.addAction(self._make_action("Log", self.git_log))
+        git_menu.addAction(self._make_action("Cancel Running Operations", self.git_cancel_operations))
         
         # --- Advanced Git Submenu ---
         advanced_menu = git_menu.addMenu("Advanced")
@@ -292,7 +429,7 @@ class CodePlusPlus(QMainWindow):
                 elif ret == QMessageBox.Cancel:
                     break  # Stop closing further tabs
             # Close the tab
-            self.tabs.removeTab(i)
+            self.tabs.close_tab(i)
 
     def update_status_bar(self):
         label = self.ensure_status_encoding_label()
@@ -300,33 +437,14 @@ class CodePlusPlus(QMainWindow):
         if not editor or not hasattr(editor, "file_path") or not editor.file_path:
             label.setText("UTF-8 | CRLF")
             return
-        # Guess encoding
-        try:
-            with open(editor.file_path, "rb") as f:
-                raw = f.read(4096)
-                result = chardet.detect(raw)
-                encoding = result.get("encoding", "UTF-8")
-        except Exception:
-            encoding = "UTF-8"
-        # Detect line endings
-        line_ending = "CRLF"  # default
-        try:
-            with open(editor.file_path, "rb") as f:
-                data = f.read(4096)
-                if b"\r\n" in data:
-                    line_ending = "CRLF"
-                elif b"\n" in data:
-                    line_ending = "LF"
-                elif b"\r" in data:
-                    line_ending = "CR"
-        except Exception:
-            line_ending = "CRLF"
-        label.setText(f"{encoding} | {line_ending}")
+        info = getattr(editor, "file_encoding", None) or detect_encoding(editor.file_path)
+        label.setText(f"{info.label} | {info.eol}")
 
         
     def file_new(self):
         self.tabs.new_tab()
         editor = self.current_editor()  # or self.tabs.current_editor()
+        editor.set_file_encoding(DEFAULT_ENCODING)
         self.theme.apply_editor_colors(editor, self.theme.current_theme)
         self.show_status("New file created.")
         self.update_status_bar()
@@ -334,16 +452,7 @@ class CodePlusPlus(QMainWindow):
     def file_open(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open File")
         if path:
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                editor = self.tabs.new_tab(filename=os.path.basename(path), text=text)
-                editor.file_path = path
-                self.recent_files.add_file(path)
-                self.show_status(f"Opened {path}")
-                self.theme.apply_editor_colors(editor, self.theme.current_theme)
-            except Exception as e:
-                QMessageBox.critical(self, "Open Error", str(e))
+            self.open_file_in_tab(path)
 
     def file_open_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open File")
@@ -358,9 +467,12 @@ class CodePlusPlus(QMainWindow):
                 self.close_tabs_for_folder(self.workspace_folder)
             self.workspace_folder = folder
             self.git = GitManager(folder)
+            self.attach_git_status()
+            self.start_search_index(folder)
+            self.stop_history()
+            self.history_panel.hide()
             self.settings.setValue("last_folder", folder)
-            self.file_model.setRootPath(folder)
-            self.file_tree.setRootIndex(self.file_model.index(folder))
+            self.file_model.set_root(folder)
             self.file_tree.show()
             self.show_status(f"Opened folder: {folder}")
 
@@ -372,68 +484,275 @@ class CodePlusPlus(QMainWindow):
             self.theme.apply_editor_colors(editor, self.theme.current_theme)
 
     def open_file_in_tab(self, path):
+        if is_oversized_file(path, self.tabs.viewer_threshold_mb):
+            return self.open_viewer_tab(path)
+        threshold = self.settings.value("large_file_threshold_mb", LARGE_FILE_THRESHOLD_MB, type=int)
+        if is_large_file(path, threshold):
+            return self.open_large_file_in_tab(path)
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            editor = self.tabs.new_tab(filename=os.path.basename(path), text=text)
+            text, info = read_text(path)
+            editor = self.tabs.new_tab(filename=os.path.basename(path), text=text,
+                                       language=self.tabs.detect_language(path, text))
             editor.file_path = path
+            editor.set_file_encoding(info)
             self.recent_files.add_file(path)
             self.theme.apply_editor_colors(editor, self.theme.current_theme)
-            self.show_status(f"Opened {path}")
+            self.show_status(f"Opened {path}" if not info.lossy else
+                             f"Opened {path}; some bytes are not valid {info.label} and were replaced", 5000)
             self.update_status_bar()
         except Exception as e:
             QMessageBox.critical(self, "Open Error", str(e))
 
+    def open_large_file_in_tab(self, path):
+        info = detect_encoding(path)
+        editor, loader = self.tabs.new_large_tab(path, encoding=info.stream_codec())
+        editor.set_file_encoding(info)
+        self.recent_files.add_file(path)
+        self.theme.apply_editor_colors(editor, self.theme.current_theme)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        loader.progress.connect(self.load_progress.setValue)
+        loader.finished_loading.connect(lambda: self.on_large_file_loaded(path, loader.lossy))
+        loader.failed.connect(lambda err: self.on_large_file_failed(path, err))
+        self.show_status(f"Loading {path}...")
+        self.update_status_bar()
+
+    def open_viewer_tab(self, path):
+        try:
+            viewer = self.tabs.new_tab(path=path)
+        except Exception as e:
+            QMessageBox.critical(self, "Open Error", str(e))
+            return
+        viewer.status_message.connect(self.show_status)
+        self.recent_files.add_file(path)
+        self.show_status(f"Opened {path} read-only (file is too large to edit)")
+        self.update_status_bar()
+
+    def on_tab_materialized(self, widget):
+        """A lazily restored tab was just loaded from disk."""
+        self.theme.apply_editor_colors(widget, self.theme.current_theme)
+        if hasattr(widget, "status_message"):
+            widget.status_message.connect(self.show_status)
+        loader = getattr(widget, "loader", None)
+        if loader is not None:
+            path = widget.file_path
+            self.load_progress.setValue(0)
+            self.load_progress.show()
+            loader.progress.connect(self.load_progress.setValue)
+            loader.finished_loading.connect(lambda: self.on_large_file_loaded(path, loader.lossy))
+            loader.failed.connect(lambda err: self.on_large_file_failed(path, err))
+        self.update_status_bar()
+
+    def save_session(self):
+        tabs, current = self.tabs.session_state()
+        self.settings.setValue("session/tabs", json.dumps(tabs))
+        self.settings.setValue("session/current", current)
+
+    def restore_session(self):
+        if not self.settings.value("restore_session", True, type=bool):
+            return
+        try:
+            tabs = json.loads(self.settings.value("session/tabs", "[]"))
+        except ValueError:
+            return
+        self.tabs.restore_session(tabs, self.settings.value("session/current", 0, type=int))
+
+    def on_large_file_loaded(self, path, lossy=False):
+        self.load_progress.hide()
+        self.show_status(f"Opened {path}" if not lossy else
+                         f"Opened {path}; some bytes could not be decoded and were replaced", 5000)
+
+    def on_large_file_failed(self, path, error):
+        self.load_progress.hide()
+        QMessageBox.critical(self, "Open Error",
+                             f"{path}: {error}\n\nThe tab shows only part of the file and is read-only.")
+
     def file_close_folder(self):
         if self.workspace_folder:
             self.close_tabs_for_folder(self.workspace_folder)
             self.workspace_folder = None
             self.git = None
+            self.attach_git_status()
+            self.stop_search_index()
+            self.stop_history()
+            self.history_panel.start()
+            self.history_panel.hide()
         self.file_tree.hide()
-        self.file_model.setRootPath('')
+        self.file_model.set_root(None)
         self.show_status("Closed folder.")
 
-    import re
-
-    def normalize_crlf(self, text):
-        # First, replace all CRLF with LF for a clean slate
-        text = text.replace('\r\n', '\n')
-        # Then, replace all LF with CRLF
-        text = text.replace('\n', '\r\n')
-        return text
-
-    def file_save(self,editor):
+    def _check_savable(self, editor):
+        if getattr(editor, 'loader', None) is not None:
+            self.show_status("File is still loading; try again when it finishes.")
+            return False
+        if editor.isReadOnly():
+            self.show_status("This tab is read-only.")
+            return False
+        info = getattr(editor, 'file_encoding', None)
+        if info is not None and info.lossy:
+            answer = QMessageBox.question(
+                self, "Save",
+                f"Some bytes of this file are not valid {info.label} and were replaced when it was opened. "
+                "Saving will overwrite them. Save anyway?")
+            return answer == QMessageBox.Yes
+        return True
+
+    def file_save(self, editor=None):
+        # Triggered actions pass a `checked` flag rather than an editor
+        if not isinstance(editor, QWidget):
             editor = self.current_editor()
-            if not editor:
-                return
-            path = getattr(editor, 'file_path', None)
-            if not path:
-                return self.file_saveas()
-            try:
-                text = editor.text()
-                text = self.normalize_crlf(text)  # <-- use self.normalize_crlf
-                with open(path, 'w', encoding='utf-8', newline='') as f:
-                    f.write(text)
-                self.show_status(f"Saved {path}")
-                self.update_status_bar()
-            except Exception as e:
-                QMessageBox.critical(self, "Save Error", str(e))
+        if not editor or not self._check_savable(editor):
+            return
+        path = getattr(editor, 'file_path', None)
+        if not path:
+            return self.file_saveas()
+        self.save_pipeline.save(editor)
+        self.show_status(f"Saving {path}...")
 
     def file_saveas(self):
         editor = self.current_editor()
-        if not editor:
+        if not editor or not self._check_savable(editor):
             return
         path, _ = QFileDialog.getSaveFileName(self, "Save File As")
         if path:
+            self.save_pipeline.save(editor, path)
+            self.show_status(f"Saving {path}...")
+
+    def file_save_all(self):
+        editors = [e for e in self.get_all_editor_widgets()
+                   if getattr(e, 'file_path', None) and hasattr(e, 'isModified')
+                   and e.isModified() and not e.isReadOnly()]
+        # Files with replaced bytes are only saved after asking, one at a time
+        lossy = [e for e in editors if getattr(getattr(e, 'file_encoding', None), 'lossy', False)]
+        count = self.save_pipeline.save_all([e for e in editors if e not in lossy])
+        message = f"Saving {count} files..." if count else "No unsaved files."
+        if lossy:
+            message += f" Skipped {len(lossy)} with undecodable bytes; save them individually."
+        self.show_status(message, 5000)
+
+    def on_file_saved(self, editor, path):
+        self.on_workspace_paths_changed([path])
+        index = self.tabs.indexOf(editor)
+        if index != -1 and getattr(editor, 'file_path', None) != path:
+            # Finished a Save As: the tab now refers to the new file
+            editor.file_path = path
+            self.tabs.setTabText(index, os.path.basename(path))
+            if hasattr(editor, "set_language"):
+                editor.set_language(self.tabs.detect_language(path))
+            self.recent_files.add_file(path)
+            self.sync_file_watcher()
+            self.sync_change_markers()
+        if isinstance(editor, Editor) and editor.isModified():
+            # Edited while saving: the saved file is no longer the journal's base
+            self.recovery.rebase(editor)
+        # Our own write is not an external change
+        self.file_watcher.mark_current(path)
+        self.show_status(f"Saved {path}")
+        self.update_status_bar()
+
+    def on_file_save_failed(self, editor, path, error):
+        QMessageBox.critical(self, "Save Error", f"{path}: {error}")
+
+    def sync_file_watcher(self):
+        self.file_watcher.set_paths(self.tabs.live_file_paths())
+
+    def sync_change_markers(self, reload=False):
+        """Give every loaded file tab change markers, fetching HEAD where the file or repo changed."""
+        if not self.git or not self.git.is_repo():
+            return
+        for i in range(self.tabs.count()):
+            editor = self.tabs.widget(i)
+            if not isinstance(editor, Editor) or not getattr(editor, 'file_path', None) or editor.is_loading():
+                continue
+            markers = getattr(editor, 'change_markers', None)
+            if markers is None:
+                markers = editor.change_markers = ChangeMarkers(editor)
+            if reload or markers.path != editor.file_path or markers.git is not self.git:
+                markers.path, markers.git = editor.file_path, self.git
+                self.load_change_markers(editor)
+
+    def sync_recovery(self):
+        editors = [w for w in map(self.tabs.widget, range(self.tabs.count())) if isinstance(w, Editor)]
+        for editor in editors:
+            self.recovery.track(editor)
+        self.recovery.retain(editors)
+
+    def offer_recovery(self):
+        """Offer to reopen buffers left unsaved by a previous run, then drop their journals."""
+        entries = self.recovery.recoverable()
+        if not entries:
+            return
+        usable = [(header['path'], text) for _, header, text in entries if text is not None]
+        lost = len(entries) - len(usable)
+        if usable:
+            names = '\n'.join(path or 'Untitled' for path, _ in usable)
+            message = f"Unsaved changes from a previous session were found:\n\n{names}\n\nRestore them?"
+            if lost:
+                message += f"\n\n{lost} other buffer(s) cannot be restored because their files changed on disk."
+            if QMessageBox.question(self, "Recover Unsaved Changes", message) == QMessageBox.Yes:
+                for path, text in usable:
+                    self.restore_buffer(path, text)
+        else:
+            QMessageBox.warning(self, "Recover Unsaved Changes",
+                                f"{lost} unsaved buffer(s) from a previous session cannot be restored "
+                                "because their files changed on disk.")
+        self.recovery.discard_files([journal for journal, _, _ in entries])
+
+    def restore_buffer(self, path, text):
+        editor = None
+        if path and os.path.isfile(path):
+            self.open_or_focus_file(path)
+            editor = self.current_editor()
+        if not isinstance(editor, Editor) or editor.is_loading() or getattr(editor, 'file_path', None) != path:
+            name = os.path.basename(path) if path else 'Untitled'
+            editor = self.tabs.new_tab(filename=f"{name} (recovered)")
+        editor.reload_text(text, saved=False)
+        # Journal the restored text at once; the old journal is about to go
+        self.recovery.track(editor)
+        self.recovery.rebase(editor)
+
+    def load_change_markers(self, editor):
+        info = editor.file_encoding
+        encoding = (info.encoding, info.bom) if info is not None else ('utf-8', b'')
+        # Unchanged HEAD blobs are recognised by sha and not read again
+        task_id = self.git_async.submit_call(read_head_lines, self.git, editor.file_path, encoding,
+                                             editor.change_markers.head_sha, label="Change markers", quiet=True)
+
+        def apply(result):
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(editor.text())
-                editor.file_path = path
-                self.tabs.setTabText(self.tabs.currentIndex(), os.path.basename(path))
-                self.recent_files.add_file(path)
-                self.show_status(f"Saved as {path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Save As Error", str(e))
+                if isinstance(result, tuple):
+                    editor.change_markers.set_head(*result)
+            except RuntimeError:
+                pass   # The tab was closed meanwhile
+        self._git_result_handlers[task_id] = apply
+
+    def on_open_file_changed(self, path):
+        """Reload an unmodified tab in place when its file changes on disk."""
+        idx = self.tabs.find_tab(path)
+        editor = self.tabs.widget(idx) if idx >= 0 else None
+        if editor is None or not hasattr(editor, "reload_text"):
+            return
+        name = os.path.basename(path)
+        if editor.isModified() or editor.is_loading() or editor.is_replacing():
+            self.recovery.rebase(editor)
+            self.show_status(f"{name} changed on disk; this tab has unsaved changes", 5000)
+            return
+        if is_large_file(path, self.tabs.large_file_threshold_mb) or is_oversized_file(path, self.tabs.viewer_threshold_mb):
+            self.show_status(f"{name} changed on disk; reopen it to see the changes", 5000)
+            return
+        try:
+            text, info = read_text(path)
+        except OSError as e:
+            self.show_status(f"Could not reload {name}: {e}", 5000)
+            return
+        editor.reload_text(text)
+        editor.set_file_encoding(info)
+        if getattr(editor, 'blame_margin', None) is not None:
+            editor.blame_margin.refresh()
+        self.file_watcher.mark_current(path)
+        self.show_status(f"Reloaded {name}")
+        if editor is self.current_editor():
+            self.update_status_bar()
 
     def on_tree_context_menu(self, point):
         index = self.file_tree.indexAt(point)
@@ -506,38 +825,38 @@ class CodePlusPlus(QMainWindow):
     def file_close(self):
         idx = self.tabs.currentIndex()
         if idx >= 0:
-            self.tabs.removeTab(idx)
+            self.tabs.close_tab(idx)
             self.show_status("Tab closed.")
 
     # --- Edit Menu Actions ---
     def edit_undo(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "undo"):
             editor.undo()
 
     def edit_redo(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "redo"):
             editor.redo()
 
     def edit_cut(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "cut"):
             editor.cut()
 
     def edit_copy(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "copy"):
             editor.copy()
 
     def edit_paste(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "paste"):
             editor.paste()
 
     def edit_selectall(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "selectAll"):
             editor.selectAll()
 
     # --- Search Menu Actions ---
@@ -551,29 +870,295 @@ class CodePlusPlus(QMainWindow):
 
     def search_replace(self):
         editor = self.current_editor()
-        if not editor:
+        if not editor or editor.isReadOnly():
             return
         find_text, ok = QInputDialog.getText(self, "Replace", "Find:")
         if ok and find_text:
             replace_text, ok2 = QInputDialog.getText(self, "Replace", "Replace with:")
             if ok2:
-                # QScintilla does not have direct replace all, so a simple implementation:
-                content = editor.text()
-                new_content = content.replace(find_text, replace_text)
-                editor.setText(new_content)
-                self.show_status(f"Replaced all '{find_text}' with '{replace_text}'")
+                self.replace_all_in_editor(editor, find_text, replace_text, case_sensitive=True)
+
+    def replace_all_in_editor(self, editor, find_text, replace_text, regex=False,
+                              case_sensitive=False, whole_word=False):
+        if not hasattr(editor, "replace_all") or editor.isReadOnly():
+            return
+        def done(count):
+            editor.replace_finished.disconnect(done)
+            editor.replace_progress.disconnect(progress)
+            self.show_status(f"Replaced {count} occurrence(s) of '{find_text}' with '{replace_text}'")
+        def progress(count):
+            self.statusbar.showMessage(f"Replacing... {count} so far")
+        editor.replace_finished.connect(done)
+        editor.replace_progress.connect(progress)
+        if not editor.replace_all(find_text, replace_text, regex, case_sensitive, whole_word):
+            editor.replace_finished.disconnect(done)
+            editor.replace_progress.disconnect(progress)
+
+    def replace_from_dialog(self):
+        editor = self.current_editor()
+        text, regex, case, word = self.find_dialog.options()
+        if editor and text:
+            self.replace_all_in_editor(editor, text, self.find_dialog.replace_input.text(),
+                                       regex, case, word)
+
+    def show_find_dialog(self):
+        if self.find_dialog is None:
+            self.find_dialog = FindReplaceDialog(self)
+            self.find_dialog.find_requested.connect(self.find_from_dialog)
+            self.find_dialog.replace_requested.connect(self.replace_from_dialog)
+            self.find_dialog.find_in_files_requested.connect(self.start_find_in_files)
+            self.find_dialog.replace_in_files_requested.connect(self.start_replace_in_files)
+        self.find_dialog.show()
+        self.find_dialog.raise_()
+        self.find_dialog.find_input.setFocus()
+        return self.find_dialog
+
+    def find_from_dialog(self):
+        editor = self.current_editor()
+        text, regex, case, word = self.find_dialog.options()
+        if editor and text:
+            editor.findFirst(text, regex, case, word, True)
+
+    def search_find_in_files(self):
+        if not self.workspace_folder:
+            QMessageBox.warning(self, "Find in Files", "Open a folder first.")
+            return
+        self.show_find_dialog()
+
+    def start_find_in_files(self):
+        if not self.workspace_folder:
+            QMessageBox.warning(self, "Find in Files", "Open a folder first.")
+            return
+        text, regex, case, word = self.find_dialog.options()
+        if not text:
+            return
+        try:
+            pattern = compile_pattern(text, regex, case, word)
+        except re.error as e:
+            QMessageBox.warning(self, "Find in Files", f"Invalid regular expression: {e}")
+            return
+        self.cancel_find_in_files()
+        self.find_results.start(self.workspace_folder, text)
+        candidates = None
+        if self.search_indexer is not None:
+            candidates = self.search_indexer.index.candidates(required_literals(text, regex))
+        worker = FindInFilesWorker(self.workspace_folder, pattern, candidates=candidates, parent=self)
+        worker.results_ready.connect(self.find_results.add_results)
+        worker.progress.connect(self.find_results.update_progress)
+        worker.finished_search.connect(self.find_results.finish)
+        self.find_worker = worker
+        worker.start()
+
+    def cancel_find_in_files(self):
+        if self.find_worker is not None and self.find_worker.isRunning():
+            self.find_worker.cancel()
+            self.find_worker.wait()
+
+    def search_replace_in_files(self):
+        if not self.workspace_folder:
+            QMessageBox.warning(self, "Replace in Files", "Open a folder first.")
+            return
+        if self.find_dialog is None or not self.find_dialog.options()[0]:
+            # Nothing to search for yet: the dialog's Replace in Files button starts it
+            self.show_find_dialog()
+            return
+        self.start_replace_in_files()
+
+    def start_replace_in_files(self):
+        if not self.workspace_folder:
+            QMessageBox.warning(self, "Replace in Files", "Open a folder first.")
+            return
+        text, regex, case, word = self.find_dialog.options()
+        if not text:
+            return
+        try:
+            pattern = compile_pattern(text, regex, case, word)
+        except re.error as e:
+            QMessageBox.warning(self, "Replace in Files", f"Invalid regular expression: {e}")
+            return
+        replacement = self.find_dialog.replace_input.text()
+        replacer = make_replacer(replacement, regex)
+        candidates = None
+        if self.search_indexer is not None:
+            candidates = self.search_indexer.index.candidates(required_literals(text, regex))
+        dialog = BatchReplaceDialog(self.workspace_folder, text, replacement, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        worker = BatchPreviewWorker(self.workspace_folder, pattern, replacer, candidates=candidates, parent=self)
+        worker.finished.connect(worker.deleteLater)
+        worker.file_previewed.connect(dialog.add_preview)
+        worker.finished_preview.connect(dialog.preview_finished)
+        dialog.cancel_requested.connect(worker.cancel)
+        dialog.apply_requested.connect(lambda previews: self.apply_batch_replace(previews, pattern, replacer))
+        worker.start()
+        dialog.open()
+
+    def apply_batch_replace(self, previews, pattern, replacer):
+        """Write accepted previews to disk; open tabs are edited in place, not reloaded."""
+        to_write = []
+        for preview in previews:
+            idx = self.tabs.find_tab(preview['path'])
+            editor = self.tabs.widget(idx) if idx >= 0 else None
+            if editor is not None and editor.isModified():
+                # Unsaved edits win: change the buffer only and leave saving to the user
+                if hasattr(editor, "apply_line_replacements"):
+                    editor.apply_line_replacements(pattern, replacer)
+            else:
+                to_write.append(preview)
+        if not to_write:
+            return
+        worker = BatchApplyWorker(to_write, pattern, replacer, parent=self)
+        worker.file_written.connect(lambda preview: self.on_batch_file_written(preview, pattern, replacer))
+        worker.file_failed.connect(lambda path, error: self.show_status(f"Could not update {path}: {error}", 5000))
+        worker.finished_apply.connect(self.on_batch_replace_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.batch_worker = worker
+        self.statusbar.showMessage(f"Replacing in {len(to_write)} files...")
+        worker.start()
+
+    def on_batch_file_written(self, preview, pattern, replacer):
+        idx = self.tabs.find_tab(preview['path'])
+        editor = self.tabs.widget(idx) if idx >= 0 else None
+        if editor is not None and hasattr(editor, "apply_line_replacements") and not editor.isModified():
+            editor.apply_line_replacements(pattern, replacer, preview['lines'])
+            editor.setModified(False)
+            # The tab already matches the new file; do not offer to reload it
+            self.file_watcher.mark_current(preview['path'])
+        self.on_workspace_paths_changed([preview['path']])
+
+    def on_batch_replace_finished(self, written, failed):
+        message = f"Replace in files: {written} files updated"
+        if failed:
+            message += f", {failed} skipped"
+        self.show_status(message, 5000)
+        self.batch_worker = None
+
+    def _workspace_cache_path(self, kind, folder):
+        cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        key = hashlib.sha1(os.path.normpath(folder).encode('utf-8')).hexdigest()
+        return os.path.join(cache_dir, kind, key + ".idx")
+
+    def start_search_index(self, folder):
+        """Start the trigram, symbol and quick-open indexers for folder."""
+        self.stop_search_index()
+        self.search_indexer = TrigramIndexer(folder, self._workspace_cache_path("search-index", folder), parent=self)
+        self.search_indexer.status.connect(self.show_status)
+        self.search_indexer.start()
+        self.symbol_indexer = SymbolIndexer(folder, self._workspace_cache_path("symbols", folder), parent=self)
+        self.symbol_indexer.status.connect(self.show_status)
+        self.symbol_indexer.start()
+        self.file_list = FileListIndexer(folder, self._workspace_cache_path("file-list", folder), parent=self)
+        self.file_list.start()
+
+    def stop_search_index(self):
+        if self.search_indexer is not None:
+            self.search_indexer.stop()
+            self.search_indexer = None
+        if self.symbol_indexer is not None:
+            self.symbol_indexer.stop()
+            self.symbol_indexer = None
+        if self.file_list is not None:
+            self.file_list.stop()
+            self.file_list = None
+
+    def on_workspace_paths_changed(self, paths):
+        if self.search_indexer is not None:
+            self.search_indexer.update_paths(paths)
+        if self.symbol_indexer is not None:
+            self.symbol_indexer.update_paths(paths)
+        if self.file_list is not None:
+            self.file_list.update_paths(paths)
+
+    def search_goto_symbol(self):
+        if self.symbol_indexer is None:
+            self.show_status("Open a folder to search its symbols.")
+            return
+        if self.symbol_palette is None:
+            self.symbol_palette = QuickPalette("Go to Symbol in Workspace", self._symbol_rows,
+                                               "Symbol name", parent=self)
+            self.symbol_palette.chosen.connect(lambda target: self.open_file_at(*target))
+        self.symbol_palette.popup()
+
+    def file_quick_open(self):
+        if self.file_list is None:
+            self.show_status("Open a folder to quick-open its files.")
+            return
+        if self.quick_open_palette is None:
+            self.quick_open_palette = QuickPalette("Go to File", self._file_rows, "File name", parent=self)
+            self.quick_open_palette.chosen.connect(self.open_or_focus_file)
+        self.quick_open_palette.popup()
+
+    def _file_rows(self, query, limit, cancel_event=None):
+        file_list = self.file_list
+        if file_list is None:
+            return []
+        found = file_list.search(query, limit, cancel_event)
+        if found is None:
+            return None
+        return [(os.path.basename(rel), os.path.dirname(rel), os.path.join(file_list.root, rel)) for rel in found]
+
+    def open_or_focus_file(self, path):
+        idx = self.tabs.find_tab(path)
+        if idx >= 0:
+            self.tabs.setCurrentIndex(idx)
+        else:
+            self.open_file_in_tab(path)
+
+    def _symbol_rows(self, query, limit, cancel_event=None):
+        indexer = self.symbol_indexer
+        if indexer is None:
+            return []
+        index = indexer.index
+        found = index.search(query, limit, cancel_event)
+        if found is None:
+            return None
+        rows = []
+        for symbol in found:
+            where = f"{os.path.relpath(symbol.path, index.root)}:{symbol.line}"
+            owner = f"{symbol.container}." if symbol.container else ""
+            rows.append((symbol.name, f"{symbol.kind} {owner}{symbol.name} - {where}", (symbol.path, symbol.line)))
+        return rows
+
+    def open_file_at(self, path, line, column=0):
+        """Open (or switch to) path and put the cursor at the 1-based line."""
+        idx = self.tabs.find_tab(path)
+        if idx >= 0:
+            self.tabs.setCurrentIndex(idx)
+        else:
+            self.open_file_in_tab(path)
+        editor = self.current_editor()
+        if editor is None or getattr(editor, 'file_path', None) != path:
+            return
+        if hasattr(editor, "goto_line"):
+            editor.goto_line(line)
+        else:
+            editor.setCursorPosition(line - 1, column)
+            editor.ensureLineVisible(line - 1)
+            editor.setFocus()
+
+    def search_goto_line(self):
+        editor = self.current_editor()
+        if not editor:
+            return
+        line, ok = QInputDialog.getInt(self, "Go to Line", "Line number:", 1, 1, 2**31 - 1)
+        if not ok:
+            return
+        if hasattr(editor, "goto_line"):
+            editor.goto_line(line)
+        else:
+            editor.setCursorPosition(line - 1, 0)
+            editor.ensureLineVisible(line - 1)
 
     # --- View Menu Actions ---
     def view_toggle_line_numbers(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "marginLineNumbers"):
             show = not editor.marginLineNumbers(1)
             editor.setMarginLineNumbers(1, show)
             self.show_status("Toggled line numbers.")
 
     def view_toggle_word_wrap(self):
         editor = self.current_editor()
-        if editor:
+        if editor and hasattr(editor, "wrapMode"):
             # QScintilla uses wrapMode() and setWrapMode()
             from PyQt5.Qsci import QsciScintilla
             current = editor.wrapMode() != QsciScintilla.WrapNone
@@ -582,21 +1167,108 @@ class CodePlusPlus(QMainWindow):
             self.show_status("Toggled word wrap.")
 
     def toggle_hidden_files(self):
+        # Applied to the already-listed entries; nothing is re-read from disk
         show_hidden = self.show_hidden_files_action.isChecked()
-        filter_flags = (
-            QtCore.QDir.AllDirs |
-            QtCore.QDir.Files |
-            QtCore.QDir.NoDotAndDotDot
-        )
-        if show_hidden:
-            filter_flags |= QtCore.QDir.Hidden
-        self.file_model.setFilter(filter_flags)
-        # Refresh view by resetting root path (to force update)
-        root_path = self.file_model.rootPath()
-        self.file_model.setRootPath("")
-        self.file_model.setRootPath(root_path)
+        self.file_model.set_show_hidden(show_hidden)
+        self.settings.setValue("tree_show_hidden", show_hidden)
+
+    def toggle_ignored_files(self):
+        show_ignored = self.show_ignored_files_action.isChecked()
+        self.file_model.set_show_ignored(show_ignored)
+        self.settings.setValue("tree_show_ignored", show_ignored)
 
     # --- Git Menu Actions ---
+    def run_git_async(self, method, *args, title, on_result=None):
+        """Run a GitManager method in the background and show its result when done."""
+        task_id = self.git_async.submit(self.git, method, *args, label=title)
+        if on_result is None:
+            on_result = lambda out: QMessageBox.information(self, title, str(out))
+        self._git_result_handlers[task_id] = on_result
+        return task_id
+
+    def on_git_task_finished(self, task_id, label, result):
+        self._git_cancel_handlers.pop(task_id, None)
+        handler = self._git_result_handlers.pop(task_id, None)
+        if handler:
+            handler(result)
+
+    def run_git_streamed(self, fn, *args, title, secrets=()):
+        """
+        Run a long git command (pull, push, fetch, clone) with its output
+        streamed to the console dock; secrets are masked in everything shown.
+        """
+        self.git_console.begin(title, secrets)
+        task_id = self.git_async.submit_call(fn, *args, label=title,
+                                             on_output=self.git_console.write,
+                                             progress=ConsoleProgress(self.git_console))
+        self._console_tasks.add(task_id)
+
+        def done(result):
+            self._console_tasks.discard(task_id)
+            result = self.git_console.redact(str(result)) if result else result
+            self.git_console.finish(result)
+            self.show_status(result.splitlines()[0] if result else title, 5000)
+        self._git_result_handlers[task_id] = done
+        return task_id
+
+    def cancel_git_console(self):
+        for task_id in list(self._console_tasks):
+            self.git_async.cancel(task_id)
+
+    def on_git_task_cancelled(self, task_id, label):
+        self._git_result_handlers.pop(task_id, None)
+        handler = self._git_cancel_handlers.pop(task_id, None)
+        if handler:
+            handler()
+        if task_id in self._console_tasks:
+            self._console_tasks.discard(task_id)
+            self.git_console.finish(f"{label} cancelled.")
+        # Background housekeeping (status scans, diffs, markers) is cancelled silently
+        if not self.git_async.is_quiet(task_id):
+            self.show_status(f"{label} cancelled.")
+
+    def on_git_activity_changed(self, active):
+        if active:
+            self.git_progress.show()
+            self.statusbar.showMessage("Running: " + ", ".join(self.git_async.active_labels()))
+        else:
+            self.git_progress.hide()
+            self.statusbar.clearMessage()
+
+    def attach_git_status(self):
+        """Start tracking git status badges for the current workspace."""
+        watched = self.git_dir_watcher.directories()
+        if watched:
+            self.git_dir_watcher.removePaths(watched)
+        if self.git and self.git.is_repo():
+            self.git_status_cache = GitStatusCache(self.git)
+            self.git_dir_watcher.addPath(self.git_status_cache.git_dir)
+        else:
+            self.git_status_cache = None
+        self.file_model.set_status_cache(self.git_status_cache)
+        self.refresh_git_status()
+
+    def refresh_git_status(self, paths=None):
+        """Rescan git status for paths (or the whole tree) in the background."""
+        cache = self.git_status_cache
+        if cache is None:
+            return
+        task_id = self.git_async.submit_call(cache.scan, paths, label="Git status", quiet=True)
+        self._git_result_handlers[task_id] = lambda result: self.apply_git_status(cache, result)
+
+    def apply_git_status(self, cache, result):
+        if cache is self.git_status_cache:
+            self.file_model.refresh_badges(cache.apply(result))
+
+    def on_git_dir_changed(self):
+        if self.git_status_cache is not None and self.git_status_cache.is_stale():
+            self.refresh_git_status()
+            self.refresh_blame_margins()
+            self.sync_change_markers(reload=True)
+
+    def git_cancel_operations(self):
+        self.git_async.cancel_all()
+
     def get_workspace_repo(self):
         folder = getattr(self, 'workspace_folder', None)
         if not folder:
@@ -607,8 +1279,7 @@ class CodePlusPlus(QMainWindow):
             QMessageBox.warning(self, "Not a Git Repo", "This folder is not a git repository.")
             return None
         try:
-            from git import Repo
-            return Repo(folder)
+            return repopool.handle(folder).repo
         except Exception as e:
             QMessageBox.critical(self, "Git Error", str(e))
             return None
@@ -634,25 +1305,21 @@ class CodePlusPlus(QMainWindow):
                 return
 
         # Prepare authenticated URL if needed
+        secrets = ()
         if username and password:
             # Insert credentials into the URL (for HTTPS)
-            import re
-            repo_url = re.sub(r"^(https://)", r"\1{}:{}@".format(username, password), repo_url)
+            user, token = quote(username, safe=''), quote(password, safe='')
+            repo_url = re.sub(r"^(https://)", lambda m: f"{m.group(1)}{user}:{token}@", repo_url)
+            secrets = (password, token)
 
-        # Perform the clone
-        try:
-            from git import Repo
-            Repo.clone_from(repo_url, dest_dir)
-            QMessageBox.information(self, "Git Clone", "Repository cloned successfully to:\n" + dest_dir)
-        except Exception as e:
-            QMessageBox.critical(self, "Git Clone Error", str(e))
+        # Clone in the background with output in the console; keep the password out of it
+        self.run_git_streamed(git_clone_repository, repo_url, dest_dir, title="Git Clone", secrets=secrets)
             
     def git_status(self):
         if not self.git:
             self.show_status("No workspace or not a git repo.")
             return
-        status = self.git.status()
-        self.show_status(status)
+        self.run_git_async('status', title="Git Status", on_result=self.show_status)
 
     def git_commit(self):
         if not self.git:
@@ -667,22 +1334,59 @@ class CodePlusPlus(QMainWindow):
         if not self.git:
             QMessageBox.warning(self, "Git Push", "No workspace or not a git repo.")
             return
-        out = self.git.push()
-        QMessageBox.information(self, "Git Push", str(out))
+        self.run_git_streamed(self.git.push, title="Git Push")
 
     def git_pull(self):
         if not self.git:
             QMessageBox.warning(self, "Git Pull", "No workspace or not a git repo.")
             return
-        out = self.git.pull()
-        QMessageBox.information(self, "Git Pull", str(out))
+        self.run_git_streamed(self.git.pull, title="Git Pull")
 
     def git_log(self):
         if not self.git:
             QMessageBox.warning(self, "Git Log", "No workspace or not a git repo.")
             return
-        out = self.git.log()
-        QMessageBox.information(self, "Git Log", str(out))
+        self.history_panel.show()
+        self.history_panel.raise_()
+        loader = self.history_loader
+        # Reload for another repo, or once a finished load is behind a new HEAD
+        if loader is None or loader.git is not self.git or (loader.isFinished() and loader.head != self.git.head_sha()):
+            self.load_history()
+
+    def load_history(self):
+        """(Re)load the history panel for the current repo, from cache when HEAD is unchanged."""
+        self.stop_history()
+        self.history_panel.start()
+        folder = self.git.repo.working_tree_dir if self.git.repo else self.workspace_folder
+        self.history_loader = HistoryLoader(self.git, self._workspace_cache_path("git-history", folder), parent=self)
+        self.history_loader.batch_ready.connect(self.on_history_batch)
+        self.history_loader.finished_loading.connect(self.on_history_finished)
+        self.history_loader.start()
+
+    def stop_history(self):
+        if self.history_loader is not None:
+            self.history_loader.cancel()
+            self.history_loader.wait()
+            self.history_loader.deleteLater()
+            self.history_loader = None
+
+    # Signals a replaced loader queued before it stopped are dropped
+    def on_history_batch(self, commits):
+        if self.history_loader is not None and self.sender() is self.history_loader:
+            self.history_panel.add_commits(commits)
+
+    def on_history_finished(self, cancelled):
+        if self.history_loader is not None and self.sender() is self.history_loader:
+            self.history_panel.finish(cancelled)
+
+    def filter_history_by_path(self, path):
+        if not path:
+            self.history_panel.set_path_commits(None)
+            return
+        if not self.git:
+            return
+        task_id = self.git_async.submit_call(self.git.commits_touching, path, label="History filter")
+        self._git_result_handlers[task_id] = self.history_panel.set_path_commits
 
     def git_branch_list(self):
         if not self.git:
@@ -715,8 +1419,45 @@ class CodePlusPlus(QMainWindow):
             return
         a, ok_a = QInputDialog.getText(self, "Diff", "Enter first commit/branch (leave blank for working dir):")
         b, ok_b = QInputDialog.getText(self, "Diff", "Enter second commit/branch (optional):")
-        out = self.git.diff(a if ok_a and a else None, b if ok_b and b else None)
-        QMessageBox.information(self, "Git Diff", str(out))
+        a = a if ok_a and a else None
+        b = b if ok_b and b else None
+        title = f"{a}..{b}" if a and b else (f"{a}..working tree" if a else "Working tree")
+        task_id = self.git_async.submit_call(self.git.diff_files, a, b, label="Git diff")
+        self._git_result_handlers[task_id] = lambda changes: self.show_diff_tab(title, changes)
+
+    def show_diff_tab(self, title, changes):
+        """Open a diff tab listing changes; file diffs are computed as files are expanded."""
+        if isinstance(changes, str):
+            QMessageBox.warning(self, "Git Diff", changes)
+            return
+        if not changes:
+            QMessageBox.information(self, "Git Diff", "No differences.")
+            return
+        git_manager = self.git
+        view = DiffView(title, changes, self)
+        view.rows_requested.connect(lambda row: self.load_diff_rows(view, git_manager, row))
+        root = git_manager.repo.working_tree_dir
+        view.open_requested.connect(lambda path, line: self.open_file_at(os.path.join(root, path), line))
+        self.tabs.setCurrentIndex(self.tabs.addTab(view, f"Diff: {title}"))
+
+    def load_diff_rows(self, view, git_manager, row):
+        change = view.model.changes[row]
+        task_id = self.git_async.submit_call(load_file_diff, git_manager, change,
+                                             label=f"Diff {change.new_path}", quiet=True)
+
+        def apply(rows):
+            try:
+                view.set_rows(row, rows)
+            except RuntimeError:
+                pass   # The tab was closed meanwhile
+
+        def cancelled():
+            try:
+                view.reset_rows(row)
+            except RuntimeError:
+                pass
+        self._git_result_handlers[task_id] = apply
+        self._git_cancel_handlers[task_id] = cancelled
 
     def git_add(self):
         if not self.git:
@@ -782,20 +1523,37 @@ class CodePlusPlus(QMainWindow):
         QMessageBox.information(self, "Last Commit", str(out))
 
     def git_blame(self):
-        if not self.git:
+        """Toggle the blame margin of the current file."""
+        if not self.git or not self.git.is_repo():
             QMessageBox.warning(self, "Git Blame", "No workspace or not a git repo.")
             return
-        file_path, ok = QInputDialog.getText(self, "Git Blame", "Enter file path to blame:")
-        if ok and file_path:
-            out = self.git.blame(file_path)
-            QMessageBox.information(self, "Git Blame", str(out))
+        editor = self.current_editor()
+        if not isinstance(editor, Editor) or not getattr(editor, 'file_path', None) or editor.is_loading():
+            QMessageBox.warning(self, "Git Blame", "Open a file from the repository to blame it.")
+            return
+        margin = getattr(editor, 'blame_margin', None)
+        if margin is not None:
+            margin.detach()
+            editor.blame_margin = None
+            return
+        margin = BlameMargin(editor, self.git)
+        margin.commit_clicked.connect(lambda sha: self.run_git_async('show_commit', sha, title=f"Commit {sha[:10]}"))
+        editor.blame_margin = margin
+        margin.refresh()
+
+    def refresh_blame_margins(self):
+        """Recompute open blame margins, e.g. after HEAD moved; unchanged blobs come from the cache."""
+        for editor in self.get_all_editor_widgets():
+            margin = getattr(editor, 'blame_margin', None)
+            if margin is not None:
+                margin.git = self.git
+                margin.refresh()
 
     def git_fetch(self):
         if not self.git:
             QMessageBox.warning(self, "Git Fetch", "No workspace or not a git repo.")
             return
-        out = self.git.fetch()
-        QMessageBox.information(self, "Git Fetch", str(out))
+        self.run_git_streamed(self.git.fetch, title="Git Fetch")
 
     def git_cherry_pick(self):
         if not self.git:
@@ -824,6 +1582,7 @@ class CodePlusPlus(QMainWindow):
                 QMessageBox.warning(self, "Init Repo", "No workspace folder selected.")
                 return
         out = self.git.init()
+        self.attach_git_status()
         QMessageBox.information(self, "Init Repo", str(out))
 
     def git_set_remote(self):
@@ -850,6 +1609,22 @@ class CodePlusPlus(QMainWindow):
         out = self.git.current_branch()
         QMessageBox.information(self, "Current Branch", str(out))
 
+    def closeEvent(self, event):
+        self.save_session()
+        self.cancel_find_in_files()
+        if self.batch_worker is not None:
+            self.batch_worker.wait()
+        self.save_pipeline.wait()
+        self.recovery.close()
+        for palette in (self.symbol_palette, self.quick_open_palette):
+            if palette is not None:
+                palette.shutdown()
+        self.stop_search_index()
+        self.stop_history()
+        self.git_async.shutdown()
+        repopool.close_all()
+        super().closeEvent(event)
+
     # --- Settings Menu Actions ---
     def settings_preferences(self):
         QMessageBox.information(self, "Preferences", "Preferences dialog would appear here.")
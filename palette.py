@@ -0,0 +1,150 @@
+import threading
+
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+
+# Rows shown per query
+PALETTE_ROWS = 50
+
+
+class PaletteSearch(QThread):
+    """
+    Runs a palette's search_fn off the UI thread. Only the newest query is
+    answered: a new request cancels the one in progress, and requests that
+    arrive while it runs replace each other.
+    """
+    results_ready = pyqtSignal(int, list)   # generation, rows
+
+    def __init__(self, search_fn, parent=None):
+        super().__init__(parent)
+        self.search_fn = search_fn
+        self._lock = threading.Lock()
+        self._request = None
+        self._wake = threading.Event()
+        self._cancel = threading.Event()
+        self._stopping = False
+
+    def request(self, generation, query, limit):
+        with self._lock:
+            self._request = (generation, query, limit)
+            self._cancel.set()
+            self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._cancel.set()
+            self._wake.set()
+        self.wait()
+
+    def run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if self._stopping:
+                    return
+                request, self._request = self._request, None
+                self._wake.clear()
+                self._cancel.clear()
+            if request is None:
+                continue
+            generation, query, limit = request
+            rows = self.search_fn(query, limit, self._cancel)
+            if rows is not None and not self._cancel.is_set():
+                self.results_ready.emit(generation, rows)
+
+
+class QuickPalette(QDialog):
+    """
+    Type-to-filter popup used for go-to-symbol and quick-open.
+    search_fn(query, limit, cancel_event) returns a list of (label, detail,
+    payload), or None if cancelled; it runs on a PaletteSearch thread, so
+    typing never waits for it. The payload of the accepted row is emitted
+    through `chosen`.
+    """
+    chosen = pyqtSignal(object)
+
+    def __init__(self, title, search_fn, placeholder='', parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.search_fn = search_fn
+        self.resize(600, 400)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.title = QLabel(title)
+        layout.addWidget(self.title)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText(placeholder)
+        layout.addWidget(self.input)
+        self.list = QListWidget()
+        self.list.setUniformItemSizes(True)
+        layout.addWidget(self.list)
+        # Coalesce fast typing into one query per event-loop turn
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.refresh)
+        self.input.textChanged.connect(self._timer.start)
+        self.input.returnPressed.connect(self._accept_current)
+        self.list.itemActivated.connect(self._accept_item)
+        self.input.installEventFilter(self)
+        self._generation = 0
+        self._shown = 0          # generation the list currently shows
+        self._accept_pending = False
+        self.searcher = PaletteSearch(search_fn, self)
+        self.searcher.results_ready.connect(self._show_results)
+        self.searcher.start()
+
+    def popup(self):
+        parent = self.parentWidget()
+        if parent is not None:
+            geometry = parent.geometry()
+            self.move(geometry.x() + (geometry.width() - self.width()) // 2, geometry.y() + 80)
+        self.input.selectAll()
+        self._accept_pending = False
+        self.refresh()
+        self.show()
+        self.input.setFocus()
+
+    def refresh(self):
+        self._generation += 1
+        self.searcher.request(self._generation, self.input.text(), PALETTE_ROWS)
+
+    def shutdown(self):
+        self.searcher.stop()
+
+    def _show_results(self, generation, rows):
+        if generation != self._generation:
+            return   # An older query; a newer one is on its way
+        self._shown = generation
+        self.list.clear()
+        for label, detail, payload in rows:
+            item = QListWidgetItem(f"{label}    {detail}" if detail else label)
+            item.setData(Qt.UserRole, payload)
+            self.list.addItem(item)
+        if self.list.count():
+            self.list.setCurrentRow(0)
+        if self._accept_pending:
+            self._accept_pending = False
+            self._accept_current()
+
+    def eventFilter(self, obj, event):
+        # Arrow keys in the input move the selection in the list
+        if obj is self.input and event.type() == event.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            step = -1 if event.key() == Qt.Key_Up else 1
+            row = min(max(self.list.currentRow() + step, 0), self.list.count() - 1)
+            self.list.setCurrentRow(row)
+            return True
+        return super().eventFilter(obj, event)
+
+    def _accept_current(self):
+        if self._shown != self._generation or self._timer.isActive():
+            # Enter was pressed before the list caught up with the input
+            self._accept_pending = True
+            return
+        item = self.list.currentItem()
+        if item is not None:
+            self._accept_item(item)
+
+    def _accept_item(self, item):
+        self.hide()
+        self.chosen.emit(item.data(Qt.UserRole))
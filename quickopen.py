@@ -0,0 +1,145 @@
+import os
+import pickle
+import queue
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from fileio import atomic_open
+from fuzzy import FuzzyMatcher
+from ignore import IgnoreMatcher
+
+CACHE_VERSION = 1
+
+
+class FileListIndexer(QThread):
+    """
+    Keeps the list of workspace files for quick-open. The list is loaded from
+    cache first so the palette works at once, then re-crawled, and kept fresh
+    from file-system change events. The fuzzy matcher is rebuilt on this
+    thread and swapped in, so queries never wait for it.
+    """
+    status = pyqtSignal(str)
+    ready = pyqtSignal()
+
+    def __init__(self, root, cache_path, parent=None):
+        super().__init__(parent)
+        self.root = os.path.normpath(root)
+        self.cache_path = cache_path
+        self.files = set()   # paths relative to root
+        self.matcher = FuzzyMatcher([])
+        self._jobs = queue.Queue()
+        self._stop = threading.Event()
+        self._dirty = False
+
+    def update_paths(self, paths):
+        """Queue paths (files or folders) whose contents may have changed."""
+        self._jobs.put(list(paths))
+
+    def stop(self):
+        self._stop.set()
+        self._jobs.put(None)
+        self.wait()
+
+    def search(self, query, limit=50, cancel_event=None):
+        """Return up to limit relative paths, best match first; None if cancelled."""
+        return self.matcher.search(query, limit, cancel_event)
+
+    def run(self):
+        if self._load():
+            self._rebuild()
+        self._crawl()
+        while not self._stop.is_set():
+            try:
+                batch = self._jobs.get(timeout=5)
+            except queue.Empty:
+                if self._dirty:
+                    self._save()
+                continue
+            if batch is None:
+                break
+            # Fold queued bursts of events into one rebuild
+            paths = list(batch)
+            while True:
+                try:
+                    more = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    self._stop.set()
+                    break
+                paths += more
+            self._update(paths)
+        if self._dirty:
+            self._save()
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.root)
+
+    def _prefix(self, rel):
+        # Everything is under the root itself
+        return '' if rel == os.curdir else rel + os.sep
+
+    def _crawl(self):
+        files = {self._rel(p) for p in IgnoreMatcher(self.root).walk_files(self._stop)}
+        if self._stop.is_set():
+            return
+        if files != self.files:
+            self.files = files
+            self._dirty = True
+            self._rebuild()
+        self._save()
+        self.status.emit(f"Quick open ready ({len(files)} files)")
+        self.ready.emit()
+
+    def _update(self, paths):
+        matcher = IgnoreMatcher(self.root)
+        changed = False
+        for path in paths:
+            path = os.path.normpath(path)
+            rel = self._rel(path)
+            if os.path.isdir(path):
+                prefix = self._prefix(rel)
+                under = {self._rel(p) for p in matcher.walk_files(self._stop, start=path)}
+                old = {f for f in self.files if f.startswith(prefix)}
+                if under != old:
+                    self.files -= old
+                    self.files |= under
+                    changed = True
+            elif os.path.isfile(path) and not matcher.is_ignored(path, False):
+                if rel not in self.files:
+                    self.files.add(rel)
+                    changed = True
+            else:
+                prefix = self._prefix(rel)
+                gone = {f for f in self.files if f == rel or f.startswith(prefix)}
+                if gone:
+                    self.files -= gone
+                    changed = True
+        if changed:
+            self._dirty = True
+            self._rebuild()
+
+    def _rebuild(self):
+        self.matcher = FuzzyMatcher(sorted(self.files), name=os.path.basename)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        if state.get('version') != CACHE_VERSION or state.get('root') != self.root:
+            return False
+        self.files = set(state['files'])
+        return True
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with atomic_open(self.cache_path, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'root': self.root, 'files': sorted(self.files)},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._dirty = False
+        except OSError as e:
+            self.status.emit(f"Could not save file list: {e}")
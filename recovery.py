@@ -0,0 +1,380 @@
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+
+from PyQt5.Qsci import QsciScintilla
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from encoding import read_text
+from fileio import atomic_open, file_signature
+
+JOURNAL_SUFFIX = '.journal'
+# How often pending edits are handed to the writer
+FLUSH_MS = 2000
+# Journal writes are throttled to this rate, with a small burst allowance
+WRITE_RATE = 4 * 1024 * 1024
+WRITE_BURST = 512 * 1024
+# A journal is compacted once its deltas outgrow half its base (at least this much)
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+def _apply_delta(data, edits):
+    for position, deleted, inserted in edits:
+        if deleted:
+            del data[position:position + deleted]
+        if inserted:
+            data[position:position] = inserted
+
+
+def _base_bytes(header):
+    """The buffer a journal's deltas start from, as UTF-8, or None if it can no longer be rebuilt."""
+    if header['base'] == 'snapshot':
+        return bytearray()
+    if header['base'] == 'empty':
+        data = bytearray()
+    else:
+        if file_signature(header['path']) != header['signature']:
+            return None
+        try:
+            data = bytearray(read_text(header['path'])[0].encode('utf-8'))
+        except OSError:
+            return None
+    return data if len(data) == header['length'] else None
+
+
+def replay(path):
+    """
+    Rebuild the buffer recorded in a journal. Returns (header, UTF-8 bytes),
+    or None if the journal is unreadable or its base file changed. A torn
+    record at the end (from a crash mid-write) is ignored.
+    """
+    header = data = None
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    kind, value = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError):
+                    break
+                if kind == 'header':
+                    header, data = value, _base_bytes(value)
+                    if data is None:
+                        return None
+                elif data is None:
+                    return None
+                elif kind == 'snapshot':
+                    data = bytearray(value)
+                elif kind == 'delta':
+                    _apply_delta(data, value)
+    except OSError:
+        return None
+    return (header, bytes(data)) if header is not None else None
+
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; assume its owner is gone
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class JournalWriter(QThread):
+    """
+    Appends journal records on a background thread. Writes are throttled to
+    WRITE_RATE, and a journal whose deltas have outgrown its base is
+    compacted by replaying it into a single snapshot.
+    """
+    snapshot_needed = pyqtSignal(str)   # journal path whose base changed on disk
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = queue.Queue()
+        self._stopping = threading.Event()
+        self._allowance = WRITE_BURST
+        self._last = time.monotonic()
+        self._base_size = {}   # journal path -> bytes in its base
+        self._written = {}     # journal path -> delta bytes since the base was written
+
+    def submit(self, path, records, fresh=False):
+        """Queue records for path; fresh starts the journal over."""
+        self._jobs.put((path, records, fresh))
+
+    def discard(self, path):
+        self._jobs.put((path, None, False))
+
+    def stop(self):
+        """Write what is queued without throttling, then end the thread."""
+        self._stopping.set()
+        self._jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            path, records, fresh = job
+            try:
+                if records is None:
+                    self._remove(path)
+                else:
+                    self._append(path, records, fresh)
+            except OSError:
+                pass   # Recovery is best effort; the next flush tries again
+
+    def _remove(self, path):
+        self._base_size.pop(path, None)
+        self._written.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, path, records, fresh):
+        encoded = []
+        for kind, value in records:
+            if kind == 'header':
+                self._base_size[path] = value['length'] or 0
+                self._written[path] = 0
+            elif kind == 'snapshot':
+                value = value.encode('utf-8')
+                self._base_size[path] = len(value)
+            encoded.append(pickle.dumps((kind, value), pickle.HIGHEST_PROTOCOL))
+        data = b''.join(encoded)
+        self._throttle(len(data))
+        with open(path, 'wb' if fresh else 'ab') as f:
+            f.write(data)
+        if not fresh:
+            self._written[path] = self._written.get(path, 0) + len(data)
+            if self._written[path] > max(COMPACT_MIN_BYTES, self._base_size.get(path, 0) // 2):
+                self._compact(path)
+
+    def _compact(self, path):
+        state = replay(path)
+        self._written[path] = 0
+        if state is None:
+            # The file it was based on changed; only the editor has the text now
+            self.snapshot_needed.emit(path)
+            return
+        header, text = state
+        header = dict(header, base='snapshot', signature=None, length=None)
+        data = (pickle.dumps(('header', header), pickle.HIGHEST_PROTOCOL)
+                + pickle.dumps(('snapshot', text), pickle.HIGHEST_PROTOCOL))
+        self._throttle(len(data))
+        with atomic_open(path, 'wb') as f:
+            f.write(data)
+        self._base_size[path] = len(text)
+
+    def _throttle(self, size):
+        now = time.monotonic()
+        self._allowance = min(WRITE_BURST, self._allowance + (now - self._last) * WRITE_RATE)
+        self._last = now
+        self._allowance -= size
+        if self._allowance < 0:
+            # Returns early when stopping, so closing the editor is never held up
+            self._stopping.wait(-self._allowance / WRITE_RATE)
+
+
+class _Buffer:
+    __slots__ = ('editor', 'path', 'active', 'written', 'header', 'snapshot', 'pending')
+
+    def __init__(self, editor, path):
+        self.editor = editor
+        self.path = path
+        self.active = False    # journaling edits since the buffer left its save point
+        self.written = False   # the journal file may exist
+        self.header = None
+        self.snapshot = None
+        self.pending = []      # (byte position, bytes deleted, bytes inserted)
+
+
+class RecoveryJournal(QObject):
+    """
+    Crash-recovery journal for modified editor buffers. Each edit is kept in
+    memory as a small (position, deleted, inserted) delta, with typing runs
+    merged; a timer hands the batches to a JournalWriter, so keystrokes
+    never touch the disk. A journal starts from the saved file (checked by
+    signature and length on restore) and holds a full copy of the text only
+    when that file is gone or has changed underneath the buffer.
+    """
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._buffers = {}   # journal id -> _Buffer
+        self._closed = False
+        self.writer = JournalWriter(self)
+        self.writer.snapshot_needed.connect(self._on_snapshot_needed)
+        self.writer.start()
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    # --- Recovery ---
+    def recoverable(self):
+        """
+        Replay journals left behind by editors that are no longer running.
+        Returns (journal path, header, text) entries; text is None where the
+        journal could not be rebuilt.
+        """
+        entries = []
+        try:
+            names = sorted(os.listdir(self.folder))
+        except OSError:
+            return entries
+        for name in names:
+            pid = name.split('-', 1)[0]
+            if not name.endswith(JOURNAL_SUFFIX) or not pid.isdigit() or _process_alive(int(pid)):
+                continue
+            path = os.path.join(self.folder, name)
+            state = replay(path)
+            if state is None:
+                entries.append((path, None, None))
+            else:
+                header, data = state
+                entries.append((path, header, data.decode('utf-8', errors='replace')))
+        return entries
+
+    def discard_files(self, paths):
+        for path in paths:
+            self.writer.discard(path)
+
+    # --- Tracking editors ---
+    def track(self, editor):
+        """Start journaling editor's edits (once per editor)."""
+        if self._closed or getattr(editor, 'journal_id', None) in self._buffers:
+            return
+        journal_id = editor.journal_id = uuid.uuid4().hex
+        buf = self._buffers[journal_id] = _Buffer(
+            editor, os.path.join(self.folder, f"{os.getpid()}-{journal_id}{JOURNAL_SUFFIX}"))
+        editor.SCN_MODIFIED.connect(lambda *args: self._on_modified(buf, *args))
+        editor.modificationChanged.connect(lambda modified: modified or self._stop(buf))
+
+    def retain(self, editors):
+        """Drop the journals of tracked editors that are not in editors (their tabs were closed)."""
+        keep = {getattr(editor, 'journal_id', None) for editor in editors}
+        for journal_id in [j for j in self._buffers if j not in keep]:
+            buf = self._buffers.pop(journal_id)
+            self._stop(buf)
+            buf.editor = None
+
+    def rebase(self, editor):
+        """
+        Restart editor's journal from a copy of its text. Needed when the
+        file the journal is based on changes while the buffer is modified.
+        """
+        buf = self._buffers.get(getattr(editor, 'journal_id', None))
+        if buf is None or not editor.isModified():
+            return
+        buf.header = {'path': getattr(editor, 'file_path', None), 'base': 'snapshot',
+                      'signature': None, 'length': None, 'time': time.time()}
+        buf.snapshot = editor.text()
+        buf.pending = []
+        buf.active = True
+
+    def _on_modified(self, buf, position, mtype, text, length, *args):
+        editor = buf.editor
+        if editor is None or not mtype & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        inserting = mtype & QsciScintilla.SC_MOD_INSERTTEXT
+        if not buf.active:
+            # Loading and other non-undoable changes leave the save point alone
+            if not editor.isModified():
+                return
+            self._start(buf, editor.length() + (-length if inserting else length))
+            if buf.snapshot is not None:
+                return
+        pending = buf.pending
+        last = pending[-1] if pending else None
+        if inserting:
+            data = editor.text(position, position + length).encode('utf-8')
+            if last is not None and not last[1] and last[0] + len(last[2]) == position:
+                pending[-1] = (last[0], 0, last[2] + data)
+            else:
+                pending.append((position, 0, data))
+        elif last is not None and not last[2] and position + length == last[0]:
+            pending[-1] = (position, last[1] + length, b'')   # Backspace
+        elif last is not None and not last[2] and position == last[0]:
+            pending[-1] = (position, last[1] + length, b'')   # Delete
+        else:
+            pending.append((position, length, b''))
+
+    def _start(self, buf, base_length):
+        """Begin a journal based on the saved file, which the buffer matched before this edit."""
+        path = getattr(buf.editor, 'file_path', None)
+        signature = file_signature(path) if path else None
+        if path and signature is None:
+            # The saved file is gone; only a copy of the text will do
+            self.rebase(buf.editor)
+            return
+        buf.header = {'path': path, 'base': 'disk' if path else 'empty',
+                      'signature': signature, 'length': base_length, 'time': time.time()}
+        buf.snapshot = None
+        buf.pending = []
+        buf.active = True
+
+    def _stop(self, buf):
+        buf.active = False
+        buf.header = buf.snapshot = None
+        buf.pending = []
+        if buf.written:
+            buf.written = False
+            self.writer.discard(buf.path)
+
+    def _on_snapshot_needed(self, path):
+        for buf in self._buffers.values():
+            if buf.path == path and buf.active:
+                self.rebase(buf.editor)
+
+    # --- Writing ---
+    def flush(self):
+        """Hand every buffer's pending edits to the writer."""
+        for journal_id, buf in list(self._buffers.items()):
+            if not buf.active:
+                continue
+            try:
+                if not buf.editor.isModified():
+                    self._stop(buf)
+                    continue
+            except RuntimeError:
+                # The editor was deleted without its tab being reported closed
+                del self._buffers[journal_id]
+                self._stop(buf)
+                continue
+            records = []
+            if buf.header is not None:
+                records.append(('header', buf.header))
+            if buf.snapshot is not None:
+                records.append(('snapshot', buf.snapshot))
+            if buf.pending:
+                records.append(('delta', buf.pending))
+            if records:
+                self.writer.submit(buf.path, records, fresh=buf.header is not None)
+                buf.written = True
+                buf.header = buf.snapshot = None
+                buf.pending = []
+
+    def close(self):
+        """Write out pending edits and stop. Journals of modified buffers are kept for the next start."""
+        if self._closed:
+            return
+        self._timer.stop()
+        self.flush()
+        self._closed = True
+        self.writer.stop()
+        for buf in self._buffers.values():
+            buf.editor = None
+        self._buffers.clear()
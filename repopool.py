@@ -0,0 +1,129 @@
+import os
+import subprocess
+import threading
+
+import git
+
+# Keep Windows from flashing a console for each helper process
+_CREATION_FLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+class CatFile:
+    """
+    A long-lived `git cat-file --batch` (or `--batch-check`) process.
+    Requests are serialized, so one process serves every worker thread;
+    it is started on first use and restarted if it dies.
+    """
+
+    def __init__(self, root, check=False):
+        self.root = root
+        self.check = check
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def query(self, rev):
+        """Return (sha, type, size, data) for rev, with data None in check mode; None if rev is missing."""
+        if '\n' in rev:
+            return None
+        with self._lock:
+            for _ in range(2):
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                try:
+                    return self._query(rev)
+                except (OSError, ValueError):
+                    self._stop()
+            return None
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+    def _start(self):
+        mode = '--batch-check' if self.check else '--batch'
+        self._proc = subprocess.Popen(['git', 'cat-file', mode], cwd=self.root,
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL, creationflags=_CREATION_FLAGS)
+
+    def _stop(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+    def _query(self, rev):
+        proc = self._proc
+        proc.stdin.write(rev.encode('utf-8') + b'\n')
+        proc.stdin.flush()
+        header = proc.stdout.readline()
+        if not header:
+            raise OSError("git cat-file exited")
+        if header.endswith((b' missing\n', b' ambiguous\n')):
+            return None
+        sha, kind, size = header.split()
+        size = int(size)
+        data = None
+        if not self.check:
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)   # Trailing newline
+        return sha.decode('ascii'), kind.decode('ascii'), size, data
+
+
+class RepoHandle:
+    """A shared git.Repo plus its object-reading cat-file processes."""
+
+    def __init__(self, repo):
+        self.repo = repo
+        root = repo.working_tree_dir or repo.git_dir
+        self.objects = CatFile(root)
+        self.object_info = CatFile(root, check=True)
+
+    def close(self):
+        self.objects.close()
+        self.object_info.close()
+        self.repo.close()
+
+
+class RepoPool:
+    """One RepoHandle per repository folder, shared by every GitManager for it."""
+
+    def __init__(self):
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def handle(self, path):
+        """Return the handle for the repository at path, opening it on first use. Raises like git.Repo()."""
+        key = self._key(path)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = RepoHandle(git.Repo(path))
+            return handle
+
+    def add(self, path, repo):
+        """Register a newly created repo (e.g. from git init) for path and return its handle."""
+        with self._lock:
+            old = self._handles.pop(self._key(path), None)
+            handle = self._handles[self._key(path)] = RepoHandle(repo)
+        if old is not None:
+            old.close()
+        return handle
+
+    def close_all(self):
+        with self._lock:
+            handles, self._handles = list(self._handles.values()), {}
+        for handle in handles:
+            handle.close()
+
+
+pool = RepoPool()
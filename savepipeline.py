@@ -0,0 +1,128 @@
+import codecs
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from encoding import EOL_CHARS, DEFAULT_EOL, FileEncoding
+from fileio import atomic_open
+
+# Text is encoded and written in slices of this many characters
+WRITE_CHUNK_CHARS = 1024 * 1024
+DEFAULT_ENCODING = FileEncoding('utf-8', 'UTF-8', DEFAULT_EOL, b'')
+
+
+def convert_line_endings(text, eol):
+    """Return text with every line break as `eol` ('CRLF', 'LF' or 'CR')."""
+    target = EOL_CHARS[eol]
+    crlf = text.count('\r\n')
+    lf = text.count('\n') - crlf
+    cr = text.count('\r') - crlf
+    # Already uniform: no copy needed
+    if (eol == 'CRLF' and not lf and not cr) or (eol == 'LF' and not crlf and not cr) \
+            or (eol == 'CR' and not crlf and not lf):
+        return text
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text if target == '\n' else text.replace('\n', target)
+
+
+def write_text(path, text, info):
+    """Convert, encode and atomically write text to path using FileEncoding info."""
+    text = convert_line_endings(text, info.eol)
+    encoder = codecs.getincrementalencoder(info.encoding.replace('-sig', ''))()
+    with atomic_open(path, 'wb') as f:
+        if info.bom:
+            f.write(info.bom)
+        for start in range(0, len(text), WRITE_CHUNK_CHARS):
+            f.write(encoder.encode(text[start:start + WRITE_CHUNK_CHARS]))
+        f.write(encoder.encode('', final=True))
+
+
+class _SaveSignals(QObject):
+    done = pyqtSignal(object, str)   # SaveJob, error message ('' on success)
+
+
+class SaveJob(QRunnable):
+    def __init__(self, editor, path, text, info, revision):
+        super().__init__()
+        self.editor = editor
+        self.path = path
+        self.text = text
+        self.info = info
+        self.revision = revision
+        self.signals = _SaveSignals()
+
+    def run(self):
+        try:
+            write_text(self.path, self.text, self.info)
+            error = ''
+        except Exception as e:
+            error = str(e)
+        # Drop the snapshot as soon as it is on disk
+        self.text = None
+        self.signals.done.emit(self, error)
+
+
+class SavePipeline(QObject):
+    """
+    Saves editor buffers on a thread pool. The UI thread only snapshots the
+    text; line-ending conversion, encoding and the atomic write happen on
+    workers. Saves of the same path are serialised, and a newer snapshot
+    queued behind a running save replaces any older queued one.
+    """
+    saved = pyqtSignal(object, str)          # editor, path
+    failed = pyqtSignal(object, str, str)    # editor, path, error
+
+    def __init__(self, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self._running = {}   # path -> SaveJob
+        self._queued = {}    # path -> SaveJob waiting for the running one
+
+    def save(self, editor, path=None):
+        """Snapshot editor and queue it for writing to path (default: its file_path)."""
+        path = path or editor.file_path
+        info = getattr(editor, 'file_encoding', None) or DEFAULT_ENCODING
+        job = SaveJob(editor, path, editor.text(), info, getattr(editor, 'revision', 0))
+        job.setAutoDelete(False)
+        job.signals.done.connect(self._on_done)
+        if path in self._running:
+            self._queued[path] = job
+        else:
+            self._start(job)
+        return job
+
+    def save_all(self, editors):
+        """Queue every given editor; returns the number of saves started."""
+        count = 0
+        for editor in editors:
+            if getattr(editor, 'file_path', None):
+                self.save(editor)
+                count += 1
+        return count
+
+    def is_busy(self):
+        return bool(self._running)
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _start(self, job):
+        self._running[job.path] = job
+        self.pool.start(job)
+
+    def _on_done(self, job, error):
+        self._running.pop(job.path, None)
+        editor = job.editor
+        if error:
+            self.failed.emit(editor, job.path, error)
+        else:
+            # Only clear the modified flag if nothing was typed during the save
+            try:
+                if getattr(editor, 'revision', 0) == job.revision and job.path not in self._queued:
+                    editor.setModified(False)
+            except RuntimeError:
+                pass  # The tab was closed while its save was running
+            self.saved.emit(editor, job.path)
+        queued = self._queued.pop(job.path, None)
+        if queued is not None:
+            self._start(queued)
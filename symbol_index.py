@@ -0,0 +1,298 @@
+import ast
+import os
+import pickle
+import queue
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from fileio import atomic_open, file_signature
+from fuzzy import FuzzyMatcher
+from ignore import IgnoreMatcher
+
+INDEX_VERSION = 1
+# Larger files are skipped; they are rarely hand-written source
+MAX_SYMBOL_FILE_BYTES = 2 * 1024 * 1024
+# Files handed to a worker process at a time
+PARSE_BATCH = 64
+
+Symbol = namedtuple('Symbol', 'name kind line container path')
+
+C_EXTENSIONS = {'.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx', '.ino'}
+HTML_EXTENSIONS = {'.html', '.htm', '.xhtml'}
+
+_C_PATTERNS = [
+    ('class', re.compile(r'^\s*(?:template\s*<[^>]*>\s*)?(?:class|struct|union|enum(?:\s+class)?)\s+(\w+)[^;]*$', re.M)),
+    ('macro', re.compile(r'^\s*#\s*define\s+(\w+)', re.M)),
+    # A definition: return type and name on one line, arguments, then an opening brace
+    ('function', re.compile(r'^[\w:<>,*& \t~]*?\b([A-Za-z_][\w:~]*)\s*\([^;{)]*\)\s*(?:const\s*)?(?:noexcept\s*)?(?:->\s*[\w:<>*&]+\s*)?\{', re.M)),
+]
+_C_KEYWORDS = {'if', 'for', 'while', 'switch', 'return', 'sizeof', 'catch', 'else', 'do'}
+_HTML_PATTERNS = [
+    ('id', re.compile(r'''\bid\s*=\s*["']([^"']+)["']''', re.I)),
+    ('heading', re.compile(r'<h[1-6][^>]*>([^<]{1,80})</h[1-6]>', re.I)),
+]
+
+
+def is_symbol_source(path):
+    ext = os.path.splitext(path)[1].lower()
+    return ext in ('.py', '.pyw', '.pyi') or ext in C_EXTENSIONS or ext in HTML_EXTENSIONS
+
+
+def _python_symbols(source, path):
+    symbols = []
+
+    def visit(node, container):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                symbols.append(Symbol(child.name, 'class', child.lineno, container, path))
+                visit(child, f'{container}.{child.name}' if container else child.name)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = 'method' if isinstance(node, ast.ClassDef) else 'function'
+                symbols.append(Symbol(child.name, kind, child.lineno, container, path))
+            elif isinstance(child, (ast.Assign, ast.AnnAssign)) and isinstance(node, ast.Module):
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                for target in targets:
+                    if isinstance(target, ast.Name) and target.id.isupper():
+                        symbols.append(Symbol(target.id, 'constant', child.lineno, container, path))
+            elif isinstance(child, (ast.If, ast.Try, ast.With)):
+                # Definitions guarded by `if TYPE_CHECKING:`, try/except imports, ...
+                visit(child, container)
+
+    visit(ast.parse(source, path), '')
+    return symbols
+
+
+def _regex_symbols(source, path, patterns):
+    symbols = []
+    for kind, pattern in patterns:
+        for m in pattern.finditer(source):
+            name = m.group(1).strip()
+            if kind == 'function' and name.split('::')[-1] in _C_KEYWORDS:
+                continue
+            line = source.count('\n', 0, m.start(1)) + 1
+            container, _, short = name.rpartition('::')
+            symbols.append(Symbol(short or name, kind, line, container, path))
+    symbols.sort(key=lambda s: s.line)
+    return symbols
+
+
+def parse_file(path):
+    """
+    Return (path, signature, symbols) for one file. Runs in a worker process,
+    so it must not touch Qt. Unparseable files yield an empty symbol list.
+    """
+    signature = file_signature(path)
+    if signature is None or signature[1] > MAX_SYMBOL_FILE_BYTES:
+        return path, signature, []
+    try:
+        with open(path, 'rb') as f:
+            source = f.read().decode('utf-8', errors='replace')
+        ext = os.path.splitext(path)[1].lower()
+        if ext in C_EXTENSIONS:
+            return path, signature, _regex_symbols(source, path, _C_PATTERNS)
+        if ext in HTML_EXTENSIONS:
+            return path, signature, _regex_symbols(source, path, _HTML_PATTERNS)
+        return path, signature, _python_symbols(source, path)
+    except (OSError, SyntaxError, ValueError, RecursionError):
+        return path, signature, []
+
+
+def parse_batch(paths):
+    return [parse_file(path) for path in paths]
+
+
+class SymbolIndex:
+    """
+    Symbol table for one workspace folder: path -> (signature, symbols).
+    Queries go through a FuzzyMatcher; the indexer thread rebuilds it after
+    updates so the UI never pays for that, and queries in the meantime use
+    the previous one.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.lock = threading.RLock()
+        self.files = {}
+        self.ready = False
+        self._matcher = None
+        self._stale = True
+
+    def save(self, path):
+        with self.lock:
+            state = {'version': INDEX_VERSION, 'root': self.root, 'files': self.files}
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_open(path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path):
+        """Load a saved table; return False if it is missing or incompatible."""
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        if state.get('version') != INDEX_VERSION or state.get('root') != self.root:
+            return False
+        with self.lock:
+            self.files = state['files']
+            self._stale = True
+        return True
+
+    def is_current(self, path):
+        entry = self.files.get(path)
+        return entry is not None and entry[0] == file_signature(path)
+
+    def set_symbols(self, path, signature, symbols):
+        with self.lock:
+            self.files[path] = (signature, symbols)
+            self._stale = True
+
+    def remove(self, path):
+        with self.lock:
+            if self.files.pop(path, None) is not None:
+                self._stale = True
+
+    def paths_under(self, directory):
+        prefix = os.path.normpath(directory) + os.sep
+        with self.lock:
+            return [p for p in self.files if p.startswith(prefix)]
+
+    def symbol_count(self):
+        with self.lock:
+            return sum(len(symbols) for _, symbols in self.files.values())
+
+    def refresh_matcher(self):
+        """Rebuild the fuzzy matcher if symbols changed since the last build."""
+        with self.lock:
+            if not self._stale and self._matcher is not None:
+                return
+            symbols = [s for _, syms in self.files.values() for s in syms]
+            self._stale = False
+        matcher = FuzzyMatcher(
+            symbols,
+            text=lambda s: f'{s.container}.{s.name}' if s.container else s.name,
+            name=lambda s: s.name)
+        with self.lock:
+            self._matcher = matcher
+
+    def search(self, query, limit=50, cancel_event=None):
+        """Return up to limit Symbols ranked by fuzzy match on their (qualified) names; None if cancelled."""
+        if self._matcher is None:
+            self.refresh_matcher()
+        return self._matcher.search(query, limit, cancel_event)
+
+
+class SymbolIndexer(QThread):
+    """
+    Owns a SymbolIndex. Changed files are parsed in a process pool; loading,
+    incremental updates and periodic saves happen on this thread.
+    """
+    status = pyqtSignal(str)
+    ready = pyqtSignal()
+
+    def __init__(self, root, cache_path, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.index = SymbolIndex(root)
+        self.cache_path = cache_path
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._jobs = queue.Queue()
+        self._stop = threading.Event()
+        self._dirty = False
+
+    def update_paths(self, paths):
+        """Queue paths (files or folders) to be re-checked and re-parsed."""
+        self._jobs.put(list(paths))
+
+    def stop(self):
+        self._stop.set()
+        self._jobs.put(None)
+        self.wait()
+
+    def run(self):
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            self._initial_sync(pool)
+            while not self._stop.is_set():
+                try:
+                    paths = self._jobs.get(timeout=5)
+                except queue.Empty:
+                    if self._dirty:
+                        self._save()
+                    continue
+                if paths is None:
+                    break
+                self._update(pool, paths)
+        if self._dirty:
+            self._save()
+
+    def _parse(self, pool, paths):
+        """Parse paths in the pool, batched to keep pickling overhead low."""
+        batches = [paths[i:i + PARSE_BATCH] for i in range(0, len(paths), PARSE_BATCH)]
+        for results in pool.map(parse_batch, batches):
+            for path, signature, symbols in results:
+                if signature is None:
+                    self.index.remove(path)
+                else:
+                    self.index.set_symbols(path, signature, symbols)
+                self._dirty = True
+            if self._stop.is_set():
+                break
+
+    def _initial_sync(self, pool):
+        index = self.index
+        loaded = index.load(self.cache_path)
+        self.status.emit("Updating symbol index..." if loaded else "Building symbol index...")
+        seen, changed = set(), []
+        for path in IgnoreMatcher(index.root).walk_files(self._stop):
+            if is_symbol_source(path):
+                seen.add(path)
+                if not index.is_current(path):
+                    changed.append(path)
+        if self._stop.is_set():
+            return
+        self._parse(pool, changed)
+        for path in [p for p in list(index.files) if p not in seen]:
+            index.remove(path)
+            self._dirty = True
+        index.refresh_matcher()
+        index.ready = True
+        self._save()
+        self.status.emit(f"Symbol index ready ({index.symbol_count()} symbols)")
+        self.ready.emit()
+
+    def _update(self, pool, paths):
+        index = self.index
+        matcher = IgnoreMatcher(index.root)
+        changed, stale = [], []
+        for path in paths:
+            path = os.path.normpath(path)
+            if os.path.isdir(path):
+                seen = set()
+                for target in matcher.walk_files(self._stop, start=path):
+                    if is_symbol_source(target):
+                        seen.add(target)
+                        if not index.is_current(target):
+                            changed.append(target)
+                stale += [p for p in index.paths_under(path) if p not in seen]
+            elif os.path.isfile(path) and is_symbol_source(path) and not matcher.is_ignored(path, False):
+                if not index.is_current(path):
+                    changed.append(path)
+            else:
+                # Deleted file or folder
+                stale += [path] + index.paths_under(path)
+        for gone in stale:
+            index.remove(gone)
+            self._dirty = True
+        if changed:
+            self._parse(pool, changed)
+        index.refresh_matcher()
+
+    def _save(self):
+        try:
+            self.index.save(self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            self.status.emit(f"Could not save symbol index: {e}")
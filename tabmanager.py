@@ -1,19 +1,275 @@
-from PyQt5.QtWidgets import QTabWidget
-from editor import Editor
+import os
+import time
+
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QTabWidget, QLabel
+from editor import Editor, FEATURE_LINE_LIMIT
+from encoding import detect, read_text
+from largefile import LargeFileLoader, is_large_file, LARGE_FILE_THRESHOLD_MB
+from fileviewer import LargeFileViewer, is_oversized_file, VIEWER_THRESHOLD_MB
+from lexers import detect_language, HIGHLIGHT_SIZE_LIMIT_MB
+
+# Materialised editors kept before idle, unmodified ones are evicted
+MAX_LIVE_TABS = 40
+# Evict idle tabs once the live buffers hold more than this
+TAB_MEMORY_BUDGET_MB = 256
+EVICT_INTERVAL_MS = 60 * 1000
+
+
+class TabPlaceholder(QLabel):
+    """
+    Stand-in for a tab whose file has not been read yet (or was evicted).
+    Holds only the path and view state; TabManager swaps in the real widget
+    when the tab is activated.
+    """
+
+    def __init__(self, path, line=0, index=0, first_line=0, parent=None):
+        super().__init__(os.path.basename(path), parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.file_path = path
+        self.cursor = (line, index)
+        self.first_line = first_line
+
+    def isModified(self):
+        return False
+
+    def isReadOnly(self):
+        return True
+
 
 class TabManager(QTabWidget):
+    tab_materialized = pyqtSignal(object)   # the widget that replaced a placeholder
+    open_files_changed = pyqtSignal()       # tabs holding file buffers were added or removed
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.viewer_threshold_mb = VIEWER_THRESHOLD_MB
+        self.large_file_threshold_mb = LARGE_FILE_THRESHOLD_MB
+        self.highlight_limit_mb = HIGHLIGHT_SIZE_LIMIT_MB
+        self.feature_line_limit = FEATURE_LINE_LIMIT
+        self.max_live_tabs = MAX_LIVE_TABS
+        self.memory_budget_mb = TAB_MEMORY_BUDGET_MB
         self.setTabsClosable(True)
         self.tabCloseRequested.connect(self.close_tab)
+        self.currentChanged.connect(self._on_current_changed)
+        self._evict_timer = QTimer(self)
+        self._evict_timer.setInterval(EVICT_INTERVAL_MS)
+        self._evict_timer.timeout.connect(self.evict_idle)
+        self._evict_timer.start()
+        # Tab swaps insert and remove in one go; report once
+        self._files_timer = QTimer(self)
+        self._files_timer.setSingleShot(True)
+        self._files_timer.setInterval(0)
+        self._files_timer.timeout.connect(self.open_files_changed)
         self.new_tab()
     
-    def new_tab(self, filename=None, text='', language='python'):
-        editor = Editor(language=language)
+    def new_tab(self, filename=None, text='', language=None, path=None):
+        # Oversized files cannot live in a QScintilla buffer; view them instead
+        if path and is_oversized_file(path, self.viewer_threshold_mb):
+            viewer = LargeFileViewer(path)
+            idx = self.addTab(viewer, filename if filename else os.path.basename(path))
+            self.setCurrentIndex(idx)
+            return viewer
+        editor = self._make_editor(language)
         editor.setText(text)
         idx = self.addTab(editor, filename if filename else 'Untitled')
         self.setCurrentIndex(idx)
         return editor
         
+    def _make_editor(self, language):
+        editor = Editor(language=language)
+        editor.feature_line_limit = self.feature_line_limit
+        return editor
+
+    def new_large_tab(self, path, encoding='utf-8'):
+        """Open path in a new tab, streaming its contents in the background."""
+        # Plain text: running a lexer over hundreds of MB defeats the point
+        editor = self.new_tab(filename=os.path.basename(path), language=None)
+        editor.file_path = path
+        loader = LargeFileLoader(path, encoding=encoding, parent=editor)
+        editor.begin_chunked_load(loader)
+        loader.start()
+        return editor, loader
+
+    def new_lazy_tab(self, path, line=0, index=0, first_line=0):
+        """Add a tab for path without reading it; the file is loaded on first activation."""
+        placeholder = TabPlaceholder(path, line, index, first_line)
+        self.addTab(placeholder, os.path.basename(path))
+        self.setTabToolTip(self.indexOf(placeholder), path)
+        return placeholder
+
+    def find_tab(self, path):
+        """Return the index of the tab showing path, or -1."""
+        path = os.path.normpath(path)
+        for i in range(self.count()):
+            tab_path = getattr(self.widget(i), 'file_path', None)
+            if tab_path and os.path.normpath(tab_path) == path:
+                return i
+        return -1
+
     def close_tab(self, index):
-        self.removeTab(index)
\ No newline at end of file
+        editor = self.widget(index)
+        if editor is not None and getattr(editor, 'loader', None) is not None:
+            editor.loader.cancel()
+            editor.loader.wait()
+        if isinstance(editor, LargeFileViewer):
+            editor.shutdown()
+        if getattr(editor, 'blame_margin', None) is not None:
+            editor.blame_margin.detach()
+            editor.blame_margin = None
+        self.removeTab(index)
+
+    def tabInserted(self, index):
+        super().tabInserted(index)
+        self._files_timer.start()
+
+    def tabRemoved(self, index):
+        super().tabRemoved(index)
+        self._files_timer.start()
+
+    def live_file_paths(self):
+        """Paths of files loaded into editor buffers (placeholders and viewers excluded)."""
+        return [w.file_path for w in map(self.widget, range(self.count()))
+                if isinstance(w, Editor) and getattr(w, 'file_path', None)]
+
+    # --- Lazy tabs ---
+    def _on_current_changed(self, index):
+        widget = self.widget(index)
+        if widget is None:
+            return
+        if isinstance(widget, TabPlaceholder):
+            widget = self.materialize(index)
+        widget.last_active = time.monotonic()
+        # Opening a tab may push the live set over budget
+        QTimer.singleShot(0, self.evict_idle)
+
+    def materialize(self, index):
+        """Replace the placeholder at index with a real editor or viewer and return it."""
+        placeholder = self.widget(index)
+        path = placeholder.file_path
+        try:
+            widget = self._create_widget(path)
+        except Exception as e:
+            placeholder.setText(f"Could not open {path}:\n{e}")
+            return placeholder
+        if isinstance(widget, Editor):
+            line, col = placeholder.cursor
+            first_line = placeholder.first_line
+            if widget.is_loading():
+                widget.loader.finished_loading.connect(
+                    lambda: self._restore_view(widget, line, col, first_line))
+            else:
+                self._restore_view(widget, line, col, first_line)
+        self._swap(index, widget)
+        self.tab_materialized.emit(widget)
+        return widget
+
+    def _create_widget(self, path):
+        if is_oversized_file(path, self.viewer_threshold_mb):
+            return LargeFileViewer(path)
+        if is_large_file(path, self.large_file_threshold_mb):
+            info = detect(path)
+            editor = self._make_editor(None)
+            editor.file_path = path
+            editor.set_file_encoding(info)
+            loader = LargeFileLoader(path, encoding=info.stream_codec(), parent=editor)
+            editor.begin_chunked_load(loader)
+            loader.start()
+            return editor
+        text, info = read_text(path)
+        editor = self._make_editor(self.detect_language(path, text))
+        editor.setText(text)
+        editor.setModified(False)
+        editor.file_path = path
+        editor.set_file_encoding(info)
+        return editor
+
+    def detect_language(self, path, text=None):
+        return detect_language(path, text[:512] if text else None, self.highlight_limit_mb)
+
+    @staticmethod
+    def _restore_view(editor, line, col, first_line):
+        editor.setCursorPosition(line, col)
+        editor.setFirstVisibleLine(first_line)
+
+    def _swap(self, index, widget):
+        old = self.widget(index)
+        title, tooltip = self.tabText(index), self.tabToolTip(index)
+        was_current = self.currentIndex() == index
+        blocked = self.blockSignals(True)
+        self.insertTab(index, widget, title)
+        self.setTabToolTip(index, tooltip)
+        self.removeTab(index + 1)
+        if was_current:
+            self.setCurrentIndex(index)
+        self.blockSignals(blocked)
+        old.deleteLater()
+
+    def _is_evictable(self, widget):
+        return (isinstance(widget, Editor) and getattr(widget, 'file_path', None)
+                and not widget.isModified() and not widget.is_loading()
+                and not widget.is_replacing() and widget is not self.currentWidget())
+
+    def evict(self, index):
+        """Turn the unmodified editor at index back into a placeholder."""
+        editor = self.widget(index)
+        if getattr(editor, 'blame_margin', None) is not None:
+            editor.blame_margin.detach()
+            editor.blame_margin = None
+        line, col = editor.getCursorPosition()
+        placeholder = TabPlaceholder(editor.file_path, line, col, editor.firstVisibleLine())
+        self._swap(index, placeholder)
+
+    def evict_idle(self):
+        """Evict least recently used idle tabs while over the tab cap or memory budget."""
+        live = [self.widget(i) for i in range(self.count())
+                if not isinstance(self.widget(i), TabPlaceholder)]
+        budget = self.memory_budget_mb * 1024 * 1024
+        used = sum(w.length() for w in live if isinstance(w, Editor))
+        count = len(live)
+        candidates = sorted((w for w in live if self._is_evictable(w)),
+                            key=lambda w: getattr(w, 'last_active', 0))
+        for editor in candidates:
+            if count <= self.max_live_tabs and used <= budget:
+                break
+            used -= editor.length()
+            count -= 1
+            self.evict(self.indexOf(editor))
+
+    # --- Session ---
+    def session_state(self):
+        """Return (tabs, current) describing the file tabs, for persisting."""
+        tabs, current = [], -1
+        for i in range(self.count()):
+            widget = self.widget(i)
+            path = getattr(widget, 'file_path', None)
+            if not path:
+                continue
+            if i == self.currentIndex():
+                current = len(tabs)
+            if isinstance(widget, TabPlaceholder):
+                (line, col), first_line = widget.cursor, widget.first_line
+            elif isinstance(widget, Editor):
+                line, col = widget.getCursorPosition()
+                first_line = widget.firstVisibleLine()
+            else:
+                line = col = first_line = 0
+            tabs.append({'path': path, 'line': line, 'index': col, 'first_line': first_line})
+        return tabs, current
+
+    def restore_session(self, tabs, current=0):
+        """Re-open saved tabs as placeholders; only the current one is read from disk."""
+        tabs = [t for t in tabs if os.path.isfile(t.get('path', ''))]
+        if not tabs:
+            return
+        self.blockSignals(True)
+        # Drop the blank start-up tab
+        if self.count() == 1 and not getattr(self.widget(0), 'file_path', None) \
+                and not self.widget(0).isModified() and not self.widget(0).text():
+            self.removeTab(0)
+        for tab in tabs:
+            self.new_lazy_tab(tab['path'], tab.get('line', 0), tab.get('index', 0), tab.get('first_line', 0))
+        current = min(max(current, 0), len(tabs) - 1)
+        self.setCurrentIndex(self.count() - len(tabs) + current)
+        self.blockSignals(False)
+        self._on_current_changed(self.currentIndex())
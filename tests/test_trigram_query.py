@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from trigram_query import required_literals, trigrams
+
+
+@pytest.mark.parametrize('pattern, subject', [
+    ('foo{0,2}bar', 'fobar'),
+    ('ab{2,3}cd', 'abbcd'),
+    ('x{1000}yz', 'x' * 1000 + 'yz'),
+    ('abc{2}def', 'abccdef'),
+    ('foo{bar', 'foo{bar'),
+    ('(abc){3}defg', 'abcabcabcdefg'),
+    ('hello.*world', 'hello, world'),
+    ('colou?r', 'color'),
+    (r'foo\x20bar', 'foo bar'),
+    (r'foo\u0020bar', 'foo bar'),
+    (r'foo\U00000020bar', 'foo bar'),
+    (r'foo\N{SPACE}bar', 'foo bar'),
+    (r'foo\040bar', 'foo bar'),
+    (r'(ab)\1\1cde', 'abababcde'),
+    (r'(x)(y)(z)(a)(b)(c)(d)(e)(f)(g)\10hij', 'xyzabcdefgghij'),
+    (r'\d\d\dxyz', '123xyz'),
+    (r'[^]abc]xyz', 'Qxyz'),
+    (r'[]abc]xyz', ']xyz'),
+    (r'[a\]bcd]xyz', ']xyz'),
+])
+def test_literals_occur_in_every_match(pattern, subject):
+    assert re.search(pattern, subject)
+    for literal in required_literals(pattern, regex=True):
+        assert literal in subject
+
+
+def test_quantifier_body_is_not_a_literal():
+    assert required_literals('foo{0,2}bar', regex=True) == ['bar']
+    assert required_literals('x{1000}yz', regex=True) == []
+
+
+def test_plain_text():
+    assert required_literals('needle') == ['needle']
+    assert required_literals('ab') == []
+
+
+def test_class_starting_with_bracket():
+    assert required_literals('[^]abc]xyz', regex=True) == ['xyz']
+
+
+def test_trigrams_are_lowercase_and_per_line():
+    assert trigrams(b'AbC\nd') == {int.from_bytes(b'abc', 'big')}
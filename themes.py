@@ -1,4 +1,6 @@
 from PyQt5.QtGui import QColor
+
+import lexers
 class ThemeManager:
     def __init__(self, window, editor_getter=None, file_tree=None):
         """
@@ -54,6 +56,8 @@ class ThemeManager:
         if stylesheet:
             self.window.setStyleSheet(stylesheet)
             self.current_theme = name
+            # Lexers are themed once here and shared by all editors
+            lexers.registry.set_theme(name)
             # Editor widgets: apply background/foreground via API if needed
             if self.editor_getter:
                 for editor in self.editor_getter():
@@ -65,15 +69,9 @@ class ThemeManager:
             print(f"Theme '{name}' not found!")
 
     def apply_editor_colors(self, editor, theme_name):
-        try:
-            from PyQt5.Qsci import QsciScintilla
-            if isinstance(editor, QsciScintilla):
-                # ... set colors ...
-                if hasattr(editor, "styleClearAll"):
-                    editor.styleClearAll()
-                return
-        except ImportError:
-            pass
+        if hasattr(editor, "apply_palette"):
+            editor.apply_palette(lexers.palette(theme_name))
+            return
 
         # For QTextEdit/QPlainTextEdit
         if hasattr(editor, "setStyleSheet"):
@@ -0,0 +1,283 @@
+import bisect
+import os
+import pickle
+import queue
+import threading
+from array import array
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ignore import IgnoreMatcher
+from findinfiles import is_binary
+from trigram_query import trigrams
+
+INDEX_VERSION = 1
+# Larger files are not indexed; they are always handed to the exact matcher
+MAX_INDEXED_FILE_BYTES = 4 * 1024 * 1024
+# Rebuild postings once this fraction of file ids is dead
+COMPACT_RATIO = 0.25
+
+
+class TrigramIndex:
+    """
+    Trigram index over the files of one workspace folder.
+    Postings map a trigram to a sorted array of file ids. Changed files get
+    a new id and their old id is tombstoned, so updates never rewrite
+    postings; compact() drops dead ids once they pile up.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.lock = threading.RLock()
+        self.paths = []          # file id -> path (None once dead)
+        self.stats = []          # file id -> (mtime_ns, size)
+        self.ids = {}            # path -> live file id
+        self.postings = {}       # trigram -> array('I') of file ids
+        self.unindexed = set()   # paths too large or unreadable for indexing
+        self.dead = 0
+        self.ready = False
+
+    # --- Persistence ---
+    def save(self, path):
+        with self.lock:
+            state = {
+                'version': INDEX_VERSION,
+                'root': self.root,
+                'paths': self.paths,
+                'stats': self.stats,
+                'postings': self.postings,
+                'unindexed': self.unindexed,
+                'dead': self.dead,
+            }
+            tmp = path + '.tmp'
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Load a saved index; return False if it is missing or incompatible."""
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        if state.get('version') != INDEX_VERSION or state.get('root') != self.root:
+            return False
+        with self.lock:
+            self.paths = state['paths']
+            self.stats = state['stats']
+            self.postings = state['postings']
+            self.unindexed = state['unindexed']
+            self.dead = state['dead']
+            self.ids = {p: i for i, p in enumerate(self.paths) if p is not None}
+        return True
+
+    # --- Updates ---
+    def _stat(self, path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def is_current(self, path):
+        file_id = self.ids.get(path)
+        if file_id is None:
+            return path in self.unindexed
+        try:
+            return self.stats[file_id] == self._stat(path)
+        except OSError:
+            return False
+
+    def remove(self, path):
+        with self.lock:
+            self.unindexed.discard(path)
+            file_id = self.ids.pop(path, None)
+            if file_id is not None:
+                self.paths[file_id] = None
+                self.dead += 1
+
+    def paths_under(self, directory):
+        prefix = os.path.normpath(directory) + os.sep
+        with self.lock:
+            return [p for p in list(self.ids) + list(self.unindexed) if p.startswith(prefix)]
+
+    def add(self, path):
+        """(Re)index one file. Reading and trigram extraction happen outside the lock."""
+        try:
+            stat = self._stat(path)
+            if stat[1] > MAX_INDEXED_FILE_BYTES:
+                data = None
+            else:
+                with open(path, 'rb') as f:
+                    data = f.read()
+        except OSError:
+            self.remove(path)
+            return
+        grams = None if data is None or is_binary(data) else trigrams(data)
+        with self.lock:
+            self.remove(path)
+            if grams is None:
+                if data is None:
+                    self.unindexed.add(path)
+                return
+            file_id = len(self.paths)
+            self.paths.append(path)
+            self.stats.append(stat)
+            self.ids[path] = file_id
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = array('I', [file_id])
+                else:
+                    # New ids are always the largest, so postings stay sorted
+                    posting.append(file_id)
+
+    def needs_compaction(self):
+        return self.dead > COMPACT_RATIO * max(len(self.paths), 1)
+
+    def compact(self):
+        """Renumber live files and drop postings for dead ids."""
+        with self.lock:
+            remap, paths, stats = {}, [], []
+            for old_id, path in enumerate(self.paths):
+                if path is not None:
+                    remap[old_id] = len(paths)
+                    paths.append(path)
+                    stats.append(self.stats[old_id])
+            postings = {}
+            for gram, ids in self.postings.items():
+                live = array('I', (remap[i] for i in ids if i in remap))
+                if live:
+                    postings[gram] = live
+            self.paths, self.stats, self.postings = paths, stats, postings
+            self.ids = {p: i for i, p in enumerate(paths)}
+            self.dead = 0
+
+    # --- Queries ---
+    def candidates(self, literals):
+        """
+        Return the paths that may contain all of `literals`, or None if the
+        index cannot narrow the search (not ready, or no usable literal).
+        """
+        grams = set()
+        for literal in literals:
+            # Index folding is ASCII-only, so non-ASCII literals could miss
+            # case-insensitive matches
+            if literal.isascii():
+                grams |= trigrams(literal.encode('utf-8'))
+        if not grams or not self.ready:
+            return None
+        with self.lock:
+            lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+            if not lists[0]:
+                result = set()
+            else:
+                result = set(lists[0])
+                for ids in lists[1:]:
+                    result = {i for i in result if self._contains(ids, i)}
+                    if not result:
+                        break
+            paths = [self.paths[i] for i in result if self.paths[i] is not None]
+            return paths + sorted(self.unindexed)
+
+    @staticmethod
+    def _contains(ids, file_id):
+        i = bisect.bisect_left(ids, file_id)
+        return i < len(ids) and ids[i] == file_id
+
+
+class TrigramIndexer(QThread):
+    """
+    Owns a TrigramIndex and runs all index work on one background thread:
+    the initial load/build, incremental updates and periodic saves.
+    """
+    status = pyqtSignal(str)
+    ready = pyqtSignal()
+
+    def __init__(self, root, cache_path, parent=None):
+        super().__init__(parent)
+        self.index = TrigramIndex(root)
+        self.cache_path = cache_path
+        self._jobs = queue.Queue()
+        self._stop = threading.Event()
+        self._dirty = False
+
+    def update_paths(self, paths):
+        """Queue paths (files or folders) to be re-checked and re-indexed."""
+        self._jobs.put(list(paths))
+
+    def stop(self):
+        self._stop.set()
+        self._jobs.put(None)
+        self.wait()
+
+    def run(self):
+        self._initial_sync()
+        while not self._stop.is_set():
+            try:
+                paths = self._jobs.get(timeout=5)
+            except queue.Empty:
+                if self._dirty:
+                    self._save()
+                continue
+            if paths is None:
+                break
+            self._update(paths)
+        if self._dirty:
+            self._save()
+
+    def _initial_sync(self):
+        index = self.index
+        loaded = index.load(self.cache_path)
+        self.status.emit("Updating search index..." if loaded else "Building search index...")
+        matcher = IgnoreMatcher(index.root)
+        seen = set()
+        for path in matcher.walk_files(self._stop):
+            seen.add(path)
+            if not index.is_current(path):
+                index.add(path)
+                self._dirty = True
+        if self._stop.is_set():
+            return
+        for path in [p for p in list(index.ids) + list(index.unindexed) if p not in seen]:
+            index.remove(path)
+            self._dirty = True
+        if index.needs_compaction():
+            index.compact()
+        index.ready = True
+        self._save()
+        self.status.emit(f"Search index ready ({len(index.ids)} files)")
+        self.ready.emit()
+
+    def _update(self, paths):
+        index = self.index
+        matcher = IgnoreMatcher(index.root)
+        for path in paths:
+            path = os.path.normpath(path)
+            if os.path.isdir(path):
+                seen = set()
+                for target in matcher.walk_files(self._stop, start=path):
+                    seen.add(target)
+                    if not index.is_current(target):
+                        index.add(target)
+                        self._dirty = True
+                stale = [p for p in index.paths_under(path) if p not in seen]
+            elif os.path.isfile(path) and not matcher.is_ignored(path, False):
+                if not index.is_current(path):
+                    index.add(path)
+                    self._dirty = True
+                stale = []
+            else:
+                # Deleted file or folder
+                stale = [path] + index.paths_under(path)
+            for gone in stale:
+                index.remove(gone)
+                self._dirty = True
+        if index.needs_compaction():
+            index.compact()
+
+    def _save(self):
+        try:
+            self.index.save(self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            self.status.emit(f"Could not save search index: {e}")
@@ -0,0 +1,92 @@
+REGEX_META = set('.^$*+?{}[]()|')
+# Digits taken by escapes with a fixed-length argument
+ESCAPE_ARGUMENT_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def trigrams(data):
+    """Return the set of lowercase byte trigrams (as ints) in data."""
+    data = data.lower()
+    grams = set()
+    for line in data.splitlines():
+        grams.update(int.from_bytes(line[i:i + 3], 'big') for i in range(len(line) - 2))
+    return grams
+
+
+def required_literals(text, regex=False):
+    """
+    Return substrings that every match of the query must contain.
+    An empty list means the query cannot be narrowed by the index.
+    """
+    if not regex:
+        return [text] if len(text) >= 3 else []
+    runs, current, i = [], [], 0
+    while i < len(text):
+        c = text[i]
+        if c == '|':
+            return []
+        if c == '\\' and i + 1 < len(text):
+            nxt = text[i + 1]
+            i += 2
+            if nxt.isalnum():
+                runs.append(''.join(current))
+                current = []
+                # The escape's argument is not literal text either
+                if nxt in ESCAPE_ARGUMENT_LENGTHS:
+                    i += ESCAPE_ARGUMENT_LENGTHS[nxt]
+                elif nxt == 'N' and text.startswith('{', i):
+                    j = text.find('}', i)
+                    i = j + 1 if j != -1 else len(text)
+                elif nxt.isdigit():
+                    # Octal escapes and backreferences: up to two more digits
+                    end = i
+                    while end < min(i + 2, len(text)) and text[end].isdigit():
+                        end += 1
+                    i = end
+            else:
+                current.append(nxt)
+            continue
+        if c in '*?{' or (c == '+' and not current):
+            # The previous character is optional (or repeated from zero)
+            if c != '+' and current:
+                current.pop()
+            runs.append(''.join(current))
+            current = []
+            if c == '{':
+                # The {m,n} body is a count, not text
+                j = text.find('}', i + 1)
+                i = j if j != -1 else i
+        elif c == '(':
+            # Group contents might be optional; skip the whole group
+            runs.append(''.join(current))
+            current = []
+            depth = 0
+            while i < len(text):
+                if text[i] == '\\':
+                    i += 1
+                elif text[i] == '(':
+                    depth += 1
+                elif text[i] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+        elif c == '[':
+            runs.append(''.join(current))
+            current = []
+            # A ']' right after '[' or '[^' is a member, not the end
+            j = i + 1
+            if text.startswith('^', j):
+                j += 1
+            if text.startswith(']', j):
+                j += 1
+            while j < len(text) and text[j] != ']':
+                j += 2 if text[j] == '\\' else 1
+            i = min(j, len(text))
+        elif c in REGEX_META:
+            runs.append(''.join(current))
+            current = []
+        else:
+            current.append(c)
+        i += 1
+    runs.append(''.join(current))
+    return [r for r in runs if len(r) >= 3]